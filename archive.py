@@ -0,0 +1,122 @@
+import glob
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+SEGMENT_BYTES = 256 * 1024 * 1024   # A segment is closed and a new one started past this size
+SEGMENT_PATTERN = "segment-{:05d}.z"
+INDEX_FILENAME = "index.sqlite"
+COMPRESSION_LEVEL = 1    # zlib level 1 is several times faster than the default 6 and barely larger on HTML
+
+
+def read_record(path, offset, length):
+    """Read and decompress one archived page. Needs no index, so pool workers can call it directly."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return zlib.decompress(f.read(length)).decode('utf-8')
+
+
+class PageArchive:
+    """Append-only archive of the raw pages the scraper fetched.
+
+    Each page is zlib-compressed on its own and appended to the current
+    segment file (segment-00001.z, ...), so any single page can be read back
+    without decompressing its neighbours. Segments are never rewritten; once
+    one passes `segment_bytes` the next page starts a new one. index.sqlite
+    maps every (URL, fetch time) to the segment, offset and length of that
+    copy, so a URL fetched on several runs keeps every version.
+    """
+
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, level=COMPRESSION_LEVEL):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, INDEX_FILENAME), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                stage TEXT NOT NULL,
+                format TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                raw_size INTEGER NOT NULL
+            )""")
+        self._conn.execute('CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at)')
+        self._conn.commit()
+        segments = sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN.replace('{:05d}', '*'))))
+        self._segment = int(os.path.basename(segments[-1])[8:13]) if segments else 1
+        self._file = open(self.segment_path(self._segment), 'ab')
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, SEGMENT_PATTERN.format(segment))
+
+    def put(self, url, stage, page_format, text, fetched_at=None):
+        """Archive one fetched page; `stage` is the fetch stage ('browse', 'detail', ...), `page_format` 'html' or 'json'."""
+        raw = text.encode('utf-8')
+        data = zlib.compress(raw, self.level)
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            if self._file.tell() and self._file.tell() + len(data) > self.segment_bytes:
+                self._file.close()
+                self._segment += 1
+                self._file = open(self.segment_path(self._segment), 'ab')
+            offset = self._file.tell()
+            self._file.write(data)
+            self._file.flush()
+            # The bytes are in the segment before the index points at them
+            self._conn.execute('INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                               (url, fetched_at, stage, page_format, self._segment, offset, len(data), len(raw)))
+            self._conn.commit()
+
+    def get(self, url, at=None):
+        """Return the text of the newest copy of `url` fetched at or before `at` (default: the newest), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT segment, offset, length FROM pages WHERE url = ? AND fetched_at <= ? '
+                'ORDER BY fetched_at DESC LIMIT 1', (url, float('inf') if at is None else at)).fetchone()
+        return read_record(self.segment_path(row[0]), row[1], row[2]) if row else None
+
+    def has(self, url):
+        """Whether any copy of `url` is archived."""
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM pages WHERE url = ? LIMIT 1', (url,)).fetchone() is not None
+
+    def history(self, url):
+        """Return [(fetch time, stage), ...] for every archived copy of `url`, oldest first."""
+        with self._lock:
+            return self._conn.execute('SELECT fetched_at, stage FROM pages WHERE url = ? ORDER BY fetched_at',
+                                      (url,)).fetchall()
+
+    def latest(self):
+        """Locate the newest copy of every archived URL, in the order they were fetched.
+
+        Returns (url, stage, format, segment path, offset, length) tuples, ready
+        to hand to `read_record`.
+        """
+        with self._lock:
+            # SQLite takes the bare columns from the row that holds the MAX()
+            rows = self._conn.execute('SELECT url, stage, format, segment, offset, length, MAX(fetched_at) AS fetched '
+                                      'FROM pages GROUP BY url ORDER BY fetched').fetchall()
+        return [(url, stage, page_format, self.segment_path(segment), offset, length)
+                for url, stage, page_format, segment, offset, length, _ in rows]
+
+    def stats(self):
+        """Return {'pages', 'urls', 'segments', 'stored_bytes', 'raw_bytes'} for the whole archive."""
+        with self._lock:
+            pages, urls, stored, raw = self._conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT url), COALESCE(SUM(length), 0), COALESCE(SUM(raw_size), 0) '
+                'FROM pages').fetchone()
+        return {'pages': pages, 'urls': urls, 'segments': self._segment, 'stored_bytes': stored, 'raw_bytes': raw}
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._conn.close()
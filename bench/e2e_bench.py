@@ -0,0 +1,201 @@
+"""End-to-end benchmark: scrap.py against the local stub server, then plot.py at several sizes.
+
+    python -m bench.e2e_bench                                   # 2000 games, 50 ms latency
+    python -m bench.e2e_bench --latency 200 --error-rate 0.01 --catalogue-size 10000
+    python -m bench.e2e_bench --recordings bench/recordings     # replay recorded pages where present
+    python -m bench.e2e_bench --skip-crawl --plot-rows 10000,100000,1000000
+
+The crawl runs in this process against a stub server on a free port, with a
+fresh store and cache in a temporary directory, and reports pages/s, games/s
+and p50/p99 fetch and parse latency. plot.py is then timed in a subprocess
+over synthetic games.csv files of each --plot-rows size (its browser tab is
+suppressed).
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from bench import synthetic
+from bench.stub_server import make_server
+
+PLOT_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'plot.py')
+PLOT_RUNNER = ("import os, runpy, sys, webbrowser; webbrowser.open = lambda *args, **kwargs: True; "
+               "sys.argv = sys.argv[1:]; sys.path.insert(0, os.path.dirname(sys.argv[0])); "
+               "runpy.run_path(sys.argv[0], run_name='__main__')")
+PLOT_YEARS = 67  # Synthetic plot rows wrap their release dates around this many years
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def start_stub(args):
+    server = make_server(0, args.catalogue_size, args.recordings, latency=args.latency / 1000,
+                         jitter=args.jitter / 1000, error_rate=args.error_rate, seed=args.seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def bench_crawl(args):
+    """Crawl the stub's whole catalogue once; returns a dict of results."""
+    server, base_url = start_stub(args)
+    # scrap.py reads its URLs at import time, so point them at the stub first
+    os.environ['METACRITIC_BASE_URL'] = os.environ['METACRITIC_API_URL'] = base_url
+    import scrap
+    import telemetry
+    from extract import get_backend
+    from fetcher import Fetcher, ResponseCache
+    from ratelimit import RateLimiter
+    from store import GameStore
+
+    class SampledMetrics(telemetry.Metrics):
+        """Metrics that also keep how long each fetch and each parse took, for percentiles."""
+
+        def __init__(self):
+            super().__init__()
+            self.fetch_seconds, self.parse_seconds = [], []
+
+        def observe(self, stage, seconds, calls=1):
+            super().observe(stage, seconds, calls)
+            if stage.endswith('_fetch'):
+                self.fetch_seconds.append(seconds)
+            elif stage.endswith('_parse'):
+                self.parse_seconds.append(seconds)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = GameStore(os.path.join(tmp, 'games.sqlite'))
+        limiter = RateLimiter(args.rate, args.max_in_flight)
+        metrics = SampledMetrics()
+        fetcher = Fetcher(limiter, ResponseCache(os.path.join(tmp, 'http_cache.sqlite'), scrap.CACHE_MAX_BYTES),
+                          scrap.HEADERS, pool_size=args.max_in_flight + 1, metrics=metrics)
+        executor = ThreadPoolExecutor(max_workers=args.max_in_flight)
+        template = scrap.JSON_LISTING_URL_TEMPLATE if args.source == 'json' else scrap.BROWSE_URL_TEMPLATE
+        store.start_journal(template, scrap.START_PAGE, args.source)
+        telemetry.set_log_mode('verbose' if args.verbose else 'quiet')
+        log = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        start = time.perf_counter()
+        try:
+            with log:
+                totals = scrap.crawl(store, fetcher, executor, get_backend(args.parser), scrap.START_PAGE, template,
+                                     source=args.source)
+                recovered = scrap.drain_retries(store, fetcher, executor, get_backend(args.parser),
+                                                args.retry_wait)['recovered']
+        finally:
+            wall = time.perf_counter() - start
+            executor.shutdown()
+            fetcher.close()
+            games = len(store)
+            retries_left = sum(store.retry_counts(scrap.RETRY_MAX_ATTEMPTS).values())
+            store.close()
+            server.shutdown()
+
+    return {'catalogue_size': args.catalogue_size, 'wall_s': wall, 'pages': totals['pages'], 'games': games,
+            'retries_recovered': recovered, 'retries_left': retries_left, 'throttles': limiter.throttles,
+            'requests': metrics.counters.get('requests', 0),
+            'mb_downloaded': metrics.counters.get('bytes_downloaded', 0) / 1e6,
+            'pages_per_s': totals['pages'] / wall, 'games_per_s': games / wall,
+            'fetch_p50_ms': percentile(metrics.fetch_seconds, 0.50) * 1000,
+            'fetch_p99_ms': percentile(metrics.fetch_seconds, 0.99) * 1000,
+            'parse_p50_ms': percentile(metrics.parse_seconds, 0.50) * 1000,
+            'parse_p99_ms': percentile(metrics.parse_seconds, 0.99) * 1000}
+
+
+def write_plot_csv(path, rows):
+    """Write a games.csv of `rows` synthetic games with release dates spread over PLOT_YEARS years."""
+    from scrap import clean_scores
+    from store import CSV_HEADER
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for game_id in range(rows):
+            g = synthetic.game(game_id)
+            released = synthetic.NEWEST_RELEASE - timedelta(days=game_id * 3 // 4 % (PLOT_YEARS * 365))
+            writer.writerow([g['title'], released.strftime("%m/%d/%Y"),
+                             *clean_scores(g['user_score'], str(g['ratings']))])
+
+
+def bench_plot(rows, timeout):
+    """Time plot.py over `rows` synthetic games; returns a dict of results."""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_plot_csv(os.path.join(tmp, 'games.csv'), rows)
+        start = time.perf_counter()
+        try:
+            subprocess.run([sys.executable, '-c', PLOT_RUNNER, PLOT_SCRIPT], cwd=tmp, check=True, timeout=timeout,
+                           stdout=subprocess.DEVNULL)
+        except subprocess.TimeoutExpired:
+            return {'rows': rows, 'wall_s': None, 'html_mb': None}
+        wall = time.perf_counter() - start
+        html_bytes = os.path.getsize(os.path.join(tmp, 'interactive_plot_metacritic.html'))
+    return {'rows': rows, 'wall_s': wall, 'html_mb': html_bytes / 1e6}
+
+
+def main(argv=None):
+    from extract import DEFAULT_BACKEND, available_backends
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--catalogue-size', type=int, default=2000, help="synthetic games to crawl (default: 2000)")
+    parser.add_argument('--latency', type=float, default=50, metavar='MS', help="stub response delay (default: 50)")
+    parser.add_argument('--jitter', type=float, default=20, metavar='MS', help="extra random delay (default: 20)")
+    parser.add_argument('--error-rate', type=float, default=0, help="fraction of requests answered with a 503")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--retry-wait', type=float, default=30, metavar='S',
+                        help="how long the scraper waits for failed fetches to come off backoff (default: 30)")
+    parser.add_argument('--recordings', metavar='DIR', help="replay responses recorded under DIR where present")
+    parser.add_argument('--rate', type=float, default=1000, help="scraper requests per second (default: 1000)")
+    parser.add_argument('--max-in-flight', type=int, default=16)
+    parser.add_argument('--parser', choices=available_backends(), default=DEFAULT_BACKEND)
+    parser.add_argument('--source', choices=['html', 'json'], default='html')
+    parser.add_argument('--plot-rows', default='10000,100000,1000000',
+                        help="comma-separated games.csv sizes to time plot.py at (default: 10000,100000,1000000)")
+    parser.add_argument('--plot-timeout', type=float, default=1800, metavar='S',
+                        help="give up on a plot.py run after this many seconds (default: 1800)")
+    parser.add_argument('--skip-crawl', action='store_true')
+    parser.add_argument('--skip-plot', action='store_true')
+    parser.add_argument('--verbose', action='store_true', help="show the scraper's own output")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if not args.skip_crawl:
+        results['crawl'] = bench_crawl(args)
+    if not args.skip_plot:
+        results['plot'] = [bench_plot(int(rows), args.plot_timeout) for rows in args.plot_rows.split(',')]
+
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"\n{'='*60}")
+    if 'crawl' in results:
+        r = results['crawl']
+        print(f"Crawl of {r['catalogue_size']} games ({args.source}, {args.parser}, latency {args.latency:g}"
+              f"+{args.jitter:g} ms, error rate {args.error_rate:g}):")
+        print(f"  {r['pages']} pages, {r['games']} games, {r['requests']} requests, "
+              f"{r['mb_downloaded']:.1f} MB in {r['wall_s']:.1f} s")
+        print(f"  {r['throttles']} backoffs, {r['retries_recovered']} fetches recovered from the retry queue, "
+              f"{r['retries_left']} left in it")
+        print(f"  {r['pages_per_s']:.2f} pages/s, {r['games_per_s']:.1f} games/s")
+        print(f"  fetch p50 {r['fetch_p50_ms']:.1f} ms, p99 {r['fetch_p99_ms']:.1f} ms")
+        print(f"  parse p50 {r['parse_p50_ms']:.2f} ms, p99 {r['parse_p99_ms']:.2f} ms")
+    for r in results.get('plot', []):
+        if r['wall_s'] is None:
+            print(f"plot.py with {r['rows']:>9} rows: timed out after {args.plot_timeout:g} s")
+        else:
+            print(f"plot.py with {r['rows']:>9} rows: {r['wall_s']:7.1f} s, {r['html_mb']:.1f} MB of HTML")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Compare how fast plot.py's input loads from games.csv and from the Arrow dataset.
+
+    python -m bench.load_bench                          # 100k and 1M synthetic games
+    python -m bench.load_bench --rows 10000,5000000
+
+For each size, a synthetic games.csv and the matching dataset (built through
+GameStore, as scrap.py does) are written to a temporary directory. Each way of
+loading then runs in its own process, and the bench reports its wall time and
+peak RSS growth. The CSV path is schema.read_csv (explicit date formats); the dataset path
+memory-maps the four columns the plot uses.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+PLOT_COLUMNS = ['Title', 'Initial Release Date', 'User Rating', 'Number of Ratings']
+
+
+def build(directory, rows):
+    """Write games.csv and games_dataset/ for `rows` synthetic games into `directory`."""
+    import dataset
+    from bench.e2e_bench import write_plot_csv
+    from store import GameStore
+
+    csv_path = os.path.join(directory, 'games.csv')
+    write_plot_csv(csv_path, rows)
+    store = GameStore(os.path.join(directory, 'games.sqlite'))
+    store.import_csv(csv_path)
+    writer = dataset.DatasetWriter(os.path.join(directory, dataset.DATASET_DIR))
+    writer.write_snapshot(store.iter_rows(dataset.SNAPSHOT_BATCH))
+    store.close()
+
+
+def measure(directory, method):
+    """Load the games one way in this process; returns a dict of results."""
+    import dataset
+    import schema
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if method == 'csv':
+        data = schema.read_csv(os.path.join(directory, 'games.csv'))
+    else:
+        data = dataset.load(os.path.join(directory, dataset.DATASET_DIR), columns=PLOT_COLUMNS)
+    wall = time.perf_counter() - start
+    return {'method': method, 'rows': len(data), 'wall_s': wall,
+            'rss_growth_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='100000,1000000', help="comma-separated sizes (default: 100000,1000000)")
+    parser.add_argument('--build', nargs=2, metavar=('DIR', 'ROWS'), help=argparse.SUPPRESS)
+    parser.add_argument('--measure', nargs=2, metavar=('DIR', 'METHOD'), help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.build:
+        build(args.build[0], int(args.build[1]))
+        return
+    if args.measure:
+        print(json.dumps([measure(*args.measure)]))
+        return
+    results = []
+    for rows in (int(rows) for rows in args.rows.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            # Built in a child too: Linux carries the peak RSS of this process over into the ones it starts
+            subprocess.run([sys.executable, '-m', 'bench.load_bench', '--build', tmp, str(rows)], check=True)
+            for method in ('csv', 'dataset'):
+                out = subprocess.run([sys.executable, '-m', 'bench.load_bench', '--measure', tmp, method],
+                                     capture_output=True, text=True, check=True).stdout
+                results.extend(json.loads(out))
+
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"{'rows':>9} {'method':<8} {'load s':>8} {'RSS growth MB':>14}")
+    for r in results:
+        print(f"{r['rows']:>9} {r['method']:<8} {r['wall_s']:>8.3f} {r['rss_growth_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Measure how the scraper's memory grows with the catalogue.
+
+    python -m bench.memory_bench                            # a million-game JSON crawl
+    python -m bench.memory_bench --catalogue-size 200000 --source html --json
+
+The whole synthetic catalogue is crawled into a fresh store in a temporary
+directory, through the real Fetcher, scrap.crawl and GameStore. Pages are
+answered in this process by bench.stub_server.route, mounted as a requests
+transport adapter, so there are no sockets and no rate limit. The bench
+samples the process's resident set size (RSS) every --samples-th of the crawl
+and reports it against the games stored so far.
+
+It also reports the growth per thousand games over the second half of the
+crawl. The first tens of thousands of games fill bounded caches
+(format_date's DATE_CACHE_SIZE dates, SQLite's page cache), so RSS climbs
+faster early on. After that the steady growth sits close to the 8 bytes a game
+that the key fingerprints take, which is the one per-game cost left.
+
+It then builds the store's key index from the stored games twice, as a set of
+(title, date) tuples and as a `store.GameKeys`, and reports how much memory
+each takes (tracemalloc).
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from bench import synthetic
+from extract import DEFAULT_BACKEND, available_backends, get_backend
+
+STUB_URL = 'http://stub.invalid'
+FINGERPRINT_BYTES = 8  # What each known game adds to store.GameKeys
+
+
+def current_rss_mb():
+    """This process's resident set size now, in MB (its peak where /proc isn't available)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def stub_adapter(catalogue_size):
+    """A requests transport adapter that answers every request from bench.stub_server.route."""
+    import requests
+
+    from bench.stub_server import route
+
+    class StubAdapter(requests.adapters.BaseAdapter):
+        def send(self, request, **kwargs):
+            url = urlsplit(request.url)
+            status, content_type, body = route(url.path + ('?' + url.query if url.query else ''), catalogue_size)
+            response = requests.Response()
+            response.status_code = status
+            response.headers['Content-Type'] = content_type
+            response._content = body.encode('utf-8')
+            response.encoding = 'utf-8'
+            response.url = request.url
+            response.request = request
+            return response
+
+        def close(self):
+            pass
+
+    return StubAdapter()
+
+
+def key_index_mb(store, build):
+    """Memory taken by `build(keys)` over the store's (title, date key) pairs, in MB."""
+    keys = store.conn.execute('SELECT title, date_key FROM games')
+    tracemalloc.start()
+    index = build(keys)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del index
+    return size / 1e6
+
+
+def bench_crawl(args):
+    """Crawl the synthetic catalogue once, sampling RSS; returns a dict of results."""
+    # scrap.py reads its URLs at import time, so point them at the stub first
+    os.environ['METACRITIC_BASE_URL'] = os.environ['METACRITIC_API_URL'] = STUB_URL
+    import scrap
+    import telemetry
+    from fetcher import Fetcher
+    from ratelimit import RateLimiter
+    from store import GameKeys, GameStore
+
+    page_size = scrap.JSON_PAGE_SIZE if args.source == 'json' else synthetic.GAMES_PER_PAGE
+    pages = -(-args.catalogue_size // page_size)
+    every = max(1, pages // args.samples)
+    samples = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = GameStore(os.path.join(tmp, 'games.sqlite'))
+        fetcher = Fetcher(RateLimiter(1e9, args.workers), None, scrap.HEADERS, pool_size=args.workers + 1)
+        fetcher.session.mount('http://', stub_adapter(args.catalogue_size))
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+        template = scrap.JSON_LISTING_URL_TEMPLATE if args.source == 'json' else scrap.BROWSE_URL_TEMPLATE
+        store.start_journal(template, scrap.START_PAGE, args.source)
+        telemetry.set_log_mode('quiet')
+        start = time.perf_counter()
+
+        def on_page(page):
+            if page % every == 0 or page == pages:
+                samples.append({'page': page, 'games': len(store), 'rss_mb': current_rss_mb(),
+                                'elapsed_s': time.perf_counter() - start})
+                if not args.json:
+                    print(f"  page {page}/{pages}: {samples[-1]['games']} games, {samples[-1]['rss_mb']:.1f} MB",
+                          file=sys.stderr)
+            return True
+
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                totals = scrap.crawl(store, fetcher, executor, get_backend(args.parser), scrap.START_PAGE, template,
+                                     source=args.source, on_page=on_page)
+            finally:
+                sys.stdout = stdout
+                wall = time.perf_counter() - start
+                executor.shutdown()
+                fetcher.close()
+        tuple_mb = key_index_mb(store, set)
+        fingerprint_mb = key_index_mb(store, GameKeys)
+        games = len(store)
+        store.close()
+
+    first, middle, last = samples[0], samples[len(samples) // 2], samples[-1]
+    growth = (last['rss_mb'] - middle['rss_mb']) / max(1, last['games'] - middle['games']) * 1000
+    return {'catalogue_size': args.catalogue_size, 'source': args.source, 'pages': totals['pages'], 'games': games,
+            'wall_s': wall, 'games_per_s': games / wall, 'samples': samples,
+            'rss_first_mb': first['rss_mb'], 'rss_last_mb': last['rss_mb'], 'rss_growth_mb_per_1k_games': growth,
+            'fingerprint_mb_per_1k_games': FINGERPRINT_BYTES * 1000 / 1e6,
+            'key_index_tuples_mb': tuple_mb, 'key_index_fingerprints_mb': fingerprint_mb}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--catalogue-size', type=int, default=1_000_000,
+                        help="number of synthetic games (default: 1000000)")
+    parser.add_argument('--source', choices=['json', 'html'], default='json',
+                        help="listing to crawl (default: json; html fetches every game's detail page and is much slower)")
+    parser.add_argument('--parser', choices=available_backends(), default=DEFAULT_BACKEND)
+    parser.add_argument('--workers', type=int, default=8, help="detail fetch threads (default: 8)")
+    parser.add_argument('--samples', type=int, default=20, help="RSS samples over the crawl (default: 20)")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    result = bench_crawl(args)
+    if args.json:
+        print(json.dumps(result))
+        return
+    print(f"{'games':>9} {'RSS MB':>8} {'elapsed s':>10}")
+    for sample in result['samples']:
+        print(f"{sample['games']:>9} {sample['rss_mb']:>8.1f} {sample['elapsed_s']:>10.1f}")
+    print(f"\n{result['games']} games over {result['pages']} pages in {result['wall_s']:.1f} s "
+          f"({result['games_per_s']:.0f} games/s)")
+    print(f"RSS {result['rss_first_mb']:.1f} MB -> {result['rss_last_mb']:.1f} MB; "
+          f"{result['rss_growth_mb_per_1k_games']:.3f} MB per 1000 games over the second half "
+          f"(the key fingerprints take {result['fingerprint_mb_per_1k_games']:.3f})")
+    print(f"Key index: {result['key_index_tuples_mb']:.1f} MB as (title, date) tuples, "
+          f"{result['key_index_fingerprints_mb']:.1f} MB as fingerprints")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Microbenchmark the HTML extraction backends over saved pages.
+
+    python -m bench.parse_bench                 # all available backends
+    python -m bench.parse_bench --record 20     # save browse page 1 and 20 detail pages as fixtures first
+
+Fixtures are read from bench/fixtures/ (browse-*.html and detail-*.html). If
+there are none, synthetic pages are used instead. Each backend runs in its own
+process so that its peak RSS isn't mixed up with the others'.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from extract import available_backends, get_backend
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixtures(fixture_dir=FIXTURE_DIR):
+    """Return (browse pages, detail pages) as lists of HTML strings."""
+    def read(pattern):
+        pages = []
+        for path in sorted(glob.glob(os.path.join(fixture_dir, pattern))):
+            with open(path, encoding='utf-8') as f:
+                pages.append(f.read())
+        return pages
+
+    browse, detail = read('browse-*.html'), read('detail-*.html')
+    if not browse and not detail:
+        from bench import synthetic
+        browse = [synthetic.browse_page(page, 10_000) for page in range(1, 6)]
+        detail = [synthetic.detail_page(game_id) for game_id in range(0, 40)]
+    return browse, detail
+
+
+def record_fixtures(detail_count, fixture_dir=FIXTURE_DIR):
+    """Save browse page 1 and its first `detail_count` detail pages from the live site."""
+    import requests
+    from scrap import BROWSE_URL_TEMPLATE, HEADERS, parse_browse_page
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    html = session.get(BROWSE_URL_TEMPLATE.format(1), timeout=20).text
+    with open(os.path.join(fixture_dir, 'browse-001.html'), 'w', encoding='utf-8') as f:
+        f.write(html)
+    cards = parse_browse_page(html, get_backend('html.parser'))
+    for i, (_, _, url) in enumerate([card for card in cards if card[2]][:detail_count]):
+        time.sleep(1)
+        with open(os.path.join(fixture_dir, f'detail-{i:03d}.html'), 'w', encoding='utf-8') as f:
+            f.write(session.get(url, timeout=20).text)
+    print(f"Saved 1 browse page and {min(detail_count, len(cards))} detail pages to {fixture_dir}")
+
+
+def measure(backend_name, repeat):
+    """Time one backend in this process; returns a dict of results."""
+    backend = get_backend(backend_name)
+    browse, detail = load_fixtures()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def run(pages, parse):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                parse(html)
+        return (time.perf_counter() - start) * 1000 / (repeat * max(1, len(pages)))
+
+    results = {'backend': backend_name, 'browse_ms': run(browse, backend.cards),
+               'detail_ms': run(detail, backend.detail)}
+
+    # tracemalloc slows parsing down, so peak memory gets its own pass
+    tracemalloc.start()
+    for html in browse:
+        backend.cards(html)
+    for html in detail:
+        backend.detail(html)
+    results['py_peak_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    results['rss_growth_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    return results
+
+
+def check_equivalence():
+    """Make sure every backend extracts exactly what the reference html.parser backend does."""
+    browse, detail = load_fixtures()
+    reference = get_backend('html.parser')
+    expected = ([reference.cards(html) for html in browse], [reference.detail(html) for html in detail])
+    for name in available_backends():
+        backend = get_backend(name)
+        got = ([backend.cards(html) for html in browse], [backend.detail(html) for html in detail])
+        if got != expected:
+            print(f"WARNING: backend '{name}' extracts different fields from html.parser")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=available_backends(), help="measure a single backend in this process")
+    parser.add_argument('--repeat', type=int, default=3, help="passes over the fixtures per backend (default: 3)")
+    parser.add_argument('--record', type=int, metavar='N', help="record live fixtures with N detail pages first")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixtures(args.record)
+    if args.backend:
+        results = [measure(args.backend, args.repeat)]
+    else:
+        check_equivalence()
+        results = []
+        for name in available_backends():
+            out = subprocess.run([sys.executable, '-m', 'bench.parse_bench', '--backend', name,
+                                  '--repeat', str(args.repeat), '--json'],
+                                 capture_output=True, text=True, check=True).stdout
+            results.extend(json.loads(out))
+
+    if args.json:
+        print(json.dumps(results))
+        return
+    browse, detail = load_fixtures()
+    print(f"{len(browse)} browse pages, {len(detail)} detail pages, {args.repeat} passes")
+    print(f"{'backend':<12} {'browse ms/page':>15} {'detail ms/page':>15} {'py peak KB':>11} {'RSS growth KB':>14}")
+    for r in results:
+        print(f"{r['backend']:<12} {r['browse_ms']:>15.2f} {r['detail_ms']:>15.2f} "
+              f"{r['py_peak_kb']:>11.0f} {r['rss_growth_kb']:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
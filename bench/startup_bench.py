@@ -0,0 +1,66 @@
+"""Check how long the entry points take to import, against STARTUP_BUDGETS.
+
+    python -m bench.startup_bench
+    python -m bench.startup_bench --repeat 20 --json
+
+Each module is imported in a fresh interpreter, --repeat times, and the
+median import time is compared with its budget. The bench also checks that
+none of the heavy libraries a module has no use for were imported on the way
+(pandas and plotly are only loaded by a plot build, requests and BeautifulSoup
+only by the scraper). It exits with status 1 if anything is over budget or
+imported something it shouldn't have.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['numpy', 'pyarrow', 'pandas', 'plotly', 'requests', 'bs4', 'lxml']
+# module: (import budget in seconds, heavy modules it must not import)
+STARTUP_BUDGETS = {
+    'cli': (0.02, HEAVY_MODULES),
+    'plot': (0.3, ['pandas', 'plotly', 'requests', 'bs4', 'lxml']),
+    'scrap': (0.5, ['pandas', 'plotly']),
+}
+PROBE = ("import json, sys, time; start = time.perf_counter(); import {module}; "
+         "print(json.dumps([time.perf_counter() - start, [name for name in {heavy!r} if name in sys.modules]]))")
+
+
+def measure(module, repeat):
+    """Import `module` in `repeat` fresh interpreters; returns a dict of results."""
+    budget, forbidden = STARTUP_BUDGETS[module]
+    times, loaded = [], []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                             cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+        seconds, loaded = json.loads(out)
+        times.append(seconds)
+    median = statistics.median(times)
+    unwanted = [name for name in loaded if name in forbidden]
+    return {'module': module, 'import_s': median, 'budget_s': budget, 'loaded': loaded, 'unwanted': unwanted,
+            'ok': median <= budget and not unwanted}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help="interpreters started per module (default: 5)")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [measure(module, args.repeat) for module in STARTUP_BUDGETS]
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{'module':<8} {'import s':>9} {'budget s':>9}  heavy modules loaded")
+        for r in results:
+            flag = '' if r['ok'] else '  OVER BUDGET' if not r['unwanted'] else f"  unwanted: {', '.join(r['unwanted'])}"
+            print(f"{r['module']:<8} {r['import_s']:>9.3f} {r['budget_s']:>9.3f}  {', '.join(r['loaded']) or '-'}{flag}")
+    if not all(r['ok'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
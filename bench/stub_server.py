@@ -0,0 +1,203 @@
+"""Local stand-in for metacritic.com and its JSON backend, serving the synthetic catalogue.
+
+    python -m bench.stub_server --port 8765 --catalogue-size 5000
+    METACRITIC_BASE_URL=http://127.0.0.1:8765 METACRITIC_API_URL=http://127.0.0.1:8765 python scrap.py --source json
+
+Routes:
+    /browse/game/...?page=N                     HTML browse page N (honours releaseYearMin/Max)
+    /game/<slug>/                               HTML detail page
+    /finder/metacritic/web?offset=&limit=       JSON listing page
+    /reviews/metacritic/user/games/<slug>/stats/web
+                                                JSON user score summary
+
+Every tenth listing item leaves out its user score summary, and every
+twentieth game has no stats endpoint, so both fallbacks get exercised. With
+--recordings DIR, any response recorded under DIR (see `recording_path`) is
+served instead of the synthetic one; `--record-pages N` saves the live site's
+first N browse pages and their detail pages there for replaying.
+
+--latency/--jitter delay every response and --error-rate answers that fraction
+of requests with a 503 (carrying --retry-after, if given), so that runs against the stub behave more like the
+real site while staying repeatable (--seed).
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bench import synthetic
+
+SLUG_RE = re.compile(r'/game-(\d+)/')
+
+
+def recording_path(recordings_dir, path):
+    """Where the recorded response for request path `path` (including its query string) lives."""
+    return os.path.join(recordings_dir, hashlib.sha1(path.encode('utf-8')).hexdigest() + '.body')
+
+
+def listing_item(game_id):
+    g = synthetic.game(game_id)
+    item = {'title': g['title'], 'slug': g['slug'], 'releaseDate': g['release_date'].isoformat(), 'type': 'game-title'}
+    if game_id % 10:
+        item['userScoreSummary'] = user_score_summary(g)
+    return item
+
+
+def user_score_summary(g):
+    if g['user_score'] == 'tbd':
+        return {'score': None, 'reviewCount': g['ratings']}
+    return {'score': float(g['user_score']), 'reviewCount': g['ratings']}
+
+
+def record(pages, recordings_dir):
+    """Save the live site's first `pages` browse pages and their detail pages under `recordings_dir`."""
+    import requests
+    from extract import get_backend
+    from scrap import BROWSE_URL_TEMPLATE, HEADERS, parse_browse_page
+
+    os.makedirs(recordings_dir, exist_ok=True)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    saved = 0
+    for page in range(1, pages + 1):
+        urls = [BROWSE_URL_TEMPLATE.format(page)]
+        html = session.get(urls[0], timeout=20).text
+        urls.extend(url for _, _, url in parse_browse_page(html, get_backend()) if url)
+        for i, url in enumerate(urls):
+            if i:
+                time.sleep(1)
+                html = session.get(url, timeout=20).text
+            parts = urlsplit(url)
+            path = parts.path + ('?' + parts.query if parts.query else '')
+            with open(recording_path(recordings_dir, path), 'w', encoding='utf-8') as f:
+                f.write(html)
+            saved += 1
+    print(f"Saved {saved} responses to {recordings_dir}")
+
+
+def route(path, catalogue_size):
+    """Return (status, content type, body) for request path `path` (with its query string)."""
+    url = urlsplit(path)
+    query = parse_qs(url.query)
+    slug = SLUG_RE.search(url.path + '/')
+    game_id = int(slug.group(1)) if slug else None
+    if game_id is not None and game_id >= catalogue_size:
+        return 404, 'text/plain', 'Not Found'
+
+    if url.path.startswith('/browse/'):
+        page = int(query.get('page', ['1'])[0])
+        year_min = int(query['releaseYearMin'][0]) if 'releaseYearMin' in query else None
+        year_max = int(query['releaseYearMax'][0]) if 'releaseYearMax' in query else None
+        return 200, 'text/html; charset=utf-8', synthetic.browse_page(page, catalogue_size,
+                                                                      year_min=year_min, year_max=year_max)
+    if url.path.startswith('/game/') and game_id is not None:
+        return 200, 'text/html; charset=utf-8', synthetic.detail_page(game_id)
+    if url.path.startswith('/finder/'):
+        offset = int(query.get('offset', ['0'])[0])
+        limit = int(query.get('limit', ['24'])[0])
+        items = [listing_item(i) for i in range(offset, min(offset + limit, catalogue_size))]
+        return 200, 'application/json; charset=utf-8', json.dumps({'data': {'totalResults': catalogue_size, 'items': items}})
+    if url.path.startswith('/reviews/') and game_id is not None and game_id % 20:
+        summary = user_score_summary(synthetic.game(game_id))
+        return 200, 'application/json; charset=utf-8', json.dumps({'data': {'item': summary}})
+    return 404, 'text/plain', 'Not Found'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    catalogue_size = 1000
+    recordings_dir = None
+    latency = 0.0       # Seconds added to every response
+    jitter = 0.0        # Up to this many more seconds, uniformly distributed
+    error_rate = 0.0    # Fraction of requests answered with a 503
+    retry_after = None  # Retry-After seconds sent with those 503s
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def route(self):
+        """Return (status, content type, body) for the current request."""
+        return route(self.path, self.catalogue_size)
+
+    def do_GET(self):
+        with self.rng_lock:
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            failed = self.rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            status, content_type, body = 503, 'text/plain', b'Service Unavailable'
+        elif self.recordings_dir and os.path.exists(recording_path(self.recordings_dir, self.path)):
+            with open(recording_path(self.recordings_dir, self.path), 'rb') as f:
+                body = f.read()
+            content_type = 'application/json' if body.lstrip()[:1] in (b'{', b'[') else 'text/html'
+            status, content_type = 200, content_type + '; charset=utf-8'
+        else:
+            status, content_type, body = self.route()
+            body = body.encode('utf-8')
+
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 200:
+            self.send_header('ETag', etag)
+        if status == 503 and self.retry_after is not None:
+            self.send_header('Retry-After', str(self.retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(port=0, catalogue_size=1000, recordings_dir=None, handler=StubHandler,
+                latency=0.0, jitter=0.0, error_rate=0.0, seed=0, retry_after=None):
+    """Create (but don't start) a stub server; port 0 picks a free port. Delays are in seconds."""
+    handler = type('ConfiguredStubHandler', (handler,),
+                   {'catalogue_size': catalogue_size, 'recordings_dir': recordings_dir, 'latency': latency,
+                    'jitter': jitter, 'error_rate': error_rate, 'retry_after': retry_after, 'rng': random.Random(seed),
+                    'rng_lock': threading.Lock()})
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--catalogue-size', type=int, default=1000, help="number of synthetic games (default: 1000)")
+    parser.add_argument('--recordings', metavar='DIR', help="serve recorded responses from DIR where present")
+    parser.add_argument('--record-pages', type=int, metavar='N',
+                        help="save the live site's first N browse pages and their detail pages to --recordings, then exit")
+    parser.add_argument('--latency', type=float, default=0, metavar='MS', help="delay added to every response")
+    parser.add_argument('--jitter', type=float, default=0, metavar='MS', help="up to this much extra random delay")
+    parser.add_argument('--error-rate', type=float, default=0, help="fraction of requests answered with a 503")
+    parser.add_argument('--retry-after', type=int, metavar='SECONDS', help="send this Retry-After with each 503")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the jitter and errors (default: 0)")
+    args = parser.parse_args(argv)
+
+    if args.record_pages:
+        if not args.recordings:
+            parser.error("--record-pages needs --recordings DIR")
+        record(args.record_pages, args.recordings)
+        return
+
+    server = make_server(args.port, args.catalogue_size, args.recordings, latency=args.latency / 1000,
+                         jitter=args.jitter / 1000, error_rate=args.error_rate, seed=args.seed,
+                         retry_after=args.retry_after)
+    print(f"Serving {args.catalogue_size} synthetic games on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Deterministic synthetic Metacritic catalogue and HTML pages for offline benchmarks.
+
+Game 0 is the newest release and ids count back in time, matching the
+browse listing's "newest first" order. Pages use the same markup that the
+extractors look for, padded with filler markup and an inline state blob so that
+their size is roughly the size of real pages.
+"""
+import bisect
+import json
+import random
+from datetime import date, timedelta
+
+GAMES_PER_PAGE = 24
+NEWEST_RELEASE = date(2025, 6, 1)
+OLDEST_RELEASE = date(1958, 1, 1)  # Games past ~32,000 all share this date
+WORDS = ['Legend', 'Shadow', 'Quest', 'Dragon', 'Star', 'Night', 'Racer', 'Kingdom', 'Tactics', 'Souls',
+         'Island', 'Chronicles', 'Zero', 'Force', 'Dream', 'Hunter', 'Pixel', 'Odyssey', 'Storm', 'Café']
+
+
+def release_date(game_id):
+    return NEWEST_RELEASE - timedelta(days=min(game_id * 3 // 4, (NEWEST_RELEASE - OLDEST_RELEASE).days))
+
+
+def ids_for_years(catalogue_size, year_min=None, year_max=None):
+    """The range of game ids released between `year_min` and `year_max` (inclusive)."""
+    def newest_first(i):
+        return -release_date(i).toordinal()
+    first = 0 if year_max is None else bisect.bisect_left(
+        range(catalogue_size), -date(year_max, 12, 31).toordinal(), key=newest_first)
+    last = catalogue_size if year_min is None else bisect.bisect_right(
+        range(catalogue_size), -date(year_min, 1, 1).toordinal(), key=newest_first)
+    return range(first, max(first, last))
+
+
+def game(game_id):
+    """Return the synthetic game with id `game_id` as a dict."""
+    rng = random.Random(game_id)
+    title = ' '.join(rng.sample(WORDS, rng.randint(1, 3))) + f' {game_id}'
+    released = release_date(game_id)
+    if rng.random() < 0.15:
+        user_score, ratings = 'tbd', 0
+    else:
+        user_score, ratings = f'{rng.randint(10, 95) / 10:.1f}', int(rng.paretovariate(0.8))
+    return {
+        'id': game_id,
+        'title': title,
+        'slug': f'game-{game_id}',
+        'release_date': released,
+        'user_score': user_score,
+        'ratings': ratings,
+    }
+
+
+def _filler(rng, size):
+    """Navigation-like markup plus an inline state blob, about `size` characters in total."""
+    links = ''.join(f'<li class="c-globalHeader_item"><a href="/browse/{i}/"><!--[-->Link {i}<!--]--></a></li>'
+                    for i in range(40))
+    blob = json.dumps({'state': [rng.getrandbits(64) for _ in range(max(0, size - len(links)) // 22)]})
+    return f'<nav class="c-globalHeader"><ul>{links}</ul></nav><script>window.__NUXT__={blob}</script>'
+
+
+def browse_card(g):
+    display_date = f"{g['release_date']:%b} {g['release_date'].day}, {g['release_date'].year}"
+    return (
+        f'<div class="c-finderProductCard c-finderProductCard-game" data-v-1a2b3c>'
+        f'<a href="/game/{g["slug"]}/" class="c-finderProductCard_container g-color-gray80 u-grid">'
+        f'<div class="c-finderProductCard_title" data-title="{g["title"]}">'
+        f'<h3 class="c-finderProductCard_titleHeading"><span>{g["id"] + 1}.</span><span>{g["title"]}</span></h3></div>'
+        f'<div class="c-finderProductCard_meta"><span class="u-text-uppercase"><!--[-->{display_date}<!--]--></span>'
+        f'<span class="c-finderProductCard_metaItem">Rated E</span></div>'
+        f'<div class="c-finderProductCard_description"><span>A synthetic game used for benchmarks.</span></div>'
+        f'</a></div>'
+    )
+
+
+def browse_page(page, catalogue_size, padding=60_000, year_min=None, year_max=None):
+    """HTML for browse page `page` (1-based) of a catalogue of `catalogue_size` games, optionally limited to some years."""
+    ids = ids_for_years(catalogue_size, year_min, year_max)
+    cards = ''.join(browse_card(game(i)) for i in ids[(page - 1) * GAMES_PER_PAGE:page * GAMES_PER_PAGE])
+    last_page = -(-len(ids) // GAMES_PER_PAGE)
+    pagination = (f'<div class="c-navigationPagination"><span class="c-navigationPagination_item--page">{page}</span>'
+                  f'<span class="c-navigationPagination_item--page">{last_page}</span></div>') if cards else ''
+    return (f'<!DOCTYPE html><html><head><title>Browse Games</title></head><body>{_filler(random.Random(-page), padding)}'
+            f'<section class="c-finderProductList">{cards}</section>{pagination}</body></html>')
+
+
+def detail_page(game_id, padding=280_000):
+    """HTML for the detail page of game `game_id`."""
+    g = game(game_id)
+    if g['user_score'] == 'tbd':
+        reviews = '<span class="c-productScoreInfo_reviewsTotal u-block"><!--[-->Available after 4 ratings<!--]--></span>'
+    else:
+        reviews = (f'<span class="c-productScoreInfo_reviewsTotal u-block"><a href="/game/{g["slug"]}/user-reviews/">'
+                   f'<!--[-->Based on {g["ratings"]:,} User Ratings<!--]--></a></span>')
+    critic = ('<div data-testid="critic-score-info" class="c-productScoreInfo u-clearfix">'
+              '<div class="c-siteReviewScore c-siteReviewScore_critic"><span>80</span></div>'
+              '<span class="c-productScoreInfo_reviewsTotal u-block">Based on 50 Critic Reviews</span></div>')
+    user = (f'<div data-testid="user-score-info" class="c-productScoreInfo u-clearfix">'
+            f'<div class="c-productScoreInfo_scoreNumber"><div class="c-siteReviewScore_background">'
+            f'<div title="User score" class="c-siteReviewScore u-flexbox-column c-siteReviewScore_user g-color-gray90">'
+            f'<span data-v-e408cafe>{g["user_score"]}</span></div></div></div>'
+            f'<div class="c-productScoreInfo_text">{reviews}</div></div>')
+    return (f'<!DOCTYPE html><html><head><title>{g["title"]}</title></head><body>'
+            f'<div class="c-productHero_title"><h1>{g["title"]}</h1></div>{critic}{user}'
+            f'{_filler(random.Random(game_id), padding)}</body></html>')
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+
+CACHE_DIR = "plot_cache"
+MANIFEST_FILENAME = "manifest.json"
+FRAME_FILENAME = "frame.pkl"
+HASH_BLOCK = 1 << 20
+
+
+def file_digest(path, prefix_size=None):
+    """Return (hash of the whole file, hash of its first `prefix_size` bytes or None), reading it once."""
+    digest = hashlib.blake2b(digest_size=16)
+    prefix = None
+    with open(path, 'rb') as f:
+        if prefix_size is not None:
+            remaining = prefix_size
+            while remaining:
+                block = f.read(min(HASH_BLOCK, remaining))
+                digest.update(block)
+                remaining -= len(block)
+            prefix = digest.hexdigest()  # blake2b can go on hashing after a digest is taken
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest(), prefix
+
+
+def params_key(params):
+    """Hash a JSON-serializable dict of build parameters, independent of key order."""
+    return hashlib.blake2b(json.dumps(params, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class BuildCache:
+    """What plot.py built last time, and the preprocessed frame it built it from.
+
+    manifest.json records each input file's size and content hash, a hash of
+    the build parameters, and the outputs written. `scan` compares the inputs
+    with it: when they're identical the build can be skipped, and when every
+    change is rows appended to the end of a file (a CSV that grew, a new or
+    grown dataset part) only those rows need preprocessing before they're
+    merged into the cached frame. Anything else means a full rebuild.
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        try:
+            with open(os.path.join(directory, MANIFEST_FILENAME), encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def scan(self, paths):
+        """Fingerprint `paths`. Returns (sources, appended).
+
+        `sources` is a list of {'path', 'size', 'hash'}. `appended` is None when
+        the cached frame can't be reused; otherwise a list of (path, previous
+        source entry or None) for the files that grew or appeared, in order.
+        """
+        previous = {source['path']: source for source in self.manifest.get('sources', [])}
+        sources, appended = [], []
+        frame_ok = os.path.exists(os.path.join(self.directory, FRAME_FILENAME))
+        for path in paths:
+            old = previous.pop(path, None)
+            size = os.path.getsize(path)
+            full, prefix = file_digest(path, old['size'] if old and old['size'] <= size else None)
+            sources.append({'path': path, 'size': size, 'hash': full})
+            if old is None:
+                appended.append((path, None))
+            elif full != old['hash']:
+                if prefix == old['hash']:
+                    appended.append((path, old))
+                else:
+                    frame_ok = False
+        if previous:  # A file that was read last time is gone
+            frame_ok = False
+        return sources, appended if frame_ok else None
+
+    def is_current(self, sources, params, outputs):
+        """Whether the last build used these exact inputs and parameters and its outputs are still there."""
+        built_from = [{key: source[key] for key in ('path', 'size', 'hash')} for source in self.manifest.get('sources', [])]
+        return (built_from == sources and self.manifest.get('params') == params_key(params)
+                and self.manifest.get('outputs') == {path: os.path.getsize(path) for path in outputs
+                                                     if os.path.exists(path)})
+
+    def load_frame(self):
+        import pandas as pd
+        return pd.read_pickle(os.path.join(self.directory, FRAME_FILENAME))
+
+    def save(self, sources, params, outputs, frame, rows):
+        """Record a finished build. `rows` maps each source path to how many rows were read from it."""
+        os.makedirs(self.directory, exist_ok=True)
+        frame_path = os.path.join(self.directory, FRAME_FILENAME)
+        frame.to_pickle(frame_path + '.tmp')
+        os.replace(frame_path + '.tmp', frame_path)
+        for source in sources:
+            source['rows'] = rows[source['path']]
+        self.manifest = {'sources': sources, 'params': params_key(params),
+                         'outputs': {path: os.path.getsize(path) for path in outputs}}
+        manifest_path = os.path.join(self.directory, MANIFEST_FILENAME)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(manifest_path + '.tmp', manifest_path)
@@ -0,0 +1,152 @@
+"""Append-only log of the changes made to the games, for consumers that only want what changed.
+
+    python changelog.py since 1200          # print the changes after sequence number 1200
+    python changelog.py compact             # keep only each game's net change
+
+games_changes.jsonl holds one JSON object per line, in sequence order:
+
+    {"seq": 1201, "time": 1760000000.0, "op": "update", "title": "...", "release_date": "03/07/2025",
+     "before": {"user_rating": 7.9, "num_ratings": 120}, "after": {"user_rating": 8.0, "num_ratings": 131}}
+
+Scores are numbers, or null for a game without any yet. `op` is "insert"
+(no "before"), "update" or "delete" (no "after"). A game whose release date
+is rewritten (scrap.py --migrate-dates) is a delete of the old date plus an
+insert of the new one. The changes are recorded by SQLite triggers in
+games.sqlite, in the same transaction as the writes, and appended here by
+`GameStore.export_changes` at the end of every scrap.py run. A consumer
+remembers the last `seq` it processed and calls `changes_since`. Numbering
+carries on from the file's last entry even if games.sqlite is deleted and
+rebuilt.
+
+"after" values are the game's full scores, not increments, so applying an
+entry twice does no harm. That is what makes compaction safe: it folds each
+game's entries into one, at the sequence number of its last change, and a
+consumer at any sequence number still ends up with the same games.
+"""
+import argparse
+import json
+import os
+
+CHANGELOG_FILENAME = "games_changes.jsonl"
+SEEK_BLOCK = 1 << 16  # Bytes read backwards at a time when looking for the last line
+
+
+def _seq_at(f, offset):
+    """Sequence number and offset of the first line starting at or after `offset`; (None, None) past the last."""
+    f.seek(max(offset - 1, 0))
+    if offset:
+        f.readline()  # Up to the first line starting at `offset` or later
+    position = f.tell()
+    line = f.readline()
+    if not line.strip():
+        return None, None
+    return json.loads(line)['seq'], position
+
+
+def _offset_after(f, seq):
+    """Byte offset of the first entry with a sequence number above `seq`, by bisecting over the file."""
+    low, high = 0, os.fstat(f.fileno()).st_size
+    while low < high:
+        middle = (low + high) // 2
+        found, position = _seq_at(f, middle)
+        if found is None or found > seq:
+            high = middle
+        else:
+            low = position + 1
+    _, position = _seq_at(f, low)
+    return position if position is not None else os.fstat(f.fileno()).st_size
+
+
+def changes_since(seq=0, path=CHANGELOG_FILENAME):
+    """Yield the entries with a sequence number above `seq`, oldest first. No file means no changes."""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return
+    with f:
+        f.seek(_offset_after(f, seq))
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def last_sequence(path=CHANGELOG_FILENAME):
+    """The sequence number of the last entry, or 0 for an empty or missing log."""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return 0
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        tail = b''
+        while end > 0 and tail.count(b'\n') < 2:
+            start = max(0, end - SEEK_BLOCK)
+            f.seek(start)
+            tail = f.read(end - start) + tail
+            end = start
+        lines = [line for line in tail.splitlines() if line.strip()]
+        return json.loads(lines[-1])['seq'] if lines else 0
+
+
+def append(entries, path=CHANGELOG_FILENAME):
+    """Append entries (dicts in sequence order) to the log; returns how many were written."""
+    count = 0
+    with open(path, 'a', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def merge_entries(first, last):
+    """One entry with the net effect of `first` followed, later, by `last` on the same game."""
+    merged = dict(last)
+    if last['op'] == 'delete':
+        return merged  # Gone whatever came first; "before" holds the scores it was deleted with
+    merged['op'] = 'insert' if first['op'] == 'insert' else 'update'
+    if merged['op'] == 'update':
+        merged['before'] = first['before']  # An update's or a delete's, both of which have one
+    else:
+        merged.pop('before', None)
+    return merged
+
+
+def compact(path=CHANGELOG_FILENAME):
+    """Rewrite the log with one entry per game. Returns (entries before, entries after).
+
+    Run it between scrap.py runs: an export appending to the log while it's
+    being rewritten would be lost.
+    """
+    net = {}
+    count = 0
+    for entry in changes_since(0, path):
+        key = (entry['title'], entry['release_date'])
+        net[key] = merge_entries(net[key], entry) if key in net else entry
+        count += 1
+    entries = sorted(net.values(), key=lambda entry: entry['seq'])
+    if os.path.exists(path + '.tmp'):
+        os.remove(path + '.tmp')
+    append(entries, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return count, len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default=CHANGELOG_FILENAME, help=f"changelog file (default: {CHANGELOG_FILENAME})")
+    commands = parser.add_subparsers(dest='command', required=True)
+    since_parser = commands.add_parser('since', help="print the changes after a sequence number, as JSON lines")
+    since_parser.add_argument('seq', type=int, nargs='?', default=0)
+    commands.add_parser('compact', help="keep only each game's net change")
+    args = parser.parse_args(argv)
+
+    if args.command == 'since':
+        for entry in changes_since(args.seq, args.path):
+            print(json.dumps(entry, ensure_ascii=False))
+    elif args.command == 'compact':
+        before, after = compact(args.path)
+        print(f"Compacted {args.path}: {before} entries -> {after}, up to sequence {last_sequence(args.path)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""One entry point for the scraper, the plot and the benchmarks.
+
+    python cli.py scrape [options]          # crawl the catalogue (python scrap.py --help for the options)
+    python cli.py refresh [BUDGET] [options]  # re-fetch the most overdue games (scrap.py --refresh)
+    python cli.py plot [options]            # build the plot page (python plot.py --help)
+    python cli.py changes since N | compact   # read or compact the changelog (changelog.py)
+    python cli.py bench NAME [options]      # run bench/NAME_bench.py: e2e, load, memory, parse or startup
+
+A command's module is imported only once the command is picked, so `plot`
+never loads requests or BeautifulSoup and `scrape` never loads pandas or
+plotly. From Python, use `scrap.run(...)` and `plot.build(...)` directly.
+`python -m bench.startup_bench` checks the import times against a budget.
+"""
+import argparse
+import importlib
+
+COMMANDS = {
+    'scrape': "crawl Metacritic's catalogue into games.sqlite and games.csv",
+    'refresh': "re-fetch the most overdue games and update their scores",
+    'plot': "build the interactive plot page, or serve it with --serve",
+    'changes': "print the changelog entries after a sequence number, or compact the changelog",
+    'bench': "run a benchmark from bench/: e2e, load, memory, parse or startup",
+}
+BENCHMARKS = ('e2e', 'load', 'memory', 'parse', 'startup')  # bench/<name>_bench.py
+
+
+def run_command(command, args):
+    """Import the module behind `command` and hand it the rest of the command line."""
+    if command == 'scrape':
+        importlib.import_module('scrap').main(args)
+    elif command == 'refresh':
+        importlib.import_module('scrap').main(['--refresh', *args])
+    elif command == 'plot':
+        importlib.import_module('plot').main(args)
+    elif command == 'changes':
+        importlib.import_module('changelog').main(args)
+    elif command == 'bench':
+        if not args or args[0] not in BENCHMARKS:
+            raise SystemExit(f"cli.py bench: name a benchmark ({', '.join(BENCHMARKS)})")
+        importlib.import_module(f'bench.{args[0]}_bench').main(args[1:])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Scrape Metacritic's game catalogue and plot it.",
+        epilog="\n".join(f"  {command:<8} {help}" for command, help in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=COMMANDS, metavar='COMMAND', help="one of: " + ", ".join(COMMANDS))
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="options for the command (COMMAND --help lists them)")
+    args = parser.parse_args(argv)
+    run_command(args.command, args.args)
+
+
+if __name__ == '__main__':
+    main()
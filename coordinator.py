@@ -0,0 +1,255 @@
+"""Split a full crawl into release-year jobs that several workers can share.
+
+    python coordinator.py plan              # probe page counts and queue year-range jobs
+    python coordinator.py work              # claim and crawl jobs until the queue is empty (run many of these)
+    python coordinator.py status
+    python coordinator.py merge             # combine every worker's store into one deduplicated games.csv
+
+The queue is a SQLite file on storage every worker can reach. A worker leases
+a job for LEASE_SECONDS and renews the lease after every page it completes. A
+lease that runs out belongs to a worker that died, so the job goes back to the
+queue and the next worker continues it from the last page the dead worker
+reported. Each worker writes to its own games-<worker>.sqlite store.
+"""
+import argparse
+import glob
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import changelog
+import dataset
+from extract import DEFAULT_BACKEND, available_backends, get_backend
+from fetcher import Fetcher, ResponseCache
+from ratelimit import RateLimiter
+from store import GameStore
+import scrap
+
+QUEUE_FILENAME = "crawl_queue.sqlite"
+LEASE_SECONDS = 600
+TARGET_PAGES_PER_JOB = 100   # Year ranges with more pages than this are split
+WORKER_STORE_PATTERN = "games-{worker}.sqlite"
+
+
+class JobQueue:
+    """Lease-based job queue kept in a SQLite file."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                year_min INTEGER NOT NULL,
+                year_max INTEGER NOT NULL,
+                start_page INTEGER NOT NULL DEFAULT 1,
+                end_page INTEGER,
+                est_pages INTEGER,
+                state TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                pages_done INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )""")
+
+    def add_jobs(self, jobs):
+        """Queue (year_min, year_max, start_page, end_page, est_pages) jobs, replacing any existing queue."""
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.conn.execute('DELETE FROM jobs')
+        self.conn.executemany(
+            'INSERT INTO jobs (year_min, year_max, start_page, end_page, est_pages) VALUES (?, ?, ?, ?, ?)', jobs)
+        self.conn.execute('COMMIT')
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS):
+        """Claim the next pending job for `worker`, reclaiming expired leases first; returns a dict or None."""
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.execute("UPDATE jobs SET state = 'pending', worker = NULL "
+                              "WHERE state = 'leased' AND lease_expires < ?", (now,))
+            # A worker that died between its last page and `complete` left a finished job behind
+            self.conn.execute("UPDATE jobs SET state = 'done', lease_expires = NULL "
+                              "WHERE state = 'pending' AND end_page IS NOT NULL AND pages_done >= end_page")
+            row = self.conn.execute("SELECT id, year_min, year_max, start_page, end_page, pages_done FROM jobs "
+                                    "WHERE state = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row:
+                self.conn.execute("UPDATE jobs SET state = 'leased', worker = ?, lease_expires = ?, "
+                                  "attempts = attempts + 1 WHERE id = ?", (worker, now + lease_seconds, row[0]))
+        finally:
+            self.conn.execute('COMMIT')
+        if row is None:
+            return None
+        job_id, year_min, year_max, start_page, end_page, pages_done = row
+        return {'id': job_id, 'year_min': year_min, 'year_max': year_max, 'end_page': end_page,
+                'start_page': max(start_page, pages_done + 1)}
+
+    def renew(self, job_id, worker, pages_done, lease_seconds=LEASE_SECONDS):
+        """Extend `worker`'s lease and record its progress; returns False if the lease was lost."""
+        cursor = self.conn.execute(
+            "UPDATE jobs SET lease_expires = ?, pages_done = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+            (time.time() + lease_seconds, pages_done, job_id, worker))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker):
+        self.conn.execute("UPDATE jobs SET state = 'done', lease_expires = NULL WHERE id = ? AND worker = ?",
+                          (job_id, worker))
+
+    def release(self, job_id, worker):
+        """Hand a job back to the queue, keeping its progress, after a failure."""
+        self.conn.execute("UPDATE jobs SET state = 'pending', worker = NULL, lease_expires = NULL "
+                          "WHERE id = ? AND worker = ?", (job_id, worker))
+
+    def counts(self):
+        return dict(self.conn.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+
+    def jobs(self):
+        return self.conn.execute('SELECT id, year_min, year_max, start_page, end_page, est_pages, state, worker, '
+                                 'pages_done, attempts FROM jobs ORDER BY id').fetchall()
+
+
+def make_fetcher(rate, max_in_flight):
+    limiter = RateLimiter(rate, max_in_flight)
+    cache = ResponseCache(scrap.CACHE_FILENAME, scrap.CACHE_MAX_BYTES)
+    return Fetcher(limiter, cache, scrap.HEADERS, pool_size=max_in_flight + 1)
+
+
+def plan_jobs(fetcher, extractor, first_year, last_year, target_pages):
+    """Split [first_year, last_year] into jobs of about `target_pages` browse pages each.
+
+    A year range is halved until it fits the target. A single year that is
+    still too big is cut into page ranges.
+    """
+    def page_count(year_min, year_max):
+        url = scrap.BROWSE_URL_RANGE_TEMPLATE.format(year_min=year_min, year_max=year_max).format(1)
+        _, pages = fetcher.get(url, extractor.page_count)
+        print(f"  {year_min}-{year_max}: {pages} pages")
+        return pages or 0
+
+    jobs = []
+    ranges = [(first_year, last_year)]
+    while ranges:
+        year_min, year_max = ranges.pop()
+        pages = page_count(year_min, year_max)
+        if pages <= target_pages:
+            if pages:
+                jobs.append((year_min, year_max, 1, None, pages))
+        elif year_min < year_max:
+            middle = (year_min + year_max) // 2
+            ranges.extend([(year_min, middle), (middle + 1, year_max)])  # Newer half is popped first
+        else:
+            for start in range(1, pages + 1, target_pages):
+                end = min(start + target_pages - 1, pages)
+                jobs.append((year_min, year_max, start, None if end == pages else end, end - start + 1))
+    return jobs
+
+
+def work(queue, worker, args):
+    """Claim and crawl jobs until none are left; returns the number of jobs completed."""
+    store = GameStore(WORKER_STORE_PATTERN.format(worker=worker))
+    fetcher = make_fetcher(args.rate, args.max_in_flight)
+    executor = ThreadPoolExecutor(max_workers=args.max_in_flight)
+    extractor = get_backend(args.parser)
+    completed = 0
+    try:
+        while True:
+            job = queue.lease(worker, args.lease)
+            if job is None:
+                print(f"Worker {worker}: no jobs left. Retrying failed fetches.")
+                scrap.drain_retries(store, fetcher, executor, extractor)
+                return completed
+            print(f"\nWorker {worker}: job {job['id']} ({job['year_min']}-{job['year_max']}, "
+                  f"pages {job['start_page']}-{job['end_page'] or 'end'})")
+            template = scrap.BROWSE_URL_RANGE_TEMPLATE.format(year_min=job['year_min'], year_max=job['year_max'])
+            store.start_journal(template, job['start_page'])
+            try:
+                scrap.crawl(store, fetcher, executor, extractor, job['start_page'], template,
+                            end_page=job['end_page'],
+                            on_page=lambda page: queue.renew(job['id'], worker, page, args.lease))
+            except Exception:
+                queue.release(job['id'], worker)
+                raise
+            if store.load_journal()['finished']:
+                queue.complete(job['id'], worker)
+                completed += 1
+            else:
+                # A failed browse fetch or a lost lease; whoever holds the job next continues it
+                queue.release(job['id'], worker)
+    finally:
+        executor.shutdown()
+        fetcher.close()
+        store.close()
+
+
+def merge(store_paths, db_filename, csv_filename):
+    """Combine worker stores into one store, newest games first, and export games.csv, the changelog and the dataset."""
+    rows = []
+    for path in store_paths:
+        conn = sqlite3.connect(path)
+        rows.extend(conn.execute('SELECT title, release_date, user_rating, num_ratings, detail_url FROM games'))
+        conn.close()
+    rows.sort(key=lambda row: scrap.date_sort_key(row[1]) or '', reverse=True)
+
+    store = GameStore(db_filename, dataset=dataset.DatasetWriter() if dataset.available() else None,
+                      changelog_filename=changelog.CHANGELOG_FILENAME)
+    before = len(store)
+    store.upsert_many([['' if value is None else value for value in row[:4]] + [row[4]] for row in rows])
+    print(f"Merged {len(rows)} rows from {len(store_paths)} stores: {len(store) - before} new games, "
+          f"{len(store)} in total")
+    store.export_csv(csv_filename)
+    store.export_changes(changelog.CHANGELOG_FILENAME)
+    if store.dataset is not None:  # Otherwise plot.py would keep reading the games of the last scrap.py run
+        store.dataset.write_snapshot(store.iter_rows(dataset.SNAPSHOT_BATCH))
+    store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queue', default=QUEUE_FILENAME, help=f"job queue file (default: {QUEUE_FILENAME})")
+    parser.add_argument('--rate', type=float, default=scrap.REQUESTS_PER_SECOND,
+                        help="requests per second for this process")
+    parser.add_argument('--max-in-flight', type=int, default=scrap.MAX_IN_FLIGHT)
+    parser.add_argument('--parser', choices=available_backends(), default=DEFAULT_BACKEND)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan = commands.add_parser('plan', help="queue year-range jobs sized from live page counts")
+    plan.add_argument('--first-year', type=int, default=scrap.FIRST_YEAR)
+    plan.add_argument('--last-year', type=int, default=scrap.LAST_YEAR)
+    plan.add_argument('--target-pages', type=int, default=TARGET_PAGES_PER_JOB,
+                      help=f"browse pages per job (default: {TARGET_PAGES_PER_JOB})")
+
+    work_parser = commands.add_parser('work', help="claim and crawl jobs until the queue is empty")
+    work_parser.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}")
+    work_parser.add_argument('--lease', type=int, default=LEASE_SECONDS, help="lease length in seconds")
+
+    commands.add_parser('status', help="show the job queue")
+
+    merge_parser = commands.add_parser('merge', help="merge worker stores into games.sqlite and games.csv")
+    merge_parser.add_argument('--stores', default=WORKER_STORE_PATTERN.format(worker='*'),
+                              help="glob of worker stores to merge")
+    args = parser.parse_args(argv)
+
+    if args.command == 'merge':
+        merge(sorted(glob.glob(args.stores)), scrap.DB_FILENAME, scrap.CSV_FILENAME)
+        return
+
+    queue = JobQueue(args.queue)
+    if args.command == 'plan':
+        fetcher = make_fetcher(args.rate, args.max_in_flight)
+        print(f"Probing page counts for {args.first_year}-{args.last_year}:")
+        jobs = plan_jobs(fetcher, get_backend(args.parser), args.first_year, args.last_year, args.target_pages)
+        fetcher.close()
+        queue.add_jobs(jobs)
+        print(f"Queued {len(jobs)} jobs covering {sum(job[4] for job in jobs)} pages in {args.queue}")
+    elif args.command == 'work':
+        completed = work(queue, args.worker_id, args)
+        print(f"Worker {args.worker_id} completed {completed} jobs")
+    elif args.command == 'status':
+        for job in queue.jobs():
+            print("job {:>4}  {}-{}  pages {}-{}  (~{} pages)  {:<8} {:<20} done {:>4}  attempts {}".format(
+                job[0], job[1], job[2], job[3], job[4] or 'end', job[5], job[6], job[7] or '', job[8], job[9]))
+        print(queue.counts())
+
+
+if __name__ == '__main__':
+    main()
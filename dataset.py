@@ -0,0 +1,141 @@
+import glob
+import os
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow is optional; without it only games.csv is written
+    pa = None
+
+from schema import CSV_HEADER
+
+DATASET_DIR = "games_dataset"
+SNAPSHOT_FILENAME = "games.arrow"    # The whole store, rewritten at the end of every run
+PART_PATTERN = "part-{}.arrows"      # Rows appended while a run is in progress
+SNAPSHOT_BATCH = 65536
+TITLE, RELEASE_DATE, USER_RATING, NUM_RATINGS = CSV_HEADER
+DETAIL_URL = 'Detail URL'
+
+
+def available():
+    return pa is not None
+
+
+def schema():
+    return pa.schema([(TITLE, pa.string()), (RELEASE_DATE, pa.timestamp('s')), (USER_RATING, pa.float64()),
+                      (NUM_RATINGS, pa.int32()), (DETAIL_URL, pa.string())])
+
+
+def _number(value, cast):
+    """A store value ("7.5", 7.5, "", None, "N/A"...) as a number of type `cast`, or None."""
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def to_batch(rows):
+    """Turn store rows (title, MM/DD/YYYY date, user rating, number of ratings[, detail URL]) into a typed RecordBatch.
+
+    Dates that aren't MM/DD/YYYY ("TBA", "N/A"...) and blank scores become nulls.
+    """
+    rows = list(rows)
+    dates = pa.array([row[1] for row in rows], pa.string())
+    return pa.RecordBatch.from_arrays([
+        pa.array([row[0] for row in rows], pa.string()),
+        pc.strptime(dates, format='%m/%d/%Y', unit='s', error_is_null=True),
+        pa.array([_number(row[2], float) for row in rows], pa.float64()),
+        pa.array([_number(row[3], int) for row in rows], pa.int32()),
+        pa.array([row[4] if len(row) > 4 else None for row in rows], pa.string()),
+    ], schema=schema())
+
+
+class DatasetWriter:
+    """Typed columnar copy of the games table, kept as uncompressed Arrow IPC files.
+
+    `append` adds newly written rows as they land, as record batches of a
+    part-*.arrows stream, so readers see new games before the run ends.
+    `write_snapshot` rewrites games.arrow from the whole store and deletes
+    the parts, which also picks up updated scores and fixes anything a crash
+    left half-written.
+    """
+
+    def __init__(self, directory=DATASET_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._sink = None
+        self._writer = None
+
+    def append(self, rows):
+        if not rows:
+            return
+        if self._writer is None:
+            path = os.path.join(self.directory, PART_PATTERN.format(time.time_ns()))
+            self._sink = pa.OSFile(path, 'wb')
+            self._writer = pa.ipc.new_stream(self._sink, schema())
+        self._writer.write_batch(to_batch(rows))
+        self._sink.flush()
+
+    def write_snapshot(self, batches):
+        """Replace games.arrow with `batches` of store rows (e.g. from `GameStore.iter_rows`) and drop the parts."""
+        self.close()
+        path = os.path.join(self.directory, SNAPSHOT_FILENAME)
+        with pa.OSFile(path + '.tmp', 'wb') as sink, pa.ipc.new_file(sink, schema()) as writer:
+            for rows in batches:
+                writer.write_batch(to_batch(rows))
+        os.replace(path + '.tmp', path)
+        for part in glob.glob(os.path.join(self.directory, PART_PATTERN.format('*'))):
+            os.remove(part)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = self._sink = None
+
+
+def _read_part(path):
+    """Read a part stream, keeping the batches before a tail cut short by a crash."""
+    batches = []
+    try:
+        for batch in pa.ipc.open_stream(pa.memory_map(path)):
+            batches.append(batch)
+    except (pa.ArrowInvalid, OSError):
+        pass
+    return batches
+
+
+def paths(directory=DATASET_DIR):
+    """The dataset's files in the order their rows are read: the snapshot, then the parts oldest first."""
+    snapshot = os.path.join(directory, SNAPSHOT_FILENAME)
+    parts = sorted(glob.glob(os.path.join(directory, PART_PATTERN.format('*'))))
+    return ([snapshot] if os.path.exists(snapshot) else []) + parts
+
+
+def load_table(directory=DATASET_DIR, columns=None, files=None):
+    """Memory-map the dataset as a pyarrow Table, keeping only `columns` (default: all).
+
+    The files are mapped rather than read, so columns that aren't selected
+    are never loaded from disk. `files` reads only those files of the
+    dataset (see `paths`).
+    """
+    tables = []
+    for path in paths(directory) if files is None else files:
+        if path.endswith(SNAPSHOT_FILENAME):
+            tables.append(pa.ipc.open_file(pa.memory_map(path)).read_all())
+        else:
+            tables.append(pa.Table.from_batches(_read_part(path), schema()))
+    table = pa.concat_tables(tables) if tables else schema().empty_table()
+    return table.select(columns) if columns else table
+
+
+def to_pandas(table):
+    """Convert a dataset Table to pandas, keeping rating counts as nullable Int32 rather than floats."""
+    import pandas as pd
+    return table.to_pandas(types_mapper={pa.int32(): pd.Int32Dtype()}.get)
+
+
+def load(directory=DATASET_DIR, columns=None):
+    """Load the dataset as a pandas DataFrame with datetime, float and int columns (see `load_table`)."""
+    return to_pandas(load_table(directory, columns))
@@ -0,0 +1,208 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+except ImportError:  # lxml is optional; the BeautifulSoup backends always work
+    lxml = None
+
+CARD_CLASS = 'c-finderProductCard-game'
+USER_SCORE_CLASS = 'c-siteReviewScore_user'
+USER_SCORE_INFO = 'user-score-info'
+REVIEWS_TOTAL_CLASS = 'c-productScoreInfo_reviewsTotal'
+PAGINATION_CLASS = 'c-navigationPagination_item'
+# Bump whenever a change here or in scrap.py's parse_* functions changes what a page parses to:
+# the response cache keeps parsed results, and ignores those from an older version
+EXTRACT_VERSION = 1
+
+# Every backend returns the same fields:
+#   cards(html)  -> [(title, raw release date text or None, detail page path or None), ...]
+#   detail(html) -> {'user_score': str ("N/A" if missing), 'reviews_text': str or None}
+#   page_count(html) -> the number of browse pages the listing has (0 if it has no cards)
+
+
+def _card_fields(card):
+    """Read a browse card's fields from a BeautifulSoup tag."""
+    game_title = "N/A"
+    title_div = card.find('div', class_='c-finderProductCard_title')
+    if title_div and 'data-title' in title_div.attrs:
+        game_title = title_div['data-title'].strip()
+    else:
+        title_h3 = card.find('h3', class_='c-finderProductCard_titleHeading')
+        if title_h3 and title_h3.span:
+            game_title = title_h3.span.get_text(strip=True)
+
+    date_text = None
+    meta_div = card.find('div', class_='c-finderProductCard_meta')
+    if meta_div:
+        date_span = meta_div.find('span', class_='u-text-uppercase')
+        if date_span:
+            date_text = date_span.get_text(strip=True)
+
+    href = None
+    link_tag = card.find('a', class_='c-finderProductCard_container')
+    if link_tag and 'href' in link_tag.attrs:
+        href = link_tag['href']
+
+    return game_title, date_text, href
+
+
+def _detail_fields(detail_soup):
+    """Read the user score and ratings-count text from a (possibly strained) BeautifulSoup tree."""
+    user_score = "N/A"
+    reviews_text = None
+
+    user_score_div = detail_soup.find('div', class_=lambda x: x and USER_SCORE_CLASS in x.split())
+    if user_score_div:
+        score_span = user_score_div.find('span')
+        if score_span:
+            user_score = score_span.get_text(strip=True)
+
+    user_score_container = detail_soup.find('div', attrs={"data-testid": USER_SCORE_INFO})
+    if user_score_container:
+        reviews_total_span = user_score_container.find('span', class_=REVIEWS_TOTAL_CLASS)
+        if reviews_total_span:
+            reviews_text = reviews_total_span.get_text(strip=True)
+
+    return {'user_score': user_score, 'reviews_text': reviews_text}
+
+
+class SoupBackend:
+    """Builds the full html.parser tree for every page. The reference implementation."""
+
+    name = 'html.parser'
+
+    def cards(self, html):
+        browse_soup = BeautifulSoup(html, 'html.parser')
+        return [_card_fields(card) for card in browse_soup.find_all('div', class_=CARD_CLASS)]
+
+    def detail(self, html):
+        return _detail_fields(BeautifulSoup(html, 'html.parser'))
+
+    def page_count(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        numbers = [int(text) for item in soup.find_all(class_=re.compile(PAGINATION_CLASS))
+                   if (text := item.get_text(strip=True)).isdigit()]
+        if numbers:
+            return max(numbers)
+        return 1 if soup.find('div', class_=CARD_CLASS) else 0
+
+
+class StrainerBackend(SoupBackend):
+    """html.parser restricted by SoupStrainers to the card and user-score blocks.
+
+    The page is still tokenized in full, but only the matching subtrees are
+    built. The user score normally sits inside the user-score-info block. If it
+    doesn't, the page falls back to a full parse so the fields never differ
+    from SoupBackend's.
+    """
+
+    name = 'strainer'
+    card_strainer = SoupStrainer('div', attrs={'class': re.compile(rf'(^|\s){CARD_CLASS}(\s|$)')})
+    detail_strainer = SoupStrainer('div', attrs={'data-testid': USER_SCORE_INFO})
+
+    def cards(self, html):
+        browse_soup = BeautifulSoup(html, 'html.parser', parse_only=self.card_strainer)
+        return [_card_fields(card) for card in browse_soup.find_all('div', class_=CARD_CLASS)]
+
+    def detail(self, html):
+        fields = _detail_fields(BeautifulSoup(html, 'html.parser', parse_only=self.detail_strainer))
+        if fields['user_score'] == "N/A" and USER_SCORE_CLASS in html:
+            return super().detail(html)
+        return fields
+
+
+def _has_class(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def _text(element):
+    """Equivalent of BeautifulSoup's get_text(strip=True)."""
+    return ''.join(s.strip() for s in element.itertext())
+
+
+class LxmlBackend:
+    """libxml2's HTML parser queried with precompiled XPath expressions."""
+
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree
+        xpath = etree.XPath
+        self._cards = xpath(f"//div[{_has_class(CARD_CLASS)}]")
+        self._title_div = xpath(f"(.//div[{_has_class('c-finderProductCard_title')}])[1]")
+        self._title_span = xpath(f"(.//h3[{_has_class('c-finderProductCard_titleHeading')}])[1]//span")
+        self._date_span = xpath(f"(.//div[{_has_class('c-finderProductCard_meta')}])[1]"
+                                f"//span[{_has_class('u-text-uppercase')}]")
+        self._link = xpath(f"(.//a[{_has_class('c-finderProductCard_container')}])[1]")
+        self._score_div = xpath(f"(//div[{_has_class(USER_SCORE_CLASS)}])[1]")
+        self._pagination = xpath(f"//*[contains(@class, '{PAGINATION_CLASS}')]")
+        self._reviews_span = xpath(f"(//div[@data-testid='{USER_SCORE_INFO}'])[1]"
+                                   f"//span[{_has_class(REVIEWS_TOTAL_CLASS)}]")
+
+    def cards(self, html):
+        results = []
+        if not html.strip():
+            return results
+        for card in self._cards(lxml.html.fromstring(html)):
+            game_title = "N/A"
+            title_div = self._title_div(card)
+            if title_div and title_div[0].get('data-title') is not None:
+                game_title = title_div[0].get('data-title').strip()
+            else:
+                title_span = self._title_span(card)
+                if title_span:
+                    game_title = _text(title_span[0])
+
+            date_span = self._date_span(card)
+            date_text = _text(date_span[0]) if date_span else None
+
+            link = self._link(card)
+            href = link[0].get('href') if link else None
+
+            results.append((game_title, date_text, href))
+        return results
+
+    def detail(self, html):
+        user_score = "N/A"
+        reviews_text = None
+        if not html.strip():
+            return {'user_score': user_score, 'reviews_text': reviews_text}
+        tree = lxml.html.fromstring(html)
+
+        score_div = self._score_div(tree)
+        if score_div:
+            score_span = score_div[0].find('.//span')
+            if score_span is not None:
+                user_score = _text(score_span)
+
+        reviews_span = self._reviews_span(tree)
+        if reviews_span:
+            reviews_text = _text(reviews_span[0])
+
+        return {'user_score': user_score, 'reviews_text': reviews_text}
+
+    def page_count(self, html):
+        if not html.strip():
+            return 0
+        tree = lxml.html.fromstring(html)
+        numbers = [int(text) for item in self._pagination(tree) if (text := _text(item)).isdigit()]
+        if numbers:
+            return max(numbers)
+        return 1 if self._cards(tree) else 0
+
+
+BACKENDS = {backend.name: backend for backend in (SoupBackend, StrainerBackend, LxmlBackend)}
+DEFAULT_BACKEND = 'lxml' if lxml else 'strainer'
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != 'lxml' or lxml]
+
+
+def get_backend(name=DEFAULT_BACKEND):
+    """Return an extractor instance for `name` (one of `available_backends()`)."""
+    if name not in available_backends():
+        raise ValueError(f"Unknown or unavailable parser backend '{name}'. Choose from: {', '.join(available_backends())}")
+    return BACKENDS[name]()
@@ -0,0 +1,288 @@
+import inspect
+import io
+import json
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from functools import partial
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+from urllib3.util import make_headers
+
+from extract import EXTRACT_VERSION
+from telemetry import Metrics
+
+# gzip/deflate always, plus br (and zstd) when urllib3 finds a decoder installed
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}  # The server is overloaded or rate limiting us
+
+
+class ResponseCache:
+    """On-disk cache of parsed responses, keyed by URL and parser (see `cache_key`).
+
+    Each entry keeps the response's ETag/Last-Modified validators next to the
+    result of parsing it, so a 304 answer can be served without downloading or
+    parsing the page again. The total payload size is capped at `max_bytes`;
+    the least recently used entries are evicted first.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.max_bytes = max_bytes
+        self.stats = {'hit': 0, 'miss': 0, '304': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                expires REAL,
+                payload TEXT,
+                size INTEGER,
+                last_used REAL
+            )""")
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)')
+        self._conn.commit()
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def record(self, outcome):
+        """Count a lookup outcome: 'hit', 'miss' or '304'."""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def get(self, key):
+        """Return the cached entry for `key` as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, expires, payload FROM responses WHERE url = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE responses SET last_used = ? WHERE url = ?', (time.time(), key))
+            self._conn.commit()
+        etag, last_modified, expires, payload = row
+        return {'etag': etag, 'last_modified': last_modified, 'expires': expires, 'payload': json.loads(payload)}
+
+    def put(self, key, etag, last_modified, expires, payload):
+        """Store (or replace) the entry for `key`, evicting old entries if over the size cap."""
+        payload = json.dumps(payload)
+        size = len(key) + len(payload)
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE url = ?', (key,)).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, etag, last_modified, expires, payload, size, time.time()))
+            self._total_bytes += size
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, key, expires):
+        """Mark an entry as revalidated after a 304."""
+        with self._lock:
+            self._conn.execute('UPDATE responses SET expires = ?, last_used = ? WHERE url = ?',
+                               (expires, time.time(), key))
+            self._conn.commit()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes:
+            oldest = self._conn.execute('SELECT url, size FROM responses ORDER BY last_used LIMIT 100').fetchall()
+            if not oldest:
+                break
+            for url, size in oldest:
+                self._conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def parser_name(parse):
+    """Name a parse function, e.g. 'LxmlBackend.detail' or 'parse_browse_page(extractor=lxml)'.
+
+    Wrappers made with functools.wraps are seen through, and a partial's
+    arguments are part of the name (a backend by its `name`).
+    """
+    parse = inspect.unwrap(parse)
+    if isinstance(parse, partial):
+        bound = [getattr(value, 'name', repr(value)) for value in parse.args]
+        bound += [f"{key}={getattr(value, 'name', repr(value))}" for key, value in parse.keywords.items()]
+        return f"{parser_name(parse.func)}({', '.join(bound)})"
+    owner = getattr(parse, '__self__', None)
+    return f'{type(owner).__name__}.{parse.__name__}' if owner is not None else parse.__qualname__
+
+
+def cache_key(url, parse):
+    """The ResponseCache key for `url` parsed by `parse`.
+
+    The same URL parsed by two functions gets two entries, and bumping
+    extract.EXTRACT_VERSION leaves every entry parsed before it unused.
+    """
+    return f'{url}#{parser_name(parse)}@{EXTRACT_VERSION}'
+
+
+def read_body(response):
+    """Read a streamed response's body and return how many bytes it took on the wire.
+
+    The body is read undecoded, so gzip/br pages count at their compressed
+    size (urllib3's own tell() misses chunked bodies), then decoded into
+    `response.content` with the same errors requests would raise. A response
+    that isn't streamed by urllib3 (e.g. from a stub transport adapter) counts
+    its decoded size.
+    """
+    raw = response.raw
+    if not isinstance(raw, HTTPResponse):
+        return len(response.content)
+    try:
+        body = b''.join(raw.stream(decode_content=False))
+        encoding = {'Content-Encoding': raw.headers.get('Content-Encoding', '')}
+        response._content = HTTPResponse(io.BytesIO(body), encoding, preload_content=True).data
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    response._content_consumed = True
+    return len(body)
+
+
+def expiry_time(response):
+    """Return when a response stops being fresh, from its Cache-Control max-age (0 if absent)."""
+    cache_control = response.headers.get('Cache-Control', '')
+    if 'no-cache' in cache_control or 'no-store' in cache_control:
+        return 0
+    match = MAX_AGE_RE.search(cache_control)
+    return time.time() + int(match.group(1)) if match else 0
+
+
+def retry_after(response):
+    """Seconds a response's Retry-After header asks us to wait (either form), or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Fetcher:
+    """Pooled keep-alive HTTP session paced by a RateLimiter and backed by a ResponseCache.
+
+    If given a `telemetry.Metrics`, it times the rate limiter wait, each fetch
+    and each parse (per `stage`, e.g. 'browse' or 'detail'), and counts
+    requests, bytes, cache outcomes and HTTP errors.
+
+    With a `PageArchive`, every page downloaded in full is archived raw
+    before it is parsed. A page the archive doesn't hold yet is downloaded in
+    full even if the cache has it (the cache only keeps the parsed result),
+    so pages cached before archiving was turned on get archived too.
+
+    Every answer feeds the limiter's AIMD control: 429/5xx responses,
+    timeouts and connection errors call `on_throttle` (with the Retry-After
+    delay, if any); everything else calls `on_success`.
+    """
+
+    def __init__(self, limiter, cache=None, headers=None, pool_size=10, timeout=20, metrics=None, archive=None):
+        self.limiter = limiter
+        self.cache = cache
+        self.archive = archive
+        self.timeout = timeout
+        self.metrics = metrics or Metrics()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(headers or {})
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+
+    def get(self, url, parse, stage='detail'):
+        """Fetch `url` and return `(status_code, parse(html))`.
+
+        The parsed result comes straight from the cache while it is fresh, and
+        after a 304 revalidation. A 404 returns `(404, None)`; other HTTP errors
+        raise `requests.exceptions.RequestException`.
+        """
+        key = cache_key(url, parse)
+        use_cache = self.cache and (not self.archive or self.archive.has(url))
+        entry = self.cache.get(key) if use_cache else None
+        conditional_headers = {}
+        if entry:
+            if entry['expires'] > time.time():
+                self.cache.record('hit')
+                self.metrics.count('cache_hits')
+                return 200, entry['payload']
+            if entry['etag']:
+                conditional_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                conditional_headers['If-Modified-Since'] = entry['last_modified']
+
+        waited = time.perf_counter()
+        with self.limiter.slot():
+            started = time.perf_counter()
+            self.metrics.observe('rate_limit_wait', started - waited)
+            try:
+                response = self.session.get(url, headers=conditional_headers, timeout=self.timeout, stream=True)
+                wire_bytes = read_body(response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.limiter.on_throttle()
+                self.metrics.count('throttled')
+                raise
+            finally:
+                self.metrics.observe(f'{stage}_fetch', time.perf_counter() - started)
+        if response.status_code in THROTTLE_STATUSES:
+            self.limiter.on_throttle(retry_after(response))
+            self.metrics.count('throttled')
+        else:
+            self.limiter.on_success()
+        self.metrics.count('requests')
+        self.metrics.count('bytes_downloaded', wire_bytes)
+
+        if response.status_code == 304 and entry:
+            self.cache.record('304')
+            self.metrics.count('cache_revalidated')
+            self.cache.refresh(key, expiry_time(response))
+            return 200, entry['payload']
+        if response.status_code == 404:
+            return 404, None
+        if response.status_code >= 400:
+            self.metrics.count('http_errors')
+        response.raise_for_status()
+
+        if self.archive:
+            with self.metrics.time('archive'):
+                page_format = 'json' if 'json' in response.headers.get('Content-Type', '') else 'html'
+                self.archive.put(url, stage, page_format, response.text)
+        with self.metrics.time(f'{stage}_parse'):
+            result = parse(response.text)
+        if self.cache:
+            self.cache.record('miss')
+            self.metrics.count('cache_misses')
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            expires = expiry_time(response)
+            no_store = 'no-store' in response.headers.get('Cache-Control', '')
+            if (etag or last_modified or expires) and not no_store:
+                self.cache.put(key, etag, last_modified, expires, result)
+        return response.status_code, result
+
+    def close(self):
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+        if self.archive:
+            self.archive.close()
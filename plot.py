@@ -1,82 +1,117 @@
-import pandas as pd
-import plotly.express as px
-import webbrowser
-from bs4 import BeautifulSoup
-import json
-
-# Read the CSV file
-data = pd.read_csv('games.csv')
-
-# Filter the data to keep only rows with ratings
-data = data.dropna(subset=['User Rating'])
-
-# Convert Initial Release Dates to datetime format
-data['Initial Release Date'] = pd.to_datetime(data['Initial Release Date'])
+"""Plot games.csv (or games_dataset/) as an interactive HTML page.
 
-# Filter the data to keep only rows with valid dates
-data = data.dropna(subset=['Initial Release Date'])
+    python plot.py [--offline] [--compress gz br] [--no-open] [--rebuild] [--serve [PORT]]
 
-# Sort the data by Initial Release Date
-data = data.sort_values('Initial Release Date')
-
-# Add an index column to track original positions
-data = data.reset_index(drop=True)
-data['_index'] = data.index
-
-# Determine the min and max values for x and y axes from the overall data
-min_date_overall = data['Initial Release Date'].min()
-max_date_overall = data['Initial Release Date'].max()
-min_rating_overall = data['User Rating'].min()
-max_rating_overall = data['User Rating'].max()
-
-# Calculate margins for x and y axes
-x_margin_seconds = (max_date_overall - min_date_overall).total_seconds() * 0.025
-y_margin_value = (max_rating_overall - min_rating_overall) * 0.06
-
-# Convert x_margin from seconds to timedelta
-x_margin_timedelta = pd.Timedelta(seconds=x_margin_seconds)
+`build()` does the same from Python, so a long-running process can rebuild
+the page without starting a new interpreter each time. pandas and plotly are
+imported by the first build, not when plot.py is imported.
+"""
+import argparse
+import gzip
+import json
+import os
+import webbrowser
 
-# Calculate ranges for x and y axes
-x_range_overall = [min_date_overall - x_margin_timedelta, max_date_overall + x_margin_timedelta]
-y_range_overall = [min_rating_overall - y_margin_value, max_rating_overall + y_margin_value]
+import numpy as np
+
+import dataset
+import schema
+from build_cache import BuildCache, file_digest, params_key
+from title_search import build_search_index, typed_array
+
+PLOT_COLUMNS = schema.CSV_HEADER
+CSV_FILENAME = "games.csv"
+PAGE_SOURCES = ['plot.py', 'schema.py', 'dataset.py', 'title_search.py']  # Editing any of these rebuilds the page
+PAGE_FILENAME = "interactive_plot_metacritic.html"
+SEARCH_DEBOUNCE_MS = 150  # The search box waits this long after the last keystroke before filtering
+WRITE_BLOCK = 1 << 20      # Characters of the page buffered before they're written out (and compressed)
+GZIP_LEVEL = 6             # Level 9 is under 1% smaller on the page and ~3x slower
+BROTLI_QUALITY = 5         # Already ~10% smaller than gzip; 9 saves 5% more at ~7x the time
+SERVE_PORT = 8050
+SLIDER_STEPS = 30          # Number of slider steps, at evenly spaced quantiles of the rating counts
+PLOT_DIV_ID = 'gameScatterPlot'
+COMMON_TEXT = "Ratings<br>Count<br>"
+
+# --- Read the games, through the build cache ---
+# The typed dataset scrap.py keeps (memory-mapped, only the columns the plot needs) is read when there
+# is one at least as new as games.csv, games.csv otherwise. The cache skips the build when neither the inputs nor anything that
+# shapes the page changed, and when rows were only appended it merges just those into the games it
+# prepared last time.
+def game_files(csv_path=CSV_FILENAME):
+    """The files to read the games from: the dataset's, unless it's empty or older than games.csv."""
+    paths = dataset.paths() if dataset.available() else []
+    if paths and (not os.path.exists(csv_path) or max(map(os.path.getmtime, paths)) >= os.path.getmtime(csv_path)):
+        return paths
+    return [csv_path]
+
+
+def read_games(path, skip_bytes=0, skip_rows=0):
+    """Read one input file's games, leaving out the first `skip_bytes` (CSV) or `skip_rows` (dataset)."""
+    if not path.endswith('.csv'):
+        return dataset.to_pandas(dataset.load_table(columns=PLOT_COLUMNS, files=[path]).slice(skip_rows))
+    return schema.read_csv(path, skip_bytes)  # Dates parsed with explicit formats, a column at a time
+
+def prepare(games):
+    """Keep the games with a rating and a valid date, sorted by release date (ties stay in input order)."""
+    games = games.dropna(subset=['User Rating', 'Initial Release Date'])
+    return games.sort_values('Initial Release Date', kind='stable')
+
+def merge_sorted(old, new):
+    """Merge two frames sorted by release date, `old` first on ties, the same order a full sort gives."""
+    import pandas as pd
+    positions = np.searchsorted(old['Initial Release Date'].to_numpy(), new['Initial Release Date'].to_numpy(),
+                                side='right')
+    order = np.insert(np.arange(len(old)), positions, len(old) + np.arange(len(new)))
+    return pd.concat([old, new], ignore_index=True).iloc[order]
+
+def load_games(build_cache, input_paths, appended):
+    """Return (games in release date order, rows read per input path), merging appended rows when `appended` allows."""
+    import pandas as pd
+    rows_read = {source['path']: source.get('rows', 0) for source in build_cache.manifest.get('sources', [])}
+    if appended is not None:
+        new_games = []
+        for path, previous in appended:
+            games = read_games(path, previous['size'] if previous else 0, previous['rows'] if previous else 0)
+            rows_read[path] = (previous['rows'] if previous else 0) + len(games)
+            new_games.append(games)
+        data = build_cache.load_frame()
+        if new_games:
+            new_games = prepare(pd.concat(new_games, ignore_index=True))
+            data = merge_sorted(data, new_games)
+            print(f"Merged {len(new_games)} new games into the {len(data) - len(new_games)} prepared last time")
+    else:
+        games = [read_games(path) for path in input_paths]
+        rows_read = {path: len(frame) for path, frame in zip(input_paths, games)}
+        data = prepare(pd.concat(games, ignore_index=True) if games else pd.DataFrame(columns=PLOT_COLUMNS))
+    # Number the games 0..n-1 in release date order; the page's typed arrays use the same positions
+    return data.reset_index(drop=True), rows_read
 
 # --- Step and Data Preparation ---
-indices_for_each_step = []  # Store only indices instead of full datasets
-annotation_text_list = []
-common_text = "Ratings<br>Count<br>"
-unique_ratings = sorted(data['Number of Ratings'].astype(int).unique())
-steps = []
-num = 20  # Number of initial steps to take directly from unique_ratings
-
+# Every threshold keeps the games with at least that many ratings, and the thresholds only go up,
+# so each step is a cutoff into one list of games ordered by rating count (most rated first):
+# step i shows rank_order[:step_cutoffs[i]]. The payload is one index per game plus one per step.
 def update_title(filtered_data_df):
     game_count = len(filtered_data_df)
     game_text = "game" if game_count == 1 else "games"
     return f'Game Ratings by Release Date ({game_count} {game_text})'
 
-for i, rating_count_threshold in enumerate(unique_ratings):
-    # Determine if this rating_count_threshold should be a slider step
-    is_selected_step = False
-    if i < num:  # Select the first 'num' unique rating counts
-        is_selected_step = True
-    elif i == len(unique_ratings) - 1:  # Always select the last unique rating count
-        is_selected_step = True
-    elif i >= num:  # For ratings after the first 'num'
-        num_initial_ratings_for_calc = len(unique_ratings[:num])
-        divisor_for_outer_floor_division_float = num_initial_ratings_for_calc / 1.5
-        
-        if divisor_for_outer_floor_division_float >= 1 and len(unique_ratings[num:]) > 0:
-            calculated_interval = len(unique_ratings[num:]) // int(divisor_for_outer_floor_division_float)
-            modulo_divisor = max(1, calculated_interval)
-            
-            if i % modulo_divisor == 0:
-                is_selected_step = True
-
-    if is_selected_step:
-        # Store only the indices of games that meet the threshold
-        indices = data[data['Number of Ratings'] >= rating_count_threshold]['_index'].tolist()
-        indices_for_each_step.append(indices)
-        
-        annotation_text = f'<span style="display: block; text-align: center;">{common_text}<b>({rating_count_threshold})</b></span>'
+def slider_steps(data, num=SLIDER_STEPS):
+    """Return (rank_order, step_cutoffs, annotation texts, slider steps) for the games in `data`."""
+    annotation_text_list = []
+    steps = []
+    rating_counts = data['Number of Ratings'].fillna(0).astype(int).to_numpy()
+    rank_order = np.argsort(-rating_counts, kind='stable')  # Ties stay in release date order
+    ranked_counts = rating_counts[rank_order]
+    # Each step drops about 1/num of the games; thresholds that come out equal (common low counts) merge
+    thresholds = np.unique(np.quantile(rating_counts, np.linspace(0, 1, num), method='inverted_cdf')) if len(data) else []
+    step_cutoffs = []
+
+    for rating_count_threshold in thresholds:
+        rating_count_threshold = int(rating_count_threshold)
+        # Games with at least the threshold form a prefix of rank_order
+        step_cutoffs.append(int(np.searchsorted(-ranked_counts, -rating_count_threshold, side='right')))
+
+        annotation_text = f'<span style="display: block; text-align: center;">{COMMON_TEXT}<b>({rating_count_threshold})</b></span>'
         annotation_text_list.append(annotation_text)
 
         step = dict(
@@ -85,90 +120,88 @@ for i, rating_count_threshold in enumerate(unique_ratings):
             label=str(rating_count_threshold)
         )
         steps.append(step)
-
-# --- Prepare minimal dataset for JavaScript ---
-# Only include necessary columns and convert dates to strings
-minimal_data = data[['Title', 'Initial Release Date', 'User Rating', '_index']].copy()
-minimal_data['Initial Release Date'] = minimal_data['Initial Release Date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-minimal_data_json = minimal_data.to_json(orient='records')
-
-# --- Determine initial data for the plot ---
-if indices_for_each_step:
-    initial_indices = indices_for_each_step[0]
-    initial_plot_data = data.iloc[initial_indices]
-    initial_annotation_text = annotation_text_list[0]
-else:
-    initial_plot_data = data
-    initial_annotation_text = f'<span style="display: block; text-align: center;">{common_text}<b>(All)</b></span>'
+    return rank_order, step_cutoffs, annotation_text_list, steps
 
 # --- Create the scatter plot ---
-scatter = px.scatter(initial_plot_data, x='Initial Release Date', y='User Rating', hover_name='Title', 
-                    hover_data={'Initial Release Date': False, 'User Rating': False})
-
-# Update the marker properties
-scatter.update_traces(marker=dict(
-    size=5,
-    line=dict(width=1, color='black'),
-    opacity=0.8
-))
-
-# Update layout with sliders if steps were generated
-if steps:
+def make_figure(data, rank_order, step_cutoffs, annotation_text_list, steps):
+    """The figure: axis ranges, slider and title, with a WebGL trace the page fills from the typed arrays on load."""
+    import pandas as pd
+    import plotly.express as px
+
+    # Determine the min and max values for x and y axes from the overall data
+    min_date_overall = data['Initial Release Date'].min()
+    max_date_overall = data['Initial Release Date'].max()
+    min_rating_overall = data['User Rating'].min()
+    max_rating_overall = data['User Rating'].max()
+
+    # Calculate margins for x and y axes
+    x_margin_seconds = (max_date_overall - min_date_overall).total_seconds() * 0.025
+    y_margin_value = (max_rating_overall - min_rating_overall) * 0.06
+
+    # Convert x_margin from seconds to timedelta
+    x_margin_timedelta = pd.Timedelta(seconds=x_margin_seconds)
+
+    # Calculate ranges for x and y axes
+    x_range_overall = [min_date_overall - x_margin_timedelta, max_date_overall + x_margin_timedelta]
+    y_range_overall = [min_rating_overall - y_margin_value, max_rating_overall + y_margin_value]
+
+    # --- Determine initial data for the plot ---
+    if step_cutoffs:
+        initial_plot_data = data.iloc[np.sort(rank_order[:step_cutoffs[0]])]
+        initial_annotation_text = annotation_text_list[0]
+    else:
+        initial_plot_data = data
+        initial_annotation_text = f'<span style="display: block; text-align: center;">{COMMON_TEXT}<b>(All)</b></span>'
+
+    scatter = px.scatter(data.iloc[:0], x='Initial Release Date', y='User Rating', hover_name='Title',
+                        hover_data={'Initial Release Date': False, 'User Rating': False}, render_mode='webgl')
+
+    # Update the marker properties
+    scatter.update_traces(marker=dict(
+        size=5,
+        line=dict(width=1, color='black'),
+        opacity=0.8
+    ))
+
+    # Update layout with sliders if steps were generated
+    if steps:
+        scatter.update_layout(
+            sliders=[
+                dict(
+                    active=0, pad={"t": -60}, steps=steps,
+                    x=0.5, xanchor='left', y=0.5, yanchor='top',
+                    len=0.4, tickcolor='rgba(0, 0, 0, 0)', ticklen=0,
+                    font={'color': 'rgba(0, 0, 0, 0)'}
+                )
+            ]
+        )
+
+    # Update general layout properties
     scatter.update_layout(
-        sliders=[
+        height=600,
+        title={
+            'text': update_title(initial_plot_data),
+            'x': 0.5, 'y': 0.98, 'xanchor': 'center', 'yanchor': 'top'
+        },
+        xaxis_title=dict(text='Initial Release Date', font=dict(size=14)),
+        yaxis_title=dict(text='Rating', font=dict(size=14)),
+        xaxis=dict(range=x_range_overall, automargin=True, type='date'),
+        yaxis=dict(range=y_range_overall, automargin=True),
+        font=dict(size=18),
+        hoverlabel=dict(font_size=16, bgcolor='yellow'),
+        margin=dict(t=50),
+        annotations=[
             dict(
-                active=0, pad={"t": -60}, steps=steps,
-                x=0.5, xanchor='left', y=0.5, yanchor='top',
-                len=0.4, tickcolor='rgba(0, 0, 0, 0)', ticklen=0,
-                font={'color': 'rgba(0, 0, 0, 0)'}
+                text=initial_annotation_text,
+                x=1.0725, y=1.02, xref="paper", yref="paper",
+                font=dict(size=13, color="black"), showarrow=False
             )
-        ]
+        ],
     )
+    return scatter
 
-# Update general layout properties
-scatter.update_layout(
-    height=600,
-    title={
-        'text': update_title(initial_plot_data),
-        'x': 0.5, 'y': 0.98, 'xanchor': 'center', 'yanchor': 'top'
-    },
-    xaxis_title=dict(text='Initial Release Date', font=dict(size=14)),
-    yaxis_title=dict(text='Rating', font=dict(size=14)),
-    xaxis=dict(range=x_range_overall, automargin=True),
-    yaxis=dict(range=y_range_overall, automargin=True),
-    font=dict(size=18),
-    hoverlabel=dict(font_size=16, bgcolor='yellow'),
-    margin=dict(t=50),
-    annotations=[
-        dict(
-            text=initial_annotation_text,
-            x=1.0725, y=1.02, xref="paper", yref="paper",
-            font=dict(size=13, color="black"), showarrow=False
-        )
-    ],
-)
-
-# --- HTML Generation and JavaScript Injection ---
-file_path = 'interactive_plot_metacritic.html'
-plot_div_id = 'gameScatterPlot'
-scatter.write_html(file_path, div_id=plot_div_id, full_html=True, include_plotlyjs='cdn')
-
-with open(file_path, 'r', encoding='utf-8') as file:
-    html_content = file.read()
-soup = BeautifulSoup(html_content, 'html.parser')
-
+# --- HTML Generation ---
 search_input_html = '<input type="text" id="searchInput" placeholder="Search by title..." style="position: fixed; top: 10px; left: 10px; z-index: 1000; padding: 8px; font-size: 14px; width: 250px; border: 1px solid #ccc; border-radius: 4px;">'
-soup.body.insert(0, BeautifulSoup(search_input_html, 'html.parser'))
-
-# Embed the full dataset once
-full_data_script_tag = soup.new_tag('script', id='fullDatasetJson', type='application/json')
-full_data_script_tag.string = minimal_data_json
-soup.head.append(full_data_script_tag)
-
-# Embed the indices for each step (much smaller than full datasets)
-indices_script_tag = soup.new_tag('script', id='indicesForStepsJson', type='application/json')
-indices_script_tag.string = json.dumps(indices_for_each_step)
-soup.head.append(indices_script_tag)
 
 js_title_update_logic = """
                 function js_update_plot_title(game_count) {
@@ -177,7 +210,9 @@ js_title_update_logic = """
                 }
 """
 
-search_and_update_js_logic = f"""
+def page_script(annotation_text_list, plot_div_id=PLOT_DIV_ID):
+    """The page's onload script: the rotated slider, the search box and the plot updates."""
+    search_and_update_js_logic = f"""
         // --- Search Bar Functionality START ---
         const plotDivId = '{plot_div_id}';
         const graphDiv = document.getElementById(plotDivId);
@@ -187,82 +222,282 @@ search_and_update_js_logic = f"""
         }} else if (!searchInput) {{
             console.error('Search input element not found.');
         }} else {{
-            let fullDatasetEl = document.getElementById('fullDatasetJson');
-            let indicesForStepsEl = document.getElementById('indicesForStepsJson');
-            let fullDataset = [];
-            let indicesForSteps = [];
+            let plotColumnsEl = document.getElementById('plotColumnsJson');
+            let columns = null;
             let original_annotation_texts = {json.dumps(annotation_text_list)};
 
-            // Parse the full dataset
-            if (fullDatasetEl && fullDatasetEl.textContent) {{
+            // Parse the columns
+            if (plotColumnsEl && plotColumnsEl.textContent) {{
                 try {{
-                    fullDataset = JSON.parse(fullDatasetEl.textContent);
+                    columns = JSON.parse(plotColumnsEl.textContent);
                 }} catch (e) {{
-                    console.error('Error parsing fullDatasetJson:', e);
+                    console.error('Error parsing plotColumnsJson:', e);
                 }}
             }}
 
-            // Parse the indices for each step
-            if (indicesForStepsEl && indicesForStepsEl.textContent) {{
-                try {{
-                    indicesForSteps = JSON.parse(indicesForStepsEl.textContent);
-                }} catch (e) {{
-                    console.error('Error parsing indicesForStepsJson:', e);
+            function decodeTypedArray(base64, ArrayType) {{
+                const binary = atob(base64);
+                const bytes = new Uint8Array(binary.length);
+                for (let i = 0; i < binary.length; i++) {{
+                    bytes[i] = binary.charCodeAt(i);
                 }}
+                return new ArrayType(bytes.buffer);
             }}
 
-            if (fullDataset.length > 0 && indicesForSteps.length > 0) {{
+            if (columns && columns.serve) {{
                 {js_title_update_logic}
-                
+
+                // --- Served mode: plot_server sends the games for the current view ---
+                const stepCutoffs = columns.cutoffs;
+                // Axis ranges come back as 'YYYY-MM-DD HH:MM:SS.sss' strings (UTC) or as ms
+                function toMs(value) {{
+                    if (typeof value === 'number') {{
+                        return value;
+                    }}
+                    const iso = value.replace(' ', 'T');
+                    return Date.parse(iso.length <= 10 ? iso + 'T00:00:00Z' : iso + 'Z');
+                }}
+
+                let latestView = 0;
+                function updateView() {{
+                    const layout = graphDiv._fullLayout || graphDiv.layout;
+                    if (!layout || !layout.xaxis || !layout.xaxis.range) {{
+                        return;
+                    }}
+                    const sliders = graphDiv.layout.sliders;
+                    const activeSliderIndex = sliders && sliders.length > 0 ? sliders[0].active || 0 : 0;
+                    const params = new URLSearchParams({{
+                        x0: toMs(layout.xaxis.range[0]), x1: toMs(layout.xaxis.range[1]),
+                        y0: layout.yaxis.range[0], y1: layout.yaxis.range[1],
+                        step: activeSliderIndex, q: searchInput.value
+                    }});
+                    const view = ++latestView;
+                    fetch('query?' + params).then(response => response.json()).then(function(games) {{
+                        if (view !== latestView) {{
+                            return;  // A newer view was asked for in the meantime
+                        }}
+                        let update;
+                        if (games.mode === 'points') {{
+                            const days = decodeTypedArray(games.days, Int32Array);
+                            update = {{
+                                x: [Float64Array.from(days, day => day * 86400000)],
+                                y: [decodeTypedArray(games.ratings, Float32Array)],
+                                hovertext: [games.titles],
+                                'marker.size': 5, 'marker.color': pointColor, 'marker.showscale': false
+                            }};
+                        }} else {{
+                            // Zoomed out past plot_server.POINT_LIMIT games: one marker per bin, sized and coloured by count
+                            const counts = decodeTypedArray(games.counts, Int32Array);
+                            update = {{
+                                x: [decodeTypedArray(games.x, Float64Array)],
+                                y: [decodeTypedArray(games.y, Float32Array)],
+                                hovertext: [Array.from(counts, count => count + (count === 1 ? ' game' : ' games'))],
+                                'marker.size': [Array.from(counts, count => Math.min(4 + 2 * Math.log2(count), 16))],
+                                'marker.color': [Array.from(counts)], 'marker.colorscale': 'Viridis', 'marker.showscale': false
+                            }};
+                        }}
+                        Plotly.restyle(graphDiv, update, [0]);
+                        Plotly.relayout(graphDiv, {{
+                            'title.text': js_update_plot_title(games.total),
+                            'annotations[0].text': original_annotation_texts[activeSliderIndex] || (original_annotation_texts.length > 0 ? original_annotation_texts[0] : "Info")
+                        }});
+                    }}).catch(error => console.error('Plot query failed:', error));
+                }}
+                const pointColor = graphDiv.data && graphDiv.data[0].marker ? graphDiv.data[0].marker.color : undefined;
+
+                let searchTimer = null;
+                searchInput.addEventListener('input', function() {{
+                    clearTimeout(searchTimer);
+                    searchTimer = setTimeout(updateView, {SEARCH_DEBOUNCE_MS});
+                }});
+                graphDiv.on('plotly_sliderchange', function() {{
+                    setTimeout(updateView, 50);
+                }});
+                // Zooming, panning and resetting the axes ask for the new view; our own title updates don't
+                graphDiv.on('plotly_relayout', function(changes) {{
+                    if (Object.keys(changes).some(key => key.startsWith('xaxis') || key.startsWith('yaxis'))) {{
+                        updateView();
+                    }}
+                }});
+                let firstViewPending = true;
+                function firstView() {{
+                    if (firstViewPending) {{
+                        firstViewPending = false;
+                        updateView();
+                    }}
+                }}
+                if (graphDiv._fullLayout) {{
+                    firstView();
+                }} else {{
+                    graphDiv.on('plotly_afterplot', firstView);
+                }}
+            }} else if (columns && columns.titles.length > 0 && columns.cutoffs.length > 0) {{
+                {js_title_update_logic}
+
+                const gameCount = columns.titles.length;
+                const titles = columns.titles;
+                const days = decodeTypedArray(columns.days, Int32Array);
+                const releaseTimes = new Float64Array(gameCount);  // ms since the epoch, as a date axis takes them
+                for (let i = 0; i < gameCount; i++) {{
+                    releaseTimes[i] = days[i] * 86400000;
+                }}
+                const ratings = decodeTypedArray(columns.ratings, Float32Array);
+                const rankOf = decodeTypedArray(columns.rankOf, Int32Array);
+                const stepCutoffs = columns.cutoffs;
+
+                // --- Title search: the same normalization and grams as plot.py's index ---
+                function normalizeTitle(text) {{
+                    return text.normalize('NFKD').replace(/\\p{{M}}/gu, '').toLowerCase().replace(/[^\\p{{L}}\\p{{N}}]+/gu, ' ').trim();
+                }}
+                const searchIndex = columns.search;
+                const gramSlots = new Map(searchIndex.grams.map((gram, slot) => [gram, slot]));
+                const postingBytes = decodeTypedArray(searchIndex.postings, Uint8Array);
+                const postingOffsets = decodeTypedArray(searchIndex.offsets, Int32Array);
+                const postingCounts = decodeTypedArray(searchIndex.counts, Int32Array);
+
+                // Decode one gram's posting list: ascending game positions, stored as varint gaps
+                function postingList(gram) {{
+                    const slot = gramSlots.get(gram);
+                    if (slot === undefined) {{
+                        return new Int32Array(0);
+                    }}
+                    const games = new Int32Array(postingCounts[slot]);
+                    let pos = postingOffsets[slot];
+                    let game = 0;
+                    for (let n = 0; n < games.length; n++) {{
+                        let delta = 0, shift = 0, byte;
+                        do {{
+                            byte = postingBytes[pos++];
+                            delta |= (byte & 0x7f) << shift;
+                            shift += 7;
+                        }} while (byte & 0x80);
+                        game += delta;
+                        games[n] = game;
+                    }}
+                    return games;
+                }}
+
+                function intersectSorted(a, b) {{
+                    const out = new Int32Array(Math.min(a.length, b.length));
+                    let i = 0, j = 0, k = 0;
+                    while (i < a.length && j < b.length) {{
+                        if (a[i] < b[j]) {{
+                            i++;
+                        }} else if (a[i] > b[j]) {{
+                            j++;
+                        }} else {{
+                            out[k++] = a[i];
+                            i++;
+                            j++;
+                        }}
+                    }}
+                    return out.subarray(0, k);
+                }}
+
+                function queryGrams(word) {{
+                    if (word.length < 3) {{
+                        return [' ' + word];  // Short words match the start of a title word
+                    }}
+                    const grams = [];
+                    for (let i = 0; i + 3 <= word.length; i++) {{
+                        grams.push(word.slice(i, i + 3));
+                    }}
+                    return grams;
+                }}
+
+                // Positions (ascending, so still in release date order) of the games matching every
+                // query word, whatever the slider says; recomputed only when the query changes
+                let matchedQuery = null;
+                let matchedGames = null;
+                function searchMatches(query) {{
+                    if (query === matchedQuery) {{
+                        return matchedGames;
+                    }}
+                    const words = query.split(' ');
+                    const lists = words.flatMap(queryGrams).map(postingList).sort((a, b) => a.length - b.length);
+                    let candidates = lists[0];
+                    for (let n = 1; n < lists.length && candidates.length > 0; n++) {{
+                        candidates = intersectSorted(candidates, lists[n]);
+                    }}
+                    // A title can hold all of a word's trigrams without holding the word itself
+                    const matches = [];
+                    for (const i of candidates) {{
+                        const normalized = normalizeTitle(titles[i]);
+                        const spaced = ' ' + normalized;
+                        if (words.every(word => word.length < 3 ? spaced.includes(' ' + word) : normalized.includes(word))) {{
+                            matches.push(i);
+                        }}
+                    }}
+                    matchedQuery = query;
+                    matchedGames = Int32Array.from(matches);
+                    return matchedGames;
+                }}
+
                 function updatePlotWithFilters() {{
                     if (!graphDiv.layout || !graphDiv.layout.sliders || graphDiv.layout.sliders.length === 0 || typeof graphDiv.layout.sliders[0].active === 'undefined') {{
                         return;
                     }}
-                    
-                    const searchTerm = searchInput.value.toLowerCase().trim();
+
+                    const query = normalizeTitle(searchInput.value);
                     const activeSliderIndex = graphDiv.layout.sliders[0].active;
 
-                    if (activeSliderIndex < 0 || activeSliderIndex >= indicesForSteps.length) {{
+                    if (activeSliderIndex < 0 || activeSliderIndex >= stepCutoffs.length) {{
                         console.error('Active slider index is out of bounds.');
                         return;
                     }}
 
-                    // Get the indices for the current slider position
-                    const currentIndices = indicesForSteps[activeSliderIndex];
-                    
-                    // Filter the full dataset using the indices
-                    let games_to_display = fullDataset.filter(game => currentIndices.includes(game._index));
-
-                    // Apply search filter if search term exists
-                    if (searchTerm) {{
-                        games_to_display = games_to_display.filter(game =>
-                            game.Title && typeof game.Title === 'string' && game.Title.toLowerCase().includes(searchTerm)
-                        );
+                    // A game passes the slider if it is among the first stepCutoffs[i] games by rating count.
+                    // With a query, only its matches are checked against that; otherwise every game is.
+                    const cutoff = stepCutoffs[activeSliderIndex];
+                    const matches = query ? searchMatches(query) : null;
+                    const picked = new Int32Array(matches === null ? cutoff : Math.min(cutoff, matches.length));
+                    let count = 0;
+                    if (matches === null) {{
+                        for (let i = 0; i < gameCount; i++) {{
+                            if (rankOf[i] < cutoff) {{
+                                picked[count++] = i;
+                            }}
+                        }}
+                    }} else {{
+                        for (const i of matches) {{
+                            if (rankOf[i] < cutoff) {{
+                                picked[count++] = i;
+                            }}
+                        }}
                     }}
 
-                    const new_x = games_to_display.map(g => g['Initial Release Date']);
-                    const new_y = games_to_display.map(g => g['User Rating']);
-                    const new_hovertext = games_to_display.map(g => g.Title);
-                    const new_plot_title_text = js_update_plot_title(games_to_display.length);
-                    
+                    const new_x = new Float64Array(count);
+                    const new_y = new Float32Array(count);
+                    const new_hovertext = new Array(count);
+                    for (let j = 0; j < count; j++) {{
+                        const i = picked[j];
+                        new_x[j] = releaseTimes[i];
+                        new_y[j] = ratings[i];
+                        new_hovertext[j] = titles[i];
+                    }}
+                    const new_plot_title_text = js_update_plot_title(count);
+
                     let current_annotation_text = original_annotation_texts[activeSliderIndex] || (original_annotation_texts.length > 0 ? original_annotation_texts[0] : "Info");
-                    
+
                     // Update the plot with filtered data
                     Plotly.restyle(graphDiv, {{
-                        x: [new_x], 
-                        y: [new_y], 
+                        x: [new_x],
+                        y: [new_y],
                         hovertext: [new_hovertext]
                     }}, [0]);
-                    
+
                     Plotly.relayout(graphDiv, {{
                         'title.text': new_plot_title_text,
                         'annotations[0].text': current_annotation_text
                     }});
                 }}
-                
+
                 // Event listeners
+                // Filter once typing pauses rather than on every keystroke
+                let searchTimer = null;
                 searchInput.addEventListener('input', function() {{
-                    updatePlotWithFilters();
+                    clearTimeout(searchTimer);
+                    searchTimer = setTimeout(updatePlotWithFilters, {SEARCH_DEBOUNCE_MS});
                 }});
                 
                 // Handle slider changes
@@ -292,8 +527,7 @@ search_and_update_js_logic = f"""
         // --- Search Bar Functionality END ---
 """
 
-new_script_tag = soup.new_tag('script')
-new_script_tag.string = f"""
+    onload_script = f"""
     window.onload = function() {{
         var sliderGroup = document.querySelector('.slider-group');
         if (sliderGroup) {{
@@ -313,16 +547,154 @@ new_script_tag.string = f"""
 
         {search_and_update_js_logic}
     }};
+"""
+    return onload_script
+
+class PageWriter:
+    """Write the page to `path` and to a precompressed copy (path.gz, path.br) per format in `compress`.
+
+    Text is buffered and handed to every output in blocks of WRITE_BLOCK
+    bytes, so the compressed copies are produced while the page is written
+    rather than by reading it back afterwards.
+    """
+
+    def __init__(self, path, compress=()):
+        self._files = [open(path, 'wb')]
+        self._brotli = None
+        if 'gz' in compress:
+            self._files.append(gzip.GzipFile(path + '.gz', 'wb', compresslevel=GZIP_LEVEL, mtime=0))
+        if 'br' in compress:
+            import brotli
+            self._brotli = (brotli.Compressor(quality=BROTLI_QUALITY), open(path + '.br', 'wb'))
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, text):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= WRITE_BLOCK:
+            self.flush()
+
+    def flush(self):
+        block = ''.join(self._buffer).encode('utf-8')
+        self._buffer, self._buffered = [], 0
+        for f in self._files:
+            f.write(block)
+        if self._brotli:
+            self._brotli[1].write(self._brotli[0].process(block))
+
+    def close(self):
+        self.flush()
+        for f in self._files:
+            f.close()
+        if self._brotli:
+            self._brotli[1].write(self._brotli[0].finish())
+            self._brotli[1].close()
+
+# The figure itself is only layout and an empty trace, so plotly renders it as a small fragment;
+# the columns are streamed into their script tag straight from the encoder.
+# "</" is escaped so that no title can close the script tag early.
+def page_chunks(figure_html, plot_columns, onload_script):
+    yield """<!doctype html>
+<html>
+<head>
+    <meta charset="utf-8" />
+    <style>html, body {height: 100%;}</style>
+    <script id="plotColumnsJson" type="application/json">"""
+    for chunk in json.JSONEncoder().iterencode(plot_columns):
+        yield chunk.replace('</', '<\\/')
+    yield f"""</script>
+</head>
+<body>
+    {search_input_html}
+    {figure_html}
+    <script>{onload_script}</script>
+</body>
+</html>
 """
 
-# Replace existing onload script if present, otherwise append
-existing_script = soup.find('script', string=lambda t: t and 'window.onload' in t and 'sliderGroup' in t)
-if existing_script:
-    existing_script.replace_with(new_script_tag)
-else:
-    soup.body.append(new_script_tag)
-
-with open(file_path, 'w', encoding='utf-8') as file:
-    file.write(str(soup))
-
-webbrowser.open(file_path)
+# --- Build ---
+def build(offline=False, compress=(), rebuild=False, serve=None, open_browser=True, file_path=PAGE_FILENAME):
+    """Build the plot page from the games in the current directory; returns the path written.
+
+    With `serve` set to a port, the games are served from memory there
+    instead (see plot_server), until interrupted, and None is returned.
+    """
+    import plotly
+
+    outputs = [file_path] + [f'{file_path}.{extension}' for extension in compress]
+    input_paths = game_files()
+    build_cache = BuildCache()
+    sources, appended = build_cache.scan(input_paths)
+    here = os.path.dirname(os.path.abspath(__file__))
+    build_params = {'scripts': {name: file_digest(os.path.join(here, name))[0] for name in PAGE_SOURCES},
+                    'plotly': plotly.__version__, 'offline': offline, 'compress': sorted(compress)}
+    if not rebuild and serve is None and build_cache.is_current(sources, build_params, outputs):
+        print(f"{file_path} is up to date with {', '.join(input_paths)}; nothing to rebuild (--rebuild forces it)")
+        if open_browser:
+            webbrowser.open(file_path)
+        return file_path
+
+    # Games prepared by other code (an edited schema.py...) are read again rather than merged into
+    same_code = build_cache.manifest.get('params') == params_key(build_params)
+    data, rows_read = load_games(build_cache, input_paths, appended if same_code and not rebuild else None)
+    rank_order, step_cutoffs, annotation_text_list, steps = slider_steps(data)
+
+    # --- Prepare the columns for JavaScript ---
+    # Numbers are embedded as base64 little-endian typed arrays that the page decodes straight into
+    # Int32Array/Float32Array buffers (see title_search.typed_array); titles as one JSON array.
+    # All are in release date order.
+    rank_of = np.empty(len(data), dtype='<i4')  # Each game's position in rank_order
+    rank_of[rank_order] = np.arange(len(data))
+
+    titles = data['Title'].astype(str).tolist()
+    release_days = data['Initial Release Date'].to_numpy('datetime64[D]').astype('int64')
+    if serve is None:
+        plot_columns = {
+            'days': typed_array(release_days, '<i4'),
+            'ratings': typed_array(data['User Rating'], '<f4'),
+            'rankOf': typed_array(rank_of, '<i4'),
+            'titles': titles,
+            'cutoffs': step_cutoffs,
+            'search': build_search_index(titles),
+        }
+    else:
+        # The served page asks plot_server for each view instead
+        plot_columns = {'serve': True, 'cutoffs': step_cutoffs}
+
+    scatter = make_figure(data, rank_order, step_cutoffs, annotation_text_list, steps)
+    figure_html = scatter.to_html(full_html=False, include_plotlyjs=True if offline else 'cdn', div_id=PLOT_DIV_ID)
+    chunks = page_chunks(figure_html, plot_columns, page_script(annotation_text_list))
+    if serve is not None:
+        from plot_server import PlotData, serve as serve_plot
+        plot_data = PlotData(release_days, data['User Rating'].to_numpy(), rank_of, titles, step_cutoffs)
+        serve_plot(plot_data, ''.join(chunks).encode('utf-8'), serve, on_ready=webbrowser.open if open_browser else None)
+        return None
+
+    page = PageWriter(file_path, compress)
+    for chunk in chunks:
+        page.write(chunk)
+    page.close()
+    build_cache.save(sources, build_params, outputs, data, rows_read)
+
+    if open_browser:
+        webbrowser.open(file_path)
+    return file_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plot games.csv (or games_dataset/) as an interactive HTML page.")
+    parser.add_argument('--offline', action='store_true',
+                        help="inline plotly.js (~4.8 MB) so the page works without the CDN")
+    parser.add_argument('--compress', nargs='+', choices=['gz', 'br'], default=[],
+                        help="also write precompressed copies of the page for static hosting")
+    parser.add_argument('--no-open', action='store_true', help="don't open the page in a browser")
+    parser.add_argument('--rebuild', action='store_true', help="ignore the build cache and rebuild from scratch")
+    parser.add_argument('--serve', type=int, nargs='?', const=SERVE_PORT, metavar='PORT',
+                        help=f"instead of writing a page with every game in it, serve the plot from memory on PORT "
+                             f"(default: {SERVE_PORT}), sending the browser only what the current view needs")
+    args = parser.parse_args(argv)
+    build(offline=args.offline, compress=args.compress, rebuild=args.rebuild, serve=args.serve,
+          open_browser=not args.no_open)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Local server for the plot page, holding the games in memory instead of embedding them (plot.py --serve).
+
+Routes:
+    /                                       the plot page, with no games in it
+    /query?x0=&x1=&y0=&y1=&step=&q=         the games in a viewport: x0/x1 in ms since the epoch,
+                                            y0/y1 ratings, step the slider step, q the search text
+
+A viewport holding up to POINT_LIMIT of the games that pass the slider and
+the search gets them as points. A bigger one gets a BINS_X x BINS_Y grid of
+counts over the viewport, one marker per non-empty cell. Zooming in therefore
+ends up at individual games however big the catalogue is. All filtering is
+numpy masks over the in-memory columns.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from title_search import TitleSearch, typed_array
+
+POINT_LIMIT = 20000  # Viewports with more games than this are answered with density bins
+BINS_X = 240         # Bins across the viewport's date range
+BINS_Y = 80          # Bins across its rating range
+MS_PER_DAY = 86400000
+
+
+class PlotData:
+    """The plot's columns, in release date order as plot.py prepares them, and the queries over them."""
+
+    def __init__(self, days, ratings, rank_of, titles, step_cutoffs):
+        self.days = np.asarray(days, dtype=np.int32)
+        self.ratings = np.asarray(ratings, dtype=np.float32)
+        self.rank_of = np.asarray(rank_of, dtype=np.int32)
+        self.titles = titles
+        self.step_cutoffs = step_cutoffs
+        self.search = TitleSearch(titles)
+        self._last_search = (None, None)  # (query, matches): typing and panning repeat the same query
+
+    def matches(self, query):
+        last_query, matches = self._last_search
+        if query != last_query:
+            matches = self.search.match(query)
+            self._last_search = (query, matches)
+        return matches
+
+    def query(self, x0, x1, y0, y1, step=0, text=''):
+        """Answer one viewport query; returns the JSON-ready response dict.
+
+        'total' counts every game passing the slider and the search, and
+        'shown' the ones of those inside the viewport. 'mode' says whether
+        they come as 'points' (days, ratings, titles) or as 'bins' (x in ms,
+        y, counts).
+        """
+        cutoff = self.step_cutoffs[min(max(step, 0), len(self.step_cutoffs) - 1)] if self.step_cutoffs else len(self.days)
+        matches = self.matches(text.strip()) if text.strip() else None
+        if matches is None:
+            passing = self.rank_of < cutoff
+            total = int(np.count_nonzero(passing))
+            in_view = passing & (self.days >= x0 / MS_PER_DAY) & (self.days <= x1 / MS_PER_DAY)
+            in_view &= (self.ratings >= y0) & (self.ratings <= y1)
+            shown = np.flatnonzero(in_view)
+        else:
+            matches = matches[self.rank_of[matches] < cutoff]
+            total = len(matches)
+            days, ratings = self.days[matches], self.ratings[matches]
+            shown = matches[(days >= x0 / MS_PER_DAY) & (days <= x1 / MS_PER_DAY) & (ratings >= y0) & (ratings <= y1)]
+
+        if len(shown) <= POINT_LIMIT:
+            return {'mode': 'points', 'total': total, 'shown': len(shown),
+                    'days': typed_array(self.days[shown], '<i4'), 'ratings': typed_array(self.ratings[shown], '<f4'),
+                    'titles': [self.titles[i] for i in shown]}
+
+        x = self.days[shown].astype(np.float64) * MS_PER_DAY
+        bin_x = np.clip(((x - x0) / max(x1 - x0, 1) * BINS_X).astype(np.int64), 0, BINS_X - 1)
+        bin_y = np.clip(((self.ratings[shown] - y0) / max(y1 - y0, 1e-9) * BINS_Y).astype(np.int64), 0, BINS_Y - 1)
+        counts = np.bincount(bin_x * BINS_Y + bin_y, minlength=BINS_X * BINS_Y)
+        cells = np.flatnonzero(counts)
+        return {'mode': 'bins', 'total': total, 'shown': len(shown),
+                'x': typed_array(x0 + (cells // BINS_Y + 0.5) * (x1 - x0) / BINS_X, '<f8'),
+                'y': typed_array(y0 + (cells % BINS_Y + 0.5) * (y1 - y0) / BINS_Y, '<f4'),
+                'counts': typed_array(counts[cells], '<i4')}
+
+
+class PlotHandler(BaseHTTPRequestHandler):
+    plot_data = None
+    page = b''
+
+    def log_message(self, *args):
+        pass
+
+    def route(self):
+        """Return (status, content type, body) for the current request."""
+        url = urlsplit(self.path)
+        if url.path == '/':
+            return 200, 'text/html; charset=utf-8', self.page
+        if url.path == '/query':
+            query = parse_qs(url.query)
+            try:
+                x0, x1, y0, y1 = (float(query[key][0]) for key in ('x0', 'x1', 'y0', 'y1'))
+                step = int(query.get('step', ['0'])[0])
+            except (KeyError, ValueError):
+                return 400, 'text/plain', b'x0, x1, y0 and y1 must be numbers'
+            response = self.plot_data.query(x0, x1, y0, y1, step, query.get('q', [''])[0])
+            return 200, 'application/json', json.dumps(response).encode('utf-8')
+        return 404, 'text/plain', b'Not Found'
+
+    def do_GET(self):
+        status, content_type, body = self.route()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(plot_data, page, port=0):
+    """Create (but don't start) a plot server on 127.0.0.1; port 0 picks a free port. `page` is the HTML, as bytes."""
+    handler = type('ConfiguredPlotHandler', (PlotHandler,), {'plot_data': plot_data, 'page': page})
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+
+def serve(plot_data, page, port=0, on_ready=None):
+    """Serve until interrupted; `on_ready(url)` is called once the server is listening."""
+    server = make_server(plot_data, page, port)
+    url = f'http://127.0.0.1:{server.server_address[1]}/'
+    print(f"Serving the plot at {url} (Ctrl+C to stop)")
+    if on_ready:
+        threading.Thread(target=on_ready, args=(url,), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,96 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class RateLimiter:
+    """Token bucket shared by every fetch thread, with AIMD throttling.
+
+    Tokens refill at `rate` per second up to `burst`, and each request takes
+    one. At most `max_in_flight` requests may be outstanding at once, whatever
+    the bucket holds.
+
+    Both limits adapt to the server. `on_throttle` (a 429/5xx, a timeout)
+    halves the rate and the in-flight limit, at most once per `cooldown`
+    seconds, and honours a Retry-After by pausing every request. Each
+    `on_success` adds `1/limit` to the in-flight limit and a proportional step
+    to the rate, so both climb back to their ceilings over a few round trips.
+    """
+
+    def __init__(self, rate, max_in_flight, burst=1, min_rate=0.2, cooldown=1.0):
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = self.max_rate
+        self.max_in_flight = max_in_flight
+        self.in_flight_limit = float(max_in_flight)
+        self.burst = max(1.0, float(burst))
+        self.cooldown = cooldown
+        self.throttles = 0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = float('-inf')
+        self._active = 0
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+
+    def _take_token(self):
+        """Take one token, returning 0, or return how long to wait for the next one."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until an in-flight slot and a token are both available."""
+        with self._slot_freed:
+            while self._active >= int(self.in_flight_limit):
+                self._slot_freed.wait()
+            self._active += 1
+        while True:
+            wait = self._take_token()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def release(self):
+        with self._slot_freed:
+            self._active -= 1
+            self._slot_freed.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold a request slot for the duration of the `with` block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self):
+        """Additive increase after a request the server handled normally."""
+        with self._slot_freed:
+            grew = int(self.in_flight_limit + 1 / self.in_flight_limit) > int(self.in_flight_limit)
+            self.in_flight_limit = min(self.max_in_flight, self.in_flight_limit + 1 / self.in_flight_limit)
+            self.rate = min(self.max_rate, self.rate + self.max_rate / (10 * self.max_in_flight))
+            if grew:
+                self._slot_freed.notify()
+
+    def on_throttle(self, retry_after=None):
+        """Multiplicative decrease after a 429/5xx or a timeout; `retry_after` (seconds) pauses all requests."""
+        with self._lock:
+            now = time.monotonic()
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            if now - self._last_decrease < self.cooldown:
+                return  # A burst of failures from the same overload only halves the limits once
+            self._last_decrease = now
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.in_flight_limit = max(1.0, self.in_flight_limit / 2)
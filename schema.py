@@ -0,0 +1,134 @@
+"""The games table's columns and release date formats, shared by scrap.py, store.py and plot.py.
+
+Release dates are stored as MM/DD/YYYY. Scraped dates go through
+`format_date`, which is memoized because a crawl sees the same few thousand
+date strings over and over. Whole CSVs go through `canonical_dates` or
+`read_csv`, which parse a column at a time: strings already in MM/DD/YYYY
+are decoded with numpy, and only the rest are tried against each of
+DATE_FORMATS in turn, one vectorized pass per format.
+"""
+import functools
+from datetime import datetime
+
+import numpy as np
+
+import telemetry
+
+CSV_HEADER = ['Title', 'Initial Release Date', 'User Rating', 'Number of Ratings']
+TITLE, RELEASE_DATE, USER_RATING, NUM_RATINGS = CSV_HEADER
+DATE_FORMAT = "%m/%d/%Y"
+DATE_FORMATS = [
+    "%m/%d/%Y",       # 3/7/2025 or 03/07/2025
+    "%b %d, %Y",      # Mar 7, 2025
+    "%B %d, %Y",      # March 7, 2025
+    "%m-%d-%Y",       # 3-7-2025 or 03-07-2025
+    "%Y-%m-%d",       # 2025-03-07
+]
+CANONICAL_DATE = r'\d{2}/\d{2}/\d{4}'
+DATE_CACHE_SIZE = 65536  # Distinct raw date strings remembered by format_date
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def format_date(date_str):
+    """Converts various date formats to 'MM/DD/YYYY'."""
+    if not date_str or date_str == "N/A":
+        return "N/A"
+
+    date_str = date_str.strip()
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime(DATE_FORMAT)  # Always zero-padded
+        except ValueError:
+            continue
+
+    telemetry.log(f"Warning: Could not parse date '{date_str}'", warning=True)
+    return date_str
+
+
+def normalize_date(date_str):
+    """Normalize date to MM/DD/YYYY format for consistent comparison."""
+    if not date_str or date_str == "N/A":
+        return "N/A"
+
+    # If it's already in M/D/YYYY format, convert to MM/DD/YYYY
+    try:
+        parts = date_str.split('/')
+        if len(parts) == 3:
+            month, day, year = parts
+            return f"{int(month):02d}/{int(day):02d}/{year}"
+    except (ValueError, IndexError):
+        pass
+
+    return date_str
+
+
+def _parse_canonical(values):
+    """Decode MM/DD/YYYY strings with numpy; returns datetime64[D] values, NaT where the date doesn't exist."""
+    digits = values.to_numpy().astype('U10').view(np.uint32).reshape(-1, 10).astype(np.int64) - ord('0')
+    month = digits[:, 0] * 10 + digits[:, 1]
+    day = digits[:, 3] * 10 + digits[:, 4]
+    year = digits[:, 6] * 1000 + digits[:, 7] * 100 + digits[:, 8] * 10 + digits[:, 9]
+    months = (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month - 1).astype('timedelta64[M]')
+    days = months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    # 02/30 would roll over into March: a real date stays in its month
+    valid = (month >= 1) & (month <= 12) & (day >= 1) & (days.astype('datetime64[M]') == months)
+    return np.where(valid, days, np.datetime64('NaT'))
+
+
+def parse_dates(values):
+    """Parse a Series of release date strings into datetimes; unparseable ones ("TBA", "N/A"...) become NaT."""
+    import pandas as pd
+    values = values.fillna('').astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[s]')
+    canonical = values.str.fullmatch(CANONICAL_DATE).to_numpy(dtype=bool)
+    if canonical.any():
+        parsed[canonical] = _parse_canonical(values[canonical])
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna().to_numpy() & ~canonical & (values != '').to_numpy()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors='coerce')
+    return parsed
+
+
+def canonical_dates(values):
+    """Rewrite a Series of release date strings as MM/DD/YYYY where they parse; the rest are only stripped."""
+    values = values.fillna('').astype(str).str.strip()
+    legacy = ~values.str.fullmatch(CANONICAL_DATE).to_numpy(dtype=bool) & (values != '').to_numpy()
+    if legacy.any():
+        parsed = parse_dates(values[legacy])
+        values = values.copy()
+        values[legacy] = parsed.dt.strftime(DATE_FORMAT).where(parsed.notna(), values[legacy])
+    return values
+
+
+def read_raw_csv(path, skip_bytes=0, typed=False):
+    """Read a games CSV as strings, blanks and "N/A" kept as they are; `skip_bytes` starts past the header, on a row.
+
+    With `typed`, only titles and dates are kept as strings: the ratings are
+    left to the CSV parser, and blanks and "N/A" come back as NaN.
+    """
+    import pandas as pd
+    if typed:
+        options = {'dtype': {TITLE: str, RELEASE_DATE: str}}
+    else:
+        options = {'dtype': str, 'keep_default_na': False}
+    if not skip_bytes:
+        return pd.read_csv(path, **options)
+    with open(path, 'rb') as f:
+        f.seek(skip_bytes)
+        return pd.read_csv(f, header=None, names=CSV_HEADER, **options)
+
+
+def read_csv(path, skip_bytes=0):
+    """Read a games CSV into typed columns: datetime dates (NaT if unparseable), float ratings, Int32 rating counts."""
+    import pandas as pd
+    frame = read_raw_csv(path, skip_bytes, typed=True)
+    frame[RELEASE_DATE] = parse_dates(frame[RELEASE_DATE])
+    for column in (USER_RATING, NUM_RATINGS):
+        if not pd.api.types.is_numeric_dtype(frame[column]):  # Stray text such as "tbd"
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    frame[USER_RATING] = frame[USER_RATING].astype('float64')
+    frame[NUM_RATINGS] = frame[NUM_RATINGS].astype('Int32')
+    return frame
@@ -1,64 +1,69 @@
+import argparse
+import json
 import requests
-from bs4 import BeautifulSoup
-import csv
-import time
 from datetime import datetime
 import re
 import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from archive import PageArchive, read_record
+from extract import DEFAULT_BACKEND, available_backends, get_backend
+from fetcher import Fetcher, ResponseCache
+from ratelimit import RateLimiter
+from schema import DATE_FORMAT, format_date
+from store import GameStore
+import changelog
+import dataset
+import telemetry
 
 # --- Configuration ---
-BASE_URL = "https://www.metacritic.com"
-BROWSE_URL_TEMPLATE = "https://www.metacritic.com/browse/game/all/all/all-time/new/?releaseYearMin=1958&releaseYearMax=2025&page={}"
+# Both hosts can be pointed at a local stand-in server through the environment
+BASE_URL = os.environ.get('METACRITIC_BASE_URL', "https://www.metacritic.com")
+API_URL = os.environ.get('METACRITIC_API_URL', "https://backend.metacritic.com")
+API_KEY = os.environ.get('METACRITIC_API_KEY', "")  # The public key the site's own JSON requests send
+FIRST_YEAR, LAST_YEAR = 1958, 2025
+BROWSE_URL_RANGE_TEMPLATE = BASE_URL + "/browse/game/all/all/all-time/new/?releaseYearMin={year_min}&releaseYearMax={year_max}&page={{}}"
+BROWSE_URL_TEMPLATE = BROWSE_URL_RANGE_TEMPLATE.format(year_min=FIRST_YEAR, year_max=LAST_YEAR)
+# --source json: paginated finder listing, plus a per-game user score summary for games the listing lacks scores for
+JSON_PAGE_SIZE = 50
+JSON_LISTING_URL_RANGE_TEMPLATE = (API_URL + "/finder/metacritic/web?sortBy=-releaseDate&productType=games"
+                                   "&releaseYearMin={year_min}&releaseYearMax={year_max}"
+                                   "&offset={{offset}}&limit={{limit}}&apiKey={{api_key}}")
+JSON_LISTING_URL_TEMPLATE = JSON_LISTING_URL_RANGE_TEMPLATE.format(year_min=FIRST_YEAR, year_max=LAST_YEAR)
+JSON_USER_STATS_URL_TEMPLATE = API_URL + "/reviews/metacritic/user/games/{slug}/stats/web?apiKey={api_key}"
 CSV_FILENAME = "games.csv"
+DB_FILENAME = "games.sqlite"     # Source of truth; games.csv is exported from it after each run
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
-REQUEST_DELAY = 1
+REQUESTS_PER_SECOND = 2    # Sustained request rate shared by browse and detail fetches
+MAX_IN_FLIGHT = 8          # Maximum number of detail pages being fetched at once
 START_PAGE = 1
+INCREMENTAL_STOP_PAGES = 3  # --incremental stops after this many consecutive pages of known games
+REFRESH_BUDGET = 500        # Detail pages re-fetched by a --refresh run
+REFRESH_BATCH = 50          # Refreshed rows are committed in batches of this size
+# Failed fetches: browse pages are retried in place, then queued like failed games in the store's retry queue
+BROWSE_ATTEMPTS = 4         # Tries per browse page before it is queued and the crawl moves on
+BROWSE_FAILURE_LIMIT = 3    # Consecutive queued browse pages that stop the crawl
+RETRY_BASE_DELAY = 5        # Seconds before the first retry; doubles with every failure...
+RETRY_MAX_DELAY = 3600      # ...up to this
+RETRY_MAX_ATTEMPTS = 8      # Queued fetches are given up on (but kept in the queue) after this many failures
+RETRY_MAX_WAIT = 120        # How long a run waits for queued fetches that are still backing off
+RETRY_BATCH = 50
+PAGE_KIND = {'html': 'browse', 'json': 'listing'}   # Retry queue kinds for each source
+GAME_KIND = {'html': 'detail', 'json': 'api'}
+CACHE_FILENAME = "http_cache.sqlite"      # Parsed pages plus their ETag/Last-Modified validators
+CACHE_MAX_BYTES = 256 * 1024 * 1024       # Least recently used entries are evicted past this size
+METRICS_FILENAME = "scrape_metrics.json"  # Per-stage timers and counters of the last run
+PROMETHEUS_FILENAME = "scrape_metrics.prom"  # The same, in the Prometheus text format
+ARCHIVE_DIR = "page_archive"    # --archive: compressed raw pages, for re-extracting without re-crawling
+REEXTRACT_CHUNK = 200           # Archived pages handed to a --reextract worker process at a time
+STATS_SLUG_RE = re.compile(r'/user/games/([^/]+)/stats')
 
 # --- Helper Functions ---
-def format_date(date_str):
-    """Converts various date formats to 'MM/DD/YYYY'."""
-    if not date_str or date_str == "N/A":
-        return "N/A"
-    
-    date_str = date_str.strip()
-    
-    # Try multiple date formats
-    formats_to_try = [
-        "%b %d, %Y",      # Mar 7, 2025
-        "%B %d, %Y",      # March 7, 2025
-        "%m/%d/%Y",       # 3/7/2025 or 03/07/2025
-        "%m-%d-%Y",       # 3-7-2025 or 03-07-2025
-        "%Y-%m-%d",       # 2025-03-07
-    ]
-    
-    for fmt in formats_to_try:
-        try:
-            dt_obj = datetime.strptime(date_str, fmt)
-            return dt_obj.strftime("%m/%d/%Y")  # Always return zero-padded format
-        except ValueError:
-            continue
-    
-    print(f"Warning: Could not parse date '{date_str}'")
-    return date_str
-
-def normalize_date(date_str):
-    """Normalize date to MM/DD/YYYY format for consistent comparison."""
-    if not date_str or date_str == "N/A":
-        return "N/A"
-    
-    # If it's already in M/D/YYYY format, convert to MM/DD/YYYY
-    try:
-        parts = date_str.split('/')
-        if len(parts) == 3:
-            month, day, year = parts
-            return f"{int(month):02d}/{int(day):02d}/{year}"
-    except (ValueError, IndexError):
-        pass
-    
-    return date_str
-
 def extract_number_from_string(text):
     """Extracts the first number found in a string, handling commas (e.g., '1,014')."""
     if not text or text == "N/A":
@@ -67,216 +72,709 @@ def extract_number_from_string(text):
     match = re.search(r'\d+', text)
     return match.group(0) if match else "0"
 
-def load_existing_games(csv_filename):
-    """Load existing games from CSV file and return as a set of (title, date) tuples."""
-    existing_games = set()
-    if os.path.exists(csv_filename):
-        try:
-            with open(csv_filename, 'r', newline='', encoding='utf-8') as csvfile:
-                reader = csv.reader(csvfile)
-                next(reader, None)  # Skip header row
-                for row in reader:
-                    if len(row) >= 2:  # Make sure we have at least title and date
-                        title = row[0].strip()
-                        date = normalize_date(row[1].strip())  # Normalize when loading
-                        existing_games.add((title, date))
-            print(f"Loaded {len(existing_games)} existing games from {csv_filename}")
-        except Exception as e:
-            print(f"Error reading existing CSV file: {e}")
-            print("Starting with empty game list.")
-    else:
-        print(f"CSV file {csv_filename} not found. Starting fresh.")
-    return existing_games
-
-def is_game_exists(title, date, existing_games):
-    """Check if a game with the same title and date already exists."""
-    normalized_date = normalize_date(date)
-    
-    # Check against normalized versions of existing dates
-    for existing_title, existing_date in existing_games:
-        if (title == existing_title and 
-            normalized_date == normalize_date(existing_date)):
-            return True
-    return False
-
-def append_to_csv(csv_filename, new_games):
-    """Append new games to the CSV file."""
-    file_exists = os.path.exists(csv_filename)
-    
-    with open(csv_filename, 'a', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        
-        # Write header if file doesn't exist
-        if not file_exists:
-            writer.writerow(['Title', 'Initial Release Date', 'User Rating', 'Number of Ratings'])
-        
-        # Write new games
-        writer.writerows(new_games)
-
-def scrape_game_details(card, index, total_cards, existing_games, page_number):
-    """Scrape details for a single game card."""
-    game_title = "N/A"
-    release_date_formatted = "N/A"
-    user_score = "N/A"
-    num_user_ratings = "0"
+def parse_browse_page(html, extractor):
+    """Parse a browse page into a list of (title, formatted date, detail URL) tuples."""
+    return [(game_title, format_date(date_text), BASE_URL + href if href else None)
+            for game_title, date_text, href in extractor.cards(html)]
 
-    # Extract game title
-    title_div = card.find('div', class_='c-finderProductCard_title')
-    if title_div and 'data-title' in title_div.attrs:
-        game_title = title_div['data-title'].strip()
-    else:
-        title_h3 = card.find('h3', class_='c-finderProductCard_titleHeading')
-        if title_h3 and title_h3.span:
-            game_title = title_h3.span.get_text(strip=True)
-
-    # Extract release date
-    meta_div = card.find('div', class_='c-finderProductCard_meta')
-    if meta_div:
-        date_span = meta_div.find('span', class_='u-text-uppercase')
-        if date_span:
-            release_date_formatted = format_date(date_span.get_text(strip=True))
-
-    # Check if game already exists
-    if is_game_exists(game_title, release_date_formatted, existing_games):
-        print(f"Skipping ({index+1}/{total_cards}) [Page {page_number}]: {game_title} ({release_date_formatted}) - Already exists")
-        return None
+def clean_scores(user_score, num_user_ratings):
+    """Turn the scraped score and ratings-count strings into CSV values (a float, an int, or "")."""
+    user_score_clean = "" if user_score.lower() in ["tbd", "n/a"] else user_score
+    num_user_ratings_clean = "" if num_user_ratings in ["0", "N/A"] else num_user_ratings
 
-    # Extract detail page URL
-    link_tag = card.find('a', class_='c-finderProductCard_container')
-    if not link_tag or 'href' not in link_tag.attrs:
-        print(f"Warning: Could not find detail page link for a game (card index {index}). Skipping.")
-        return [game_title, release_date_formatted, user_score, num_user_ratings]
+    # Try to cast them appropriately
+    try:
+        user_score_clean = float(user_score_clean) if user_score_clean else ""
+    except ValueError:
+        user_score_clean = ""
+
+    try:
+        num_user_ratings_clean = int(num_user_ratings_clean) if num_user_ratings_clean else ""
+    except ValueError:
+        num_user_ratings_clean = ""
 
-    detail_page_path = link_tag['href']
-    detail_page_url = BASE_URL + detail_page_path
+    return [user_score_clean, num_user_ratings_clean]
 
-    print(f"\nProcessing ({index+1}/{total_cards}) [Page {page_number}]: {game_title}")
-    print(f"  Detail URL: {detail_page_url}")
-    print(f"  Initial Release Date: {release_date_formatted}")
+def summary_scores(summary):
+    """CSV values for an API user score summary ({'score': ..., 'reviewCount': ...})."""
+    score = summary.get('score')
+    if score is None or str(score).lower() == 'tbd':
+        return clean_scores('tbd', '0')
+    return clean_scores(str(score), str(summary.get('reviewCount') or 0))
 
-    try:
-        time.sleep(REQUEST_DELAY)
-        detail_response = requests.get(detail_page_url, headers=HEADERS, timeout=20)
-        if detail_response.status_code == 404:
-            print(f"  Warning: Game detail page not found (404): {detail_page_url}")
-            return [game_title, "N/A (Page 404)", "N/A", "0"]
-        detail_response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"  Error fetching detail page for {game_title}: {e}")
-        return [game_title, "N/A (Fetch Error)", "N/A", "0"]
+def parse_listing_page(text):
+    """Parse a finder JSON listing page into (title, formatted date, detail URL, scores) tuples.
 
-    detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
+    `scores` holds the CSV user rating and ratings count when the listing
+    item carries a user score summary, and is None when it doesn't.
+    """
+    items = (json.loads(text).get('data') or {}).get('items') or []
+    cards = []
+    for item in items:
+        slug = item.get('slug')
+        summary = item.get('userScoreSummary')
+        cards.append(((item.get('title') or "N/A").strip(),
+                      format_date(item.get('releaseDate')),
+                      f"{BASE_URL}/game/{slug}/" if slug else None,
+                      summary_scores(summary) if isinstance(summary, dict) else None))
+    return cards
 
-    # Extract User Score
-    user_score_div = detail_soup.find('div', class_=lambda x: x and 'c-siteReviewScore_user' in x.split())
-    if user_score_div:
-        score_span = user_score_div.find('span')
-        if score_span:
-            user_score = score_span.get_text(strip=True)
-            print(f"  User Score: {user_score}")
+def parse_user_stats(text):
+    """Pull the user score summary out of a per-game stats response, or None if it has none."""
+    item = (json.loads(text).get('data') or {}).get('item')
+    return item if isinstance(item, dict) and 'score' in item else None
+
+def detail_scores(fields, game_title):
+    """Work out a detail page's user score and ratings count from its extracted fields.
+
+    Returns (user score, number of user ratings, log lines), the raw strings
+    that `clean_scores` turns into CSV values.
+    """
+    log = []
+    num_user_ratings = "0"
+    user_score = fields['user_score']
+    if user_score != "N/A":
+        log.append(f"  User Score: {user_score}")
 
     # Extract Number of User Ratings
+    text_content = fields['reviews_text']
     if user_score.lower() == 'tbd':
         num_user_ratings = '0'
-        print(f"  Number of User Ratings: {num_user_ratings} (score was tbd)")
-    else:
-        user_score_container = detail_soup.find('div', attrs={"data-testid": "user-score-info"})
-        reviews_total_span = None
-        if user_score_container:
-            reviews_total_span = user_score_container.find('span', class_='c-productScoreInfo_reviewsTotal')
-        if reviews_total_span:
-            text_content = reviews_total_span.get_text(strip=True)
-            if "based on" in text_content.lower():
-                num_user_ratings = extract_number_from_string(text_content)
-            elif text_content.lower() == 'tbd' or "no user score" in text_content.lower():
-                num_user_ratings = '0'
-            else:
-                potential_num = extract_number_from_string(text_content)
-                num_user_ratings = potential_num if potential_num != "0" else '0'
-            print(f"  Number of User Ratings: {num_user_ratings} (From text: '{text_content}')")
+        log.append(f"  Number of User Ratings: {num_user_ratings} (score was tbd)")
+    elif text_content is not None:
+        if "based on" in text_content.lower():
+            num_user_ratings = extract_number_from_string(text_content)
+        elif text_content.lower() == 'tbd' or "no user score" in text_content.lower():
+            num_user_ratings = '0'
         else:
-            print(f"  Warning: Could not find number of user ratings for {game_title}")
+            potential_num = extract_number_from_string(text_content)
+            num_user_ratings = potential_num if potential_num != "0" else '0'
+        log.append(f"  Number of User Ratings: {num_user_ratings} (From text: '{text_content}')")
+    else:
+        log.append(f"  Warning: Could not find number of user ratings for {game_title}")
 
-    # Normalize score and ratings
-    user_score_clean = "" if user_score.lower() in ["tbd", "n/a"] else user_score
-    num_user_ratings_clean = "" if num_user_ratings in ["0", "N/A"] else num_user_ratings
+    return user_score, num_user_ratings, log
+
+def scrape_game_details(game_title, release_date_formatted, detail_page_url, fetcher, extractor, progress=""):
+    """Fetch a game's detail page and return its store row (the CSV columns plus the detail URL).
+
+    Returns None if the page is gone (404). Any other failure raises the
+    `requests` exception, so the caller can queue the game for a retry.
+
+    Runs on a worker thread, so the log lines for a game are collected and
+    printed in one go to keep them from interleaving with other games.
+    """
+    log = [f"\nProcessing {progress}: {game_title}",
+           f"  Detail URL: {detail_page_url}",
+           f"  Initial Release Date: {release_date_formatted}"]
 
-    # Try to cast them appropriately
     try:
-        user_score_clean = float(user_score_clean) if user_score_clean else ""
-    except ValueError:
-        user_score_clean = ""
+        status, fields = fetcher.get(detail_page_url, extractor.detail)
+        if status == 404:
+            log.append(f"  Warning: Game detail page not found (404): {detail_page_url}")
+            telemetry.log_block(log, warning=True)
+            return None
+    except requests.exceptions.RequestException as e:
+        log.append(f"  Error fetching detail page for {game_title}: {e}")
+        telemetry.log_block(log, warning=True)
+        raise
 
+    user_score, num_user_ratings, notes = detail_scores(fields, game_title)
+    log.extend(notes)
+    telemetry.log_block(log)
+    return [game_title, release_date_formatted, *clean_scores(user_score, num_user_ratings), detail_page_url]
+
+def scrape_game_from_api(game_title, release_date_formatted, detail_page_url, fetcher, extractor, progress=""):
+    """JSON mode: read a game's user score summary from the API, falling back to its HTML detail page."""
+    slug = detail_page_url.rstrip('/').rsplit('/', 1)[-1]
+    stats_url = JSON_USER_STATS_URL_TEMPLATE.format(slug=slug, api_key=API_KEY)
     try:
-        num_user_ratings_clean = int(num_user_ratings_clean) if num_user_ratings_clean else ""
-    except ValueError:
-        num_user_ratings_clean = ""
+        status, summary = fetcher.get(stats_url, parse_user_stats, stage='stats')
+    except requests.exceptions.RequestException:
+        status, summary = None, None
+    if status != 200 or summary is None:
+        return scrape_game_details(game_title, release_date_formatted, detail_page_url, fetcher, extractor, progress)
 
-    return [game_title, release_date_formatted, user_score_clean, num_user_ratings_clean]
+    scores = summary_scores(summary)
+    telemetry.log(f"\nProcessing {progress}: {game_title}\n  User score summary: {scores[0] or 'tbd'} "
+                  f"({scores[1] or 0} ratings) from {stats_url}")
+    return [game_title, release_date_formatted, *scores, detail_page_url]
 
-# --- Main Scraping Logic ---
-# Load existing games
-existing_games = load_existing_games(CSV_FILENAME)
-total_new_games = 0
-total_skipped = 0
-current_page = START_PAGE
-
-# Loop through pages until no more games are found
-while True:
-    browse_url = BROWSE_URL_TEMPLATE.format(current_page)
-    print(f"\n{'='*60}")
-    print(f"Fetching page {current_page}: {browse_url}")
-    
+def date_sort_key(date_str):
+    """Turn an 'MM/DD/YYYY' date into a sortable 'YYYY-MM-DD' string, or None if it isn't one."""
     try:
-        browse_response = requests.get(browse_url, headers=HEADERS, timeout=20)
-        browse_response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching browse page: {e}")
-        break
-
-    browse_soup = BeautifulSoup(browse_response.text, 'html.parser')
-    game_cards = browse_soup.find_all('div', class_='c-finderProductCard-game')
-
-    if not game_cards:
-        print(f"No game cards found on page {current_page}. Reached the end of available pages.")
-        break
-    
-    print(f"Found {len(game_cards)} game cards on page {current_page}.")
-    
-    page_new_games = []
+        return datetime.strptime(date_str, DATE_FORMAT).strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+# --- Main Scraping Logic ---
+def source_functions(source, extractor):
+    """Return (parse a listing page, fetch one game's scores) for the 'html' or 'json' source."""
+    if source == 'json':
+        return parse_listing_page, scrape_game_from_api
+    return partial(parse_browse_page, extractor=extractor), scrape_game_details
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter: seconds to wait after the `attempts`-th failure of a fetch."""
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+
+def fetch_listing_page(fetcher, url, parse_page):
+    """Fetch a browse/listing page, retrying transient errors with backoff; returns (status, cards).
+
+    Raises the last `requests` error once BROWSE_ATTEMPTS tries have failed.
+    """
+    for attempt in range(1, BROWSE_ATTEMPTS + 1):
+        try:
+            return fetcher.get(url, parse_page, stage='browse')
+        except requests.exceptions.RequestException as e:
+            if attempt == BROWSE_ATTEMPTS:
+                raise
+            delay = retry_delay(attempt)
+            telemetry.log(f"Error fetching browse page (attempt {attempt}/{BROWSE_ATTEMPTS}): {e}. "
+                          f"Retrying in {delay:.0f} s", warning=True)
+            fetcher.metrics.count('retries')
+            with fetcher.metrics.time('backoff'):
+                time.sleep(delay)
+
+
+def completed_rows(page_results, retries, page, source='html'):
+    """Yield a page's rows in card order, waiting on each detail fetch as its turn comes.
+
+    Each entry of `page_results` is cleared as it's consumed, so a future, its
+    card and its parsed fields are dropped once the row is out; the documents
+    themselves never outlive `Fetcher.get`, which hands back only the fields.
+    Failed fetches go to `retries` with their error as text, so the response a
+    `RequestException` carries is released too.
+    """
+    for position, result in enumerate(page_results):
+        page_results[position] = None
+        if isinstance(result, tuple):
+            future, (game_title, release_date_formatted, detail_page_url, _) = result
+            try:
+                result = future.result()
+            except requests.exceptions.RequestException as e:
+                retries.append((GAME_KIND[source], detail_page_url, game_title, release_date_formatted, page, str(e)))
+                continue
+            if result is None:  # The detail page is gone; keep the game from the listing without scores
+                result = [game_title, release_date_formatted, *clean_scores("N/A", "0"), detail_page_url]
+        yield result
+
+
+def crawl_page(store, fetcher, executor, extractor, page, game_cards, source='html', journal=True):
+    """Store one listing page's new games: dedup the cards, fetch their details and commit the page.
+
+    Games whose fetch fails go to the retry queue instead of being written.
+    Returns {'rows': rows written, 'skipped': known games, 'retries': fetches
+    queued, 'dates': [(YYYY-MM-DD release date, title), ...] of the cards}.
+    """
+    metrics = fetcher.metrics
+    _, scrape_game = source_functions(source, extractor)
+    page_results = []  # Rows and (future, card) pairs, kept in card order
+    pending = []       # (position in page_results, card) for cards whose detail pages need fetching
     page_skipped = 0
-    
-    # Process each game card on the current page
+    page_dates = []
+    known_urls = []    # (title, date, detail URL) of known games, to backfill missing URLs
+    dedup_seconds = 0.0
+
+    # Dedup every card up front, collecting the ones whose details need fetching
     for index, card in enumerate(game_cards):
-        game_data = scrape_game_details(card, index, len(game_cards), existing_games, current_page)
-        
-        if game_data is None:
+        game_title, release_date_formatted, detail_page_url = card[:3]
+        listing_scores = card[3] if len(card) > 3 else None
+        progress = f"({index+1}/{len(game_cards)}) [Page {page}]"
+        sort_key = date_sort_key(release_date_formatted)
+        if sort_key:
+            page_dates.append((sort_key, game_title))
+
+        dedup_start = time.perf_counter()
+        known = store.contains(game_title, release_date_formatted)
+        if not known:
+            # Reserve the key to avoid duplicates within the same run
+            store.mark_seen(game_title, release_date_formatted)
+        dedup_seconds += time.perf_counter() - dedup_start
+        if known:
+            telemetry.log(f"Skipping {progress}: {game_title} ({release_date_formatted}) - Already exists")
             page_skipped += 1
+            known_urls.append((game_title, release_date_formatted, detail_page_url))
+            continue
+
+        if listing_scores is not None:
+            page_results.append([game_title, release_date_formatted, *listing_scores, detail_page_url])
+            continue
+        if detail_page_url is None:
+            telemetry.log(f"Warning: Could not find detail page link for a game (card index {index}). Skipping.",
+                          warning=True)
+            page_results.append([game_title, release_date_formatted, "N/A", "0"])
+            continue
+
+        pending.append((len(page_results), (game_title, release_date_formatted, detail_page_url, progress)))
+        page_results.append(None)
+    metrics.observe('dedup', dedup_seconds, calls=len(game_cards))
+
+    # Journal the detail URLs before fetching them, then hand them to the pool
+    with metrics.time('write'):
+        store.record_in_flight(page, [card[2] for _, card in pending])
+    for position, card in pending:
+        page_results[position] = (executor.submit(scrape_game, *card[:3], fetcher, extractor, card[3]), card)
+    del pending
+
+    # Wait for the page's detail fetches so rows are written in page order
+    retries = []
+    with metrics.time('detail_wait'):
+        rows = list(completed_rows(page_results, retries, page, source))
+
+    # Write the page's rows, queue its failures and mark it complete in the journal in one transaction
+    with metrics.time('write'):
+        store.commit_page(page, rows, known_urls, retries, retry_delay, journal=journal)
+    metrics.count('games_new', len(rows))
+    metrics.count('games_skipped', page_skipped)
+    metrics.count('queued_retries', len(retries))
+    return {'rows': len(rows), 'skipped': page_skipped, 'retries': len(retries), 'dates': page_dates}
+
+def crawl(store, fetcher, executor, extractor, start_page=START_PAGE, browse_url_template=BROWSE_URL_TEMPLATE,
+          incremental=False, stop_after_known_pages=INCREMENTAL_STOP_PAGES, source='html',
+          end_page=None, on_page=None):
+    """Walk the browse pages from `start_page`, storing every new game; returns run totals.
+
+    With `source='json'` the pages are finder JSON listings. Their scores are
+    used directly and detail lookups only happen for games the listing lacks
+    scores for.
+
+    A browse page that still fails after BROWSE_ATTEMPTS tries is queued for
+    retry and the crawl moves on; BROWSE_FAILURE_LIMIT such pages in a row stop
+    it, leaving the journal open for --resume.
+
+    `end_page` stops the crawl after that page. `on_page(page)` is called after
+    each page is committed, and the crawl stops early if it returns False.
+
+    Stage timings and counters go to `fetcher.metrics`.
+
+    In incremental mode the crawl stops once `stop_after_known_pages` pages in a
+    row hold nothing but known games, counting only pages that have reached
+    the stored watermark (the newest release date already captured), so the
+    block of known upcoming titles at the top of the listing can't end it early.
+    """
+    metrics = fetcher.metrics
+    totals = {'pages': 0, 'new': 0, 'skipped': 0, 'retries': 0}
+    current_page = start_page
+    known_page_streak = 0
+    failed_pages = 0
+    watermark = store.get_watermark()
+    newest_seen = watermark
+    today = datetime.now().strftime("%Y-%m-%d")
+    if incremental:
+        print(f"Incremental mode: stopping after {stop_after_known_pages} consecutive pages of known games "
+              f"(watermark: {f'{watermark[0]} ({watermark[1]})' if watermark else 'none'})")
+
+    parse_page, _ = source_functions(source, extractor)
+
+    # Loop through pages until no more games are found
+    while True:
+        # Checked before fetching: a job re-leased after its last page starts past it
+        if end_page is not None and current_page > end_page:
+            print(f"Reached the last page of this crawl ({end_page}).")
+            store.finish_journal()
+            break
+        browse_url = browse_url_template.format(current_page, offset=(current_page - 1) * JSON_PAGE_SIZE,
+                                                limit=JSON_PAGE_SIZE, api_key=API_KEY)
+        telemetry.log(f"\n{'='*60}")
+        telemetry.log(f"Fetching page {current_page}: {browse_url}")
+
+        try:
+            status, game_cards = fetch_listing_page(fetcher, browse_url, parse_page)
+        except requests.exceptions.RequestException as e:
+            failed_pages += 1
+            telemetry.log(f"Error fetching browse page {current_page}: {e}. Queued for retry.", warning=True)
+            store.commit_page(current_page, [], retries=[(PAGE_KIND[source], browse_url, None, None, current_page, e)],
+                              retry_delay=retry_delay)
+            totals['retries'] += 1
+            metrics.count('queued_retries')
+            if failed_pages >= BROWSE_FAILURE_LIMIT:
+                print(f"{failed_pages} browse pages in a row failed. Stopping; run with --resume to continue.")
+                current_page += 1
+                break
+            result = None
         else:
-            page_new_games.append(game_data)
-            # Add to existing games set to avoid duplicates within the same run
-            existing_games.add((game_data[0], game_data[1]))
-    
-    # Append new games from this page to CSV
-    if page_new_games:
-        append_to_csv(CSV_FILENAME, page_new_games)
-        print(f"\nPage {current_page} complete: Added {len(page_new_games)} new games, skipped {page_skipped} existing games")
-        total_new_games += len(page_new_games)
+            failed_pages = 0
+            if status == 404 or not game_cards:
+                print(f"No game cards found on page {current_page}. Reached the end of available pages.")
+                store.finish_journal()
+                break
+
+            telemetry.log(f"Found {len(game_cards)} game cards on page {current_page}.")
+            result = crawl_page(store, fetcher, executor, extractor, current_page, game_cards, source)
+            if result['rows']:
+                telemetry.log(f"\nPage {current_page} complete: Added {result['rows']} new games, skipped {result['skipped']} existing games")
+            else:
+                telemetry.log(f"\nPage {current_page} complete: No new games found, skipped {result['skipped']} existing games")
+            totals['new'] += result['rows']
+            totals['skipped'] += result['skipped']
+            totals['retries'] += result['retries']
+            for sort_key, game_title in result['dates']:
+                if sort_key <= today and (newest_seen is None or sort_key > newest_seen[0]):
+                    newest_seen = (sort_key, game_title)
+
+        metrics.count('pages')
+        elapsed = time.time() - metrics.started
+        telemetry.progress(f"Page {current_page}: {totals['new']} new, {totals['skipped']} skipped, "
+                           f"{totals['retries']} queued | {metrics.counters['pages'] / elapsed:.2f} pages/s | "
+                           f"{metrics.counters.get('bytes_downloaded', 0) / 1e6:.1f} MB")
+        current_page += 1
+
+        if on_page is not None and on_page(current_page - 1) is False:
+            print(f"Stopping after page {current_page - 1} at the caller's request.")
+            break
+
+        if incremental and result is not None:
+            page_dates = [sort_key for sort_key, _ in result['dates']]
+            reached_watermark = watermark is None or (page_dates and min(page_dates) <= watermark[0])
+            if not result['rows'] and not result['retries'] and reached_watermark:
+                known_page_streak += 1
+            else:
+                known_page_streak = 0
+            if known_page_streak >= stop_after_known_pages:
+                print(f"{known_page_streak} consecutive pages of known games. Incremental crawl complete.")
+                store.finish_journal()
+                break
+
+    telemetry.progress(f"Crawl stopped at page {current_page}: {totals['new']} new, {totals['skipped']} skipped",
+                       done=True)
+    if newest_seen and newest_seen != watermark:
+        store.set_watermark(*newest_seen)
+    totals['pages'] = current_page - start_page
+    return totals
+
+def drain_retries(store, fetcher, executor, extractor, max_wait=RETRY_MAX_WAIT):
+    """Retry queued fetches as their backoff runs out; returns run totals.
+
+    Waits at most `max_wait` seconds for entries that are still backing off.
+    Whatever is left stays queued for the next run, and entries that have
+    failed RETRY_MAX_ATTEMPTS times stay in the queue, unretried, for inspection.
+    """
+    metrics = fetcher.metrics
+    totals = {'recovered': 0, 'failed': 0}
+    deadline = time.time() + max_wait
+    while True:
+        due = store.due_retries(RETRY_BATCH, RETRY_MAX_ATTEMPTS)
+        if not due:
+            next_attempt = store.next_retry_time(RETRY_MAX_ATTEMPTS)
+            if next_attempt is None or next_attempt > deadline:
+                break
+            with metrics.time('backoff'):
+                time.sleep(max(0.0, next_attempt - time.time()))
+            continue
+        telemetry.log(f"\nRetrying {len(due)} queued fetches")
+        metrics.count('retries', len(due))
+
+        # Listing pages one at a time, through the normal page pipeline (outside the crawl journal)
+        for kind, url, _, _, page in (entry for entry in due if entry[0] in PAGE_KIND.values()):
+            source = 'json' if kind == PAGE_KIND['json'] else 'html'
+            try:
+                status, game_cards = fetcher.get(url, source_functions(source, extractor)[0], stage='browse')
+            except requests.exceptions.RequestException as e:
+                store.enqueue_retries([(kind, url, None, None, page, e)], retry_delay)
+                totals['failed'] += 1
+                continue
+            if status == 200 and game_cards:
+                crawl_page(store, fetcher, executor, extractor, page, game_cards, source, journal=False)
+            store.remove_retries([url])
+            totals['recovered'] += 1
+
+        # Games concurrently, committed as one batch
+        games = [entry for entry in due if entry[0] in GAME_KIND.values()]
+        futures = [executor.submit(source_functions('json' if kind == GAME_KIND['json'] else 'html', extractor)[1],
+                                   title, date, url, fetcher, extractor, "[Retry]")
+                   for kind, url, title, date, _ in games]
+        rows, failures = [], []
+        for (kind, url, title, date, page), future in zip(games, futures):
+            try:
+                row = future.result()
+            except requests.exceptions.RequestException as e:
+                failures.append((kind, url, title, date, page, e))
+                continue
+            rows.append(row if row is not None else [title, date, *clean_scores("N/A", "0"), url])
+        with metrics.time('write'):
+            store.resolve_retries(rows, failures, retry_delay)
+        totals['recovered'] += len(rows)
+        totals['failed'] += len(failures)
+    metrics.count('retries_recovered', totals['recovered'])
+    return totals
+
+def refresh(store, fetcher, executor, extractor, budget=REFRESH_BUDGET):
+    """Re-fetch the `budget` most overdue games and update their rows in place; returns run totals."""
+    stale = store.stale_games(budget)
+    print(f"Refreshing {len(stale)} games (budget: {budget})")
+    totals = {'refreshed': 0, 'gone': 0, 'failed': 0}
+
+    for start in range(0, len(stale), REFRESH_BATCH):
+        batch = stale[start:start + REFRESH_BATCH]
+        futures = [executor.submit(scrape_game_details, game_title, release_date, detail_page_url, fetcher, extractor,
+                                   f"({start + i + 1}/{len(stale)}) [Refresh]")
+                   for i, (game_title, release_date, detail_page_url) in enumerate(batch)]
+        updated, gone = [], []
+        for (game_title, release_date, _), future in zip(batch, futures):
+            try:
+                row = future.result()
+            except requests.exceptions.RequestException:
+                totals['failed'] += 1  # Left untouched, so it stays at the front of the queue
+                continue
+            if row is None:
+                gone.append((game_title, release_date))
+            else:
+                updated.append(row)
+        with fetcher.metrics.time('write'):
+            store.refresh_many(updated)
+            store.touch_many(gone)
+        totals['refreshed'] += len(updated)
+        totals['gone'] += len(gone)
+        telemetry.progress(f"Refreshed {start + len(batch)}/{len(stale)}: {totals['refreshed']} updated, "
+                           f"{totals['gone']} gone, {totals['failed']} failed", done=start + len(batch) == len(stale))
+    return totals
+
+# --- Re-extraction from the page archive ---
+_worker_extractor = None
+
+def _init_reextract_worker(parser):
+    global _worker_extractor
+    _worker_extractor = get_backend(parser)
+
+def reextract_page(record):
+    """Parse one archived page in a --reextract worker process; returns (url, stage, result).
+
+    Browse and listing pages give their cards, detail pages and user score
+    summaries give CSV scores (None for a summary without a score).
+    """
+    url, stage, page_format, path, offset, length = record
+    text = read_record(path, offset, length)
+    if stage == 'browse':
+        result = parse_listing_page(text) if page_format == 'json' else parse_browse_page(text, _worker_extractor)
+    elif stage == 'stats':
+        summary = parse_user_stats(text)
+        result = summary_scores(summary) if summary is not None else None
+    else:
+        user_score, num_user_ratings, _ = detail_scores(_worker_extractor.detail(text), url)
+        result = clean_scores(user_score, num_user_ratings)
+    return url, stage, result
+
+def reextract(store, archive, parser, workers=None):
+    """Re-run extraction over the newest archived copy of every page, with no network access; returns run totals.
+
+    Pages are parsed across `workers` processes (default: one per core).
+    Cards from browse/listing pages add the games the store is missing, and
+    the scores from detail pages, listings and user score summaries (in
+    increasing order of preference, as in a crawl) overwrite stored scores.
+    """
+    records = archive.latest()
+    print(f"Re-extracting {len(records)} archived pages with {workers or os.cpu_count()} processes")
+    cards, scores, summaries = [], {}, {}
+    with ProcessPoolExecutor(workers, initializer=_init_reextract_worker, initargs=(parser,)) as pool:
+        for done, (url, stage, result) in enumerate(pool.map(reextract_page, records, chunksize=REEXTRACT_CHUNK), 1):
+            if stage == 'browse':
+                cards.extend(result)
+            elif stage == 'stats':
+                slug = STATS_SLUG_RE.search(url)
+                if result is not None and slug:
+                    summaries[f"{BASE_URL}/game/{slug.group(1)}/"] = result
+            else:
+                scores[url] = result
+            if done % 1000 == 0 or done == len(records):
+                telemetry.progress(f"Re-extracted {done}/{len(records)} pages", done=done == len(records))
+    scores.update({card[2]: card[3] for card in cards if len(card) > 3 and card[2] and card[3] is not None})
+    scores.update(summaries)
+
+    # Games the archive has cards for but the store lacks (e.g. missed by a broken card selector)
+    rows, known_urls = [], []
+    for game_title, release_date_formatted, detail_page_url, *_ in cards:
+        if store.contains(game_title, release_date_formatted):
+            known_urls.append((game_title, release_date_formatted, detail_page_url))
+            continue
+        store.mark_seen(game_title, release_date_formatted)
+        rows.append([game_title, release_date_formatted,
+                     *scores.get(detail_page_url, clean_scores("N/A", "0")), detail_page_url])
+    store.upsert_many(rows)
+    store.backfill_urls(known_urls)
+    rescored = store.rescore_many((url, *url_scores) for url, url_scores in scores.items())
+    return {'pages': len(records), 'cards': len(cards), 'new': len(rows), 'rescored': rescored}
+
+def export(store, metrics):
+    """Write games.csv, append the run's changes to the changelog, and snapshot the dataset when pyarrow is installed."""
+    with metrics.time('csv_export'):
+        store.export_csv(CSV_FILENAME)
+    with metrics.time('changelog_export'):
+        metrics.count('changes_exported', store.export_changes(changelog.CHANGELOG_FILENAME))
+    if store.dataset is not None:
+        with metrics.time('dataset_export'):
+            store.dataset.write_snapshot(store.iter_rows(dataset.SNAPSHOT_BATCH))
+
+def plan_crawl(store, resume, source):
+    """Return (start page, browse URL template, source) for a new crawl, or for the interrupted one when resuming."""
+    journal = store.load_journal() if resume else None
+    if journal and not journal['finished']:
+        print(f"Resuming at page {journal['last_completed_page'] + 1} ({journal['rows_written']} rows already written, "
+              f"{len(journal['in_flight'])} detail fetches were interrupted)")
+        return journal['last_completed_page'] + 1, journal['browse_url_template'], journal.get('source', 'html')
+
+    if resume:
+        print("No interrupted crawl to resume. Starting a new crawl.")
+    browse_url_template = JSON_LISTING_URL_TEMPLATE if source == 'json' else BROWSE_URL_TEMPLATE
+    store.start_journal(browse_url_template, START_PAGE, source)
+    return START_PAGE, browse_url_template, source
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scrape Metacritic's game catalogue into games.csv.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="stop once the crawl is past the newest known games instead of walking every page")
+    parser.add_argument('--stop-after', type=int, default=INCREMENTAL_STOP_PAGES, metavar='PAGES',
+                        help=f"consecutive known-only pages that end an incremental crawl (default: {INCREMENTAL_STOP_PAGES})")
+    parser.add_argument('--parser', choices=available_backends(), default=DEFAULT_BACKEND,
+                        help=f"HTML extraction backend (default: {DEFAULT_BACKEND})")
+    parser.add_argument('--source', choices=['html', 'json'], default='html',
+                        help="read the catalogue from HTML browse pages or from the JSON listing API (default: html)")
+    parser.add_argument('--rate', type=float, default=REQUESTS_PER_SECOND,
+                        help=f"top request rate across all fetches, backed off on 429/5xx (default: {REQUESTS_PER_SECOND})")
+    parser.add_argument('--max-in-flight', type=int, default=MAX_IN_FLIGHT,
+                        help=f"most detail pages fetched at once; halved on 429/5xx and regrown on success "
+                             f"(default: {MAX_IN_FLIGHT})")
+    parser.add_argument('--refresh', type=int, nargs='?', const=REFRESH_BUDGET, metavar='BUDGET',
+                        help=f"instead of crawling, re-fetch the BUDGET most overdue games (default: {REFRESH_BUDGET})")
+    parser.add_argument('--archive', nargs='?', const=ARCHIVE_DIR, metavar='DIR',
+                        help=f"keep a compressed copy of every page fetched in DIR (default: {ARCHIVE_DIR})")
+    parser.add_argument('--reextract', action='store_true',
+                        help="instead of crawling, re-run extraction over the archived pages (no network access)")
+    parser.add_argument('--workers', type=int, help="processes used by --reextract (default: one per core)")
+    parser.add_argument('--migrate-dates', action='store_true',
+                        help="instead of crawling, rewrite release dates stored in older formats as MM/DD/YYYY")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue an interrupted crawl from the page after the last one completed")
+    parser.add_argument('--retry-wait', type=float, default=RETRY_MAX_WAIT, metavar='SECONDS',
+                        help=f"how long to wait for queued failed fetches still backing off (default: {RETRY_MAX_WAIT})")
+    parser.add_argument('--log', choices=telemetry.LOG_MODES, default='verbose',
+                        help="per-game output (verbose, the default), a single progress line, or only warnings")
+    parser.add_argument('--profile', metavar='PATH', help="run under cProfile and write its stats to PATH")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="track allocations with tracemalloc and print the peak and the top allocation sites")
+    return parser
+
+def run(**options):
+    """Run one scrape job in this process and return its totals.
+
+    Takes the command-line options as keywords (`refresh=500`,
+    `incremental=True`, `parser='lxml'`...), with the same defaults, so a
+    long-running worker can start job after job without a new interpreter.
+    """
+    defaults = vars(build_parser().parse_args([]))
+    unknown = set(options) - set(defaults)
+    if unknown:
+        raise TypeError(f"unknown scrape options: {', '.join(sorted(unknown))}")
+    args = argparse.Namespace(**{**defaults, **options})
+    archive_dir = args.archive or ARCHIVE_DIR
+    if args.reextract and not os.path.isdir(archive_dir):
+        raise FileNotFoundError(f"no page archive at {archive_dir}; crawl with --archive first")
+    telemetry.set_log_mode(args.log)
+    metrics = telemetry.Metrics()
+
+    # Open the game store, seeding it from games.csv the first time
+    store = GameStore(DB_FILENAME, dataset=dataset.DatasetWriter() if dataset.available() else None,
+                      changelog_filename=changelog.CHANGELOG_FILENAME)
+    if len(store) == 0 and os.path.exists(CSV_FILENAME):
+        print(f"Imported {store.import_csv(CSV_FILENAME)} rows from {CSV_FILENAME} into {DB_FILENAME}")
+    print(f"Loaded {len(store)} existing games from {DB_FILENAME}")
+    purged = store.purge_error_rows()
+    if purged:
+        print(f"Removed {purged} rows left by failed fetches in older versions; they'll be fetched again when crawled")
+
+    if args.migrate_dates:
+        try:
+            rewritten, dropped = store.migrate_dates()
+            export(store, metrics)
+        finally:
+            store.close()
+        print(f"Rewrote {rewritten} release dates as MM/DD/YYYY; dropped {dropped} rows already stored under the new date")
+        return {'rewritten': rewritten, 'dropped': dropped}
+
+    if args.reextract:
+        archive = PageArchive(archive_dir)
+        try:
+            with telemetry.profiled(args.profile, args.trace_memory), metrics.time('reextract'):
+                totals = reextract(store, archive, args.parser, args.workers)
+            export(store, metrics)
+        finally:
+            archive.close()
+            store.close()
+        print(f"\n{'='*60}")
+        print("RE-EXTRACTION COMPLETE!")
+        print(f"Archived pages parsed: {totals['pages']} ({totals['cards']} browse cards) in "
+              f"{metrics.timers['reextract'][1]:.1f} s")
+        print(f"Games added: {totals['new']}")
+        print(f"Games whose scores changed: {totals['rescored']}")
+        print(f"Results saved to: {CSV_FILENAME}")
+        return totals
+
+    if args.refresh is None:
+        start_page, browse_url_template, source = plan_crawl(store, args.resume, args.source)
+
+    # One limiter paces every request; the pool keeps up to --max-in-flight detail pages downloading
+    limiter = RateLimiter(args.rate, args.max_in_flight)
+    fetcher = Fetcher(limiter, ResponseCache(CACHE_FILENAME, CACHE_MAX_BYTES), HEADERS,
+                      pool_size=args.max_in_flight + 1, metrics=metrics,
+                      archive=PageArchive(args.archive) if args.archive else None)
+    executor = ThreadPoolExecutor(max_workers=args.max_in_flight)
+
+    try:
+        with telemetry.profiled(args.profile, args.trace_memory):
+            if args.refresh is not None:
+                totals = refresh(store, fetcher, executor, get_backend(args.parser), args.refresh)
+            else:
+                totals = crawl(store, fetcher, executor, get_backend(args.parser), start_page, browse_url_template,
+                               incremental=args.incremental, stop_after_known_pages=args.stop_after, source=source)
+            # Whatever failed, in this run or earlier ones, gets another try once its backoff is up
+            retry_totals = drain_retries(store, fetcher, executor, get_backend(args.parser), args.retry_wait)
+            retry_counts = store.retry_counts(RETRY_MAX_ATTEMPTS)
+    finally:
+        executor.shutdown()
+        fetcher.close()
+        export(store, metrics)
+        store.close()
+        mode = 'refresh' if args.refresh is not None else 'crawl'
+        metrics.write_json(METRICS_FILENAME, mode=mode, parser=args.parser, rate=args.rate,
+                           max_in_flight=args.max_in_flight)
+        metrics.write_prometheus(PROMETHEUS_FILENAME)
+
+    # --- Final Summary ---
+    print(f"\n{'='*60}")
+    if args.refresh is not None:
+        print("REFRESH COMPLETE!")
+        print(f"Games refreshed: {totals['refreshed']}")
+        print(f"Detail pages gone (404): {totals['gone']}")
+        print(f"Fetch errors (retried next run): {totals['failed']}")
     else:
-        print(f"\nPage {current_page} complete: No new games found, skipped {page_skipped} existing games")
-    
-    total_skipped += page_skipped
-    
-    # Move to next page
-    current_page += 1
-    
-    # Add a small delay between pages to be respectful to the server
-    time.sleep(REQUEST_DELAY)
-
-# --- Final Summary ---
-print(f"\n{'='*60}")
-print(f"SCRAPING COMPLETE!")
-print(f"Total pages processed: {current_page - START_PAGE}")
-print(f"Total new games added: {total_new_games}")
-print(f"Total existing games skipped: {total_skipped}")
-print(f"Results saved to: {CSV_FILENAME}")
\ No newline at end of file
+        print("SCRAPING COMPLETE!")
+        print(f"Total pages processed: {totals['pages']}")
+        print(f"Total new games added: {totals['new']}")
+        print(f"Total existing games skipped: {totals['skipped']}")
+    print(f"Retry queue: {retry_totals['recovered']} fetches recovered, {retry_counts['waiting']} still waiting, "
+          f"{retry_counts['exhausted']} given up after {RETRY_MAX_ATTEMPTS} attempts")
+    print(f"Throughput: backed off {limiter.throttles} times on 429/5xx/timeouts; ended at {limiter.rate:.2f} req/s, "
+          f"{int(limiter.in_flight_limit)} in flight")
+    print(f"HTTP cache: {fetcher.cache.stats['hit']} hits, {fetcher.cache.stats['miss']} misses, "
+          f"{fetcher.cache.stats['304']} revalidated (304)")
+    summary = metrics.summary()
+    print(f"Downloaded {summary['counters'].get('bytes_downloaded', 0) / 1e6:.1f} MB in "
+          f"{summary['counters'].get('requests', 0)} requests over {summary['wall_seconds']:.1f} s. Time per stage "
+          f"(summed over threads):")
+    for stage, timer in summary['stages'].items():
+        print(f"  {stage:<16} {timer['seconds']:>9.2f} s  {timer['calls']:>8} calls  max {timer['max_seconds']:.3f} s")
+    print(f"Results saved to: {CSV_FILENAME}" + (f" and {dataset.DATASET_DIR}/" if dataset.available() else ""))
+    print(f"Metrics saved to: {METRICS_FILENAME} and {PROMETHEUS_FILENAME}")
+    totals.update(retries_recovered=retry_totals['recovered'], retries_waiting=retry_counts['waiting'],
+                  retries_exhausted=retry_counts['exhausted'])
+    return totals
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.reextract and not os.path.isdir(args.archive or ARCHIVE_DIR):
+        parser.error(f"no page archive at {args.archive or ARCHIVE_DIR}; crawl with --archive first")
+    run(**vars(args))
+
+if __name__ == '__main__':
+    main()
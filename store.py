@@ -0,0 +1,583 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+import changelog
+import schema
+from schema import CSV_HEADER, normalize_date
+
+CHANGE_TRIGGERS = ['games_inserted', 'games_deleted', 'games_rescored', 'games_rekeyed']
+KEY_MERGE_SIZE = 8192  # Game keys added or discarded since the last merge before they're folded into the fingerprint array
+
+
+def game_key(title, date):
+    """The identity of a game: its title plus its normalized release date."""
+    return (title.strip(), normalize_date(date.strip()))
+
+
+def key_fingerprint(title, date_key):
+    """A (title, normalized date) key as a signed 64-bit integer."""
+    digest = hashlib.blake2b(f"{title}\0{date_key}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+class GameKeys:
+    """The set of known game keys, held as 8-byte fingerprints instead of (title, date) string tuples.
+
+    Fingerprints live in one sorted int64 array, about 8 bytes a game against
+    ~250 for a set of tuples. Keys added or discarded one at a time are noted
+    in two small sets and folded into the array once there are KEY_MERGE_SIZE
+    of them. Two keys sharing a fingerprint (odds of ~3e-8 at a million games)
+    would make the second look known.
+    """
+
+    def __init__(self, keys=()):
+        self._sorted = np.zeros(0, dtype=np.int64)
+        self._recent = set()   # Added, not in the array yet
+        self._removed = set()  # Still in the array, but discarded
+        self.update(keys)
+
+    def __len__(self):
+        return len(self._sorted) - len(self._removed) + len(self._recent)
+
+    def _in_sorted(self, fingerprint):
+        i = self._sorted.searchsorted(fingerprint)
+        return i < len(self._sorted) and self._sorted[i] == fingerprint
+
+    def __contains__(self, key):
+        fingerprint = key_fingerprint(*key)
+        return fingerprint in self._recent or (fingerprint not in self._removed and self._in_sorted(fingerprint))
+
+    def add(self, key):
+        fingerprint = key_fingerprint(*key)
+        if fingerprint in self._removed:
+            self._removed.discard(fingerprint)
+        elif fingerprint not in self._recent and not self._in_sorted(fingerprint):
+            self._recent.add(fingerprint)
+            self._merge_if_full()
+
+    def update(self, keys):
+        self._merge()
+        fingerprints = np.fromiter((key_fingerprint(*key) for key in keys), dtype=np.int64)
+        self._sorted = np.union1d(self._sorted, fingerprints)
+
+    def discard(self, key):
+        fingerprint = key_fingerprint(*key)
+        if fingerprint in self._recent:
+            self._recent.discard(fingerprint)
+        elif self._in_sorted(fingerprint):
+            self._removed.add(fingerprint)
+            self._merge_if_full()
+
+    def difference_update(self, keys):
+        for key in keys:
+            self.discard(key)
+
+    def _merge_if_full(self):
+        if len(self._recent) + len(self._removed) >= KEY_MERGE_SIZE:
+            self._merge()
+
+    def _merge(self):
+        """Fold the recent additions and removals into the array."""
+        if self._removed:
+            removed = np.fromiter(self._removed, dtype=np.int64, count=len(self._removed))
+            self._sorted = self._sorted[~np.isin(self._sorted, removed)]
+        recent = np.sort(np.fromiter(self._recent, dtype=np.int64, count=len(self._recent)))
+        self._sorted = np.insert(self._sorted, self._sorted.searchsorted(recent), recent)
+        self._recent, self._removed = set(), set()
+
+
+def _csv_value(value):
+    return "" if value is None else value
+
+
+def _db_value(value):
+    return None if value == "" else value
+
+
+class GameStore:
+    """SQLite-backed games table with a unique (title, normalized date) index.
+
+    Membership checks go through an in-memory `GameKeys` index of 8-byte key
+    fingerprints: a hash and a binary search whatever the catalogue size, and
+    8 MB for a million games. Rows are written in one transaction per batch,
+    and `export_csv` writes out games.csv for plot.py and other consumers.
+    Given a `dataset.DatasetWriter`, the rows of each committed page are also
+    appended to the columnar dataset as they land.
+    """
+
+    def __init__(self, path, dataset=None, changelog_filename=None):
+        self.path = path
+        self.dataset = dataset
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS games (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                release_date TEXT NOT NULL,
+                date_key TEXT NOT NULL,
+                user_rating,
+                num_ratings,
+                detail_url TEXT,
+                last_fetched REAL,
+                ratings_velocity REAL
+            )""")
+        self._add_missing_columns('games', {'last_fetched': 'REAL', 'ratings_velocity': 'REAL'})
+        self.conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS games_key ON games (title, date_key)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS games_detail_url ON games (detail_url)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS in_flight (url TEXT PRIMARY KEY, page INTEGER)')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS retry_queue (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                title TEXT,
+                release_date TEXT,
+                page INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL,
+                last_error TEXT
+            )""")
+        self._create_change_triggers()
+        self.conn.commit()
+        if changelog_filename is not None:
+            self._continue_change_numbering(changelog_filename)
+        self._keys = GameKeys(self.conn.execute('SELECT title, date_key FROM games'))
+
+    def _add_missing_columns(self, table, columns):
+        """Bring a store created by an older version up to the current schema."""
+        existing = {row[1] for row in self.conn.execute(f'PRAGMA table_info({table})')}
+        for name, column_type in columns.items():
+            if name not in existing:
+                self.conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}')
+
+    # --- Change log ---
+    # Triggers record every insert, score change and delete in the `changes`
+    # table, in the same transaction as the write, with the scores before and
+    # after. Updates that leave the scores as they were (a refresh that found
+    # nothing new) aren't recorded. `export_changes` moves them out to the
+    # append-only changelog file that consumers read (see changelog.py).
+    def _create_change_triggers(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                time REAL NOT NULL,
+                op TEXT NOT NULL,
+                title TEXT NOT NULL,
+                release_date TEXT NOT NULL,
+                old_user_rating,
+                old_num_ratings,
+                new_user_rating,
+                new_num_ratings
+            )""")
+        now = "(julianday('now') - 2440587.5) * 86400.0"
+        insert_new = f"""INSERT INTO changes (time, op, title, release_date, new_user_rating, new_num_ratings)
+                    VALUES ({now}, 'insert', new.title, new.release_date, new.user_rating, new.num_ratings);"""
+        delete_old = f"""INSERT INTO changes (time, op, title, release_date, old_user_rating, old_num_ratings)
+                    VALUES ({now}, 'delete', old.title, old.release_date, old.user_rating, old.num_ratings);"""
+        self.conn.execute(f"CREATE TRIGGER IF NOT EXISTS games_inserted AFTER INSERT ON games BEGIN {insert_new} END")
+        self.conn.execute(f"CREATE TRIGGER IF NOT EXISTS games_deleted AFTER DELETE ON games BEGIN {delete_old} END")
+        self.conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS games_rescored AFTER UPDATE OF user_rating, num_ratings ON games
+            WHEN old.title IS new.title AND old.release_date IS new.release_date
+                AND (old.user_rating IS NOT new.user_rating OR old.num_ratings IS NOT new.num_ratings)
+            BEGIN
+                INSERT INTO changes (time, op, title, release_date, old_user_rating, old_num_ratings,
+                                     new_user_rating, new_num_ratings)
+                VALUES ({now}, 'update', new.title, new.release_date, old.user_rating, old.num_ratings,
+                        new.user_rating, new.num_ratings);
+            END""")
+        # A game whose release date is rewritten is another game to anyone keyed on (title, date)
+        self.conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS games_rekeyed AFTER UPDATE OF title, release_date ON games
+            WHEN old.title IS NOT new.title OR old.release_date IS NOT new.release_date
+            BEGIN {delete_old} {insert_new} END""")
+
+    def pending_changes(self, after=0):
+        """Yield the changes not exported yet (past sequence number `after`) as changelog entries, in order."""
+        cursor = self.conn.execute('SELECT * FROM changes WHERE seq > ? ORDER BY seq', (after,))
+        for seq, at, op, title, release_date, *scores in cursor:
+            entry = {'seq': seq, 'time': round(at, 3), 'op': op, 'title': title, 'release_date': release_date}
+            if op != 'insert':
+                entry['before'] = {'user_rating': scores[0], 'num_ratings': scores[1]}
+            if op != 'delete':
+                entry['after'] = {'user_rating': scores[2], 'num_ratings': scores[3]}
+            yield entry
+
+    def _continue_change_numbering(self, changelog_filename):
+        """Number changes past the changelog's last entry, for a store rebuilt next to an existing changelog.
+
+        The counter lives in games.sqlite, so a new store would restart at 1
+        and its changes would be taken for ones the file already holds. Any
+        changes recorded under the old numbers move up with it.
+        """
+        last = changelog.last_sequence(changelog_filename)
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        counter = row[0] if row else 0
+        if counter >= last:
+            return
+        with self.conn:
+            # Every seq is at most `counter`, below `last`, so the shifted ones can't collide
+            self.conn.execute('UPDATE changes SET seq = seq + ?', (last,))
+            if row:
+                self.conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'changes'", (counter + last,))
+            else:
+                self.conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('changes', ?)", (last,))
+
+    def export_changes(self, changelog_filename):
+        """Append the changes recorded since the last export to `changelog_filename`; returns how many.
+
+        Entries the file already holds (an export that stopped between writing
+        them and clearing them here) are skipped rather than written twice.
+        """
+        self._continue_change_numbering(changelog_filename)
+        count = changelog.append(self.pending_changes(changelog.last_sequence(changelog_filename)),
+                                 changelog_filename)
+        with self.conn:
+            self.conn.execute('DELETE FROM changes WHERE seq <= ?', (changelog.last_sequence(changelog_filename),))
+        return count
+
+    def __len__(self):
+        return len(self._keys)
+
+    def contains(self, title, date):
+        return game_key(title, date) in self._keys
+
+    def mark_seen(self, title, date):
+        """Reserve a key so later cards in the same run are treated as duplicates."""
+        self._keys.add(game_key(title, date))
+
+    def upsert_many(self, rows):
+        """Insert or update rows of (title, date, user rating, number of ratings[, detail URL]) in one transaction."""
+        with self.conn:
+            self._upsert(rows)
+
+    def _upsert(self, rows, fetched_at=None):
+        records = []
+        for row in rows:
+            title, date, user_rating, num_ratings = row[:4]
+            detail_url = row[4] if len(row) > 4 else None
+            key = game_key(title, date)
+            self._keys.add(key)
+            records.append((key[0], date, key[1], _db_value(user_rating), _db_value(num_ratings), detail_url,
+                            fetched_at))
+        self.conn.executemany("""
+            INSERT INTO games (title, release_date, date_key, user_rating, num_ratings, detail_url, last_fetched)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (title, date_key) DO UPDATE SET
+                user_rating = excluded.user_rating,
+                num_ratings = excluded.num_ratings,
+                detail_url = COALESCE(excluded.detail_url, games.detail_url),
+                last_fetched = COALESCE(excluded.last_fetched, games.last_fetched)
+            """, records)
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+    def get_watermark(self):
+        """Return the newest (YYYY-MM-DD release date, title) captured so far, or None."""
+        date = self.get_meta('watermark_date')
+        return (date, self.get_meta('watermark_title')) if date else None
+
+    def set_watermark(self, date, title):
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                                  [('watermark_date', date), ('watermark_title', title)])
+
+    # --- Crawl journal ---
+    # The journal records how far the current crawl got. A page's rows and the
+    # journal update that marks it complete commit in the same transaction, so
+    # after a crash the store holds exactly the pages the journal says it does.
+    def start_journal(self, browse_url_template, start_page, source='html'):
+        """Begin a fresh crawl journal, discarding any previous one."""
+        journal = {'browse_url_template': browse_url_template, 'source': source,
+                   'last_completed_page': start_page - 1, 'rows_written': 0, 'finished': False}
+        with self.conn:
+            self.conn.execute('DELETE FROM in_flight')
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('journal', json.dumps(journal)))
+        return journal
+
+    def load_journal(self):
+        """Return the current crawl journal as a dict (with its in-flight URLs), or None."""
+        value = self.get_meta('journal')
+        if value is None:
+            return None
+        journal = json.loads(value)
+        journal['in_flight'] = [url for url, in self.conn.execute('SELECT url FROM in_flight ORDER BY page')]
+        return journal
+
+    def record_in_flight(self, page, urls):
+        """Note the detail URLs being fetched for `page` before the fetches start."""
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO in_flight VALUES (?, ?)', [(url, page) for url in urls])
+
+    def commit_page(self, page, rows, known_urls=(), retries=(), retry_delay=None, journal=True):
+        """Write a page's rows and mark the page complete in the journal, atomically.
+
+        `known_urls` holds (title, date, detail URL) for the page's already-known
+        games, so rows imported from games.csv pick up the URL that refreshing
+        them needs. `retries` are fetches that failed and go to the retry queue
+        (see `enqueue_retries`) in the same transaction. With `journal=False`
+        (a browse page taken from the retry queue) the journal is left alone.
+        """
+        if journal:
+            journal = json.loads(self.get_meta('journal'))
+            journal['last_completed_page'] = page
+            journal['rows_written'] += len(rows)
+        with self.conn:
+            self._upsert(rows, fetched_at=time.time())
+            self._backfill_urls(known_urls)
+            if retries:
+                self._enqueue(retries, retry_delay)
+            self.conn.executemany('DELETE FROM retry_queue WHERE url = ?', [(row[4],) for row in rows if len(row) > 4])
+            self.conn.execute('DELETE FROM in_flight WHERE page = ?', (page,))
+            if journal:
+                self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('journal', json.dumps(journal)))
+        if self.dataset is not None:
+            self.dataset.append(rows)
+
+    def backfill_urls(self, known_urls):
+        """Record (title, date, detail URL) detail URLs for known games that don't have one yet."""
+        with self.conn:
+            self._backfill_urls(known_urls)
+
+    def _backfill_urls(self, known_urls):
+        self.conn.executemany(
+            'UPDATE games SET detail_url = ? WHERE title = ? AND date_key = ? AND detail_url IS NULL',
+            [(url, *game_key(title, date)) for title, date, url in known_urls if url])
+
+    def finish_journal(self):
+        journal = json.loads(self.get_meta('journal'))
+        journal['finished'] = True
+        self.set_meta('journal', json.dumps(journal))
+
+    # --- Retry queue ---
+    # Fetches that failed with a transient error wait here instead of being
+    # written as rows. Each failure bumps the entry's attempt count and pushes
+    # its next attempt back by `retry_delay(attempts)` seconds.
+    def enqueue_retries(self, entries, retry_delay, now=None):
+        """Queue (kind, url, title, date, page, error) entries; kind is 'detail' or 'browse'."""
+        with self.conn:
+            self._enqueue(entries, retry_delay, now)
+
+    def _enqueue(self, entries, retry_delay, now=None):
+        now = time.time() if now is None else now
+        for kind, url, title, date, page, error in entries:
+            row = self.conn.execute('SELECT attempts FROM retry_queue WHERE url = ?', (url,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            self.conn.execute('INSERT OR REPLACE INTO retry_queue VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                              (url, kind, title, date, page, attempts, now + retry_delay(attempts), str(error)))
+
+    def due_retries(self, limit, max_attempts, now=None):
+        """Up to `limit` queued fetches whose backoff has run out, as (kind, url, title, date, page) tuples."""
+        now = time.time() if now is None else now
+        return self.conn.execute("""
+            SELECT kind, url, title, release_date, page FROM retry_queue
+            WHERE attempts < ? AND next_attempt <= ? ORDER BY next_attempt LIMIT ?""",
+                                 (max_attempts, now, limit)).fetchall()
+
+    def next_retry_time(self, max_attempts):
+        """When the next queued fetch becomes due, or None if none are left to retry."""
+        return self.conn.execute('SELECT MIN(next_attempt) FROM retry_queue WHERE attempts < ?',
+                                 (max_attempts,)).fetchone()[0]
+
+    def retry_counts(self, max_attempts):
+        """Return {'waiting': entries still to retry, 'exhausted': entries out of attempts}."""
+        waiting, exhausted = self.conn.execute(
+            'SELECT COALESCE(SUM(attempts < ?), 0), COALESCE(SUM(attempts >= ?), 0) FROM retry_queue',
+            (max_attempts, max_attempts)).fetchone()
+        return {'waiting': waiting, 'exhausted': exhausted}
+
+    def resolve_retries(self, rows, failures, retry_delay):
+        """Write the rows of retried games and take them off the queue; re-queue the `failures`."""
+        with self.conn:
+            self._upsert(rows, fetched_at=time.time())
+            self.conn.executemany('DELETE FROM retry_queue WHERE url = ?', [(row[4],) for row in rows])
+            self._enqueue(failures, retry_delay)
+        if self.dataset is not None:
+            self.dataset.append(rows)
+
+    def remove_retries(self, urls):
+        with self.conn:
+            self.conn.executemany('DELETE FROM retry_queue WHERE url = ?', [(url,) for url in urls])
+
+    def purge_error_rows(self):
+        """Delete rows that older versions wrote for failed fetches ("N/A (Fetch Error)" / "N/A (Page 404)" dates).
+
+        Their real release date was never recorded, so they can't be retried
+        in place; once deleted, the next crawl that reaches them fetches them
+        again. Returns the number of rows deleted.
+        """
+        with self.conn:
+            rows = self.conn.execute("SELECT title, date_key FROM games WHERE release_date LIKE 'N/A (%'").fetchall()
+            self.conn.execute("DELETE FROM games WHERE release_date LIKE 'N/A (%'")
+        self._keys.difference_update(rows)
+        return len(rows)
+
+    # --- Refresh scheduling ---
+    def stale_games(self, budget, now=None):
+        """Pick up to `budget` games to re-fetch, most overdue first.
+
+        A game's priority is the number of days since it was last fetched,
+        scaled up by how fast its rating count has been growing (ratings/day).
+        Games that have never been fetched by this store come first.
+        """
+        now = time.time() if now is None else now
+        return self.conn.execute("""
+            SELECT title, release_date, detail_url FROM games
+            WHERE detail_url IS NOT NULL
+            ORDER BY last_fetched IS NOT NULL,
+                     (? - COALESCE(last_fetched, 0)) / 86400.0 * (1 + COALESCE(ratings_velocity, 0)) DESC
+            LIMIT ?""", (now, budget)).fetchall()
+
+    def refresh_many(self, rows, now=None):
+        """Update re-fetched games in place, recording when they were fetched and how fast their rating count moves."""
+        now = time.time() if now is None else now
+        records = []
+        for title, date, user_rating, num_ratings in (row[:4] for row in rows):
+            title, date_key = game_key(title, date)
+            records.append({'title': title, 'date_key': date_key, 'now': now,
+                            'user_rating': _db_value(user_rating), 'num_ratings': _db_value(num_ratings)})
+        with self.conn:
+            # Right-hand sides see the row's old values, so the velocity is (new - old count) / days elapsed
+            self.conn.executemany("""
+                UPDATE games SET
+                    ratings_velocity = CASE WHEN last_fetched IS NULL OR :now <= last_fetched THEN ratings_velocity
+                        ELSE MAX(0, COALESCE(:num_ratings, 0) - COALESCE(num_ratings, 0))
+                             / ((:now - last_fetched) / 86400.0) END,
+                    user_rating = :user_rating,
+                    num_ratings = :num_ratings,
+                    last_fetched = :now
+                WHERE title = :title AND date_key = :date_key""", records)
+
+    def touch_many(self, keys, now=None):
+        """Mark games as fetched without changing their values (e.g. their page is gone)."""
+        now = time.time() if now is None else now
+        with self.conn:
+            self.conn.executemany('UPDATE games SET last_fetched = ? WHERE title = ? AND date_key = ?',
+                                  [(now, *game_key(title, date)) for title, date in keys])
+
+    def rescore_many(self, scores):
+        """Set (detail URL, user rating, number of ratings) on the games with those URLs; returns the rows changed."""
+        with self.conn:
+            cursor = self.conn.executemany("""
+                UPDATE games SET user_rating = ?2, num_ratings = ?3
+                WHERE detail_url = ?1 AND (user_rating IS NOT ?2 OR num_ratings IS NOT ?3)""",
+                [(url, _db_value(user_rating), _db_value(num_ratings)) for url, user_rating, num_ratings in scores])
+        return cursor.rowcount
+
+    def import_csv(self, csv_filename):
+        """Load an existing games.csv into the store; returns the number of rows read.
+
+        The file is read and its dates rewritten as MM/DD/YYYY a column at a
+        time (see `schema.canonical_dates`), so legacy "Mar 7, 2025" rows come
+        in with the same key as freshly scraped ones. Its rows aren't recorded
+        in the changelog.
+        """
+        import pandas as pd
+        frame = schema.read_raw_csv(csv_filename)
+        frame = frame[frame[schema.RELEASE_DATE].notna()]  # Make sure we have at least title and date
+        titles = frame[schema.TITLE].fillna('').str.strip()
+        dates = schema.canonical_dates(frame[schema.RELEASE_DATE])
+        date_keys = dates.copy()
+        legacy = ~dates.str.fullmatch(schema.CANONICAL_DATE).to_numpy(dtype=bool)  # Unparseable: "TBA", ""...
+        date_keys[legacy] = dates[legacy].map(normalize_date)
+        # Plain lists: iterating the string columns themselves costs several times more
+        titles, dates, date_keys = titles.tolist(), dates.tolist(), date_keys.tolist()
+        # Numbers, as crawled rows store them: a TEXT '8.1' IS NOT a REAL 8.1 to the changelog triggers
+        ratings, counts = (pd.to_numeric(frame[column], errors='coerce').tolist()
+                           for column in (schema.USER_RATING, schema.NUM_RATINGS))
+        scores = [[None if value != value else value for value in ratings],
+                  [None if value != value else int(value) for value in counts]]
+        # The CSV is where consumers of the changelog start from, so its rows aren't logged as changes
+        for trigger in CHANGE_TRIGGERS:
+            self.conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO games (title, release_date, date_key, user_rating, num_ratings)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (title, date_key) DO UPDATE SET
+                    user_rating = excluded.user_rating,
+                    num_ratings = excluded.num_ratings
+                """, zip(titles, dates, date_keys, *scores))
+            self._create_change_triggers()
+        self._keys.update(zip(titles, date_keys))
+        return len(frame)
+
+    def migrate_dates(self):
+        """Rewrite release dates stored in older formats ("Mar 7, 2025", "2025-03-07"...) as MM/DD/YYYY.
+
+        A legacy row is dropped only if a different row ends up with the same
+        key: one already stored under the new date, or an earlier legacy row
+        rewritten to it. Returns (rows rewritten, duplicates dropped).
+        """
+        rows = self.conn.execute(
+            "SELECT id, title, release_date, date_key FROM games "
+            "WHERE release_date NOT GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]' AND release_date NOT LIKE 'N/A%'"
+        ).fetchall()
+        moves = {}  # Row id -> (title, old date key, new date, new date key)
+        for row_id, title, release_date, old_key in rows:
+            date = schema.format_date(release_date)
+            if date == release_date.strip() or not re.fullmatch(schema.CANONICAL_DATE, date):
+                continue  # Not a date in any known format ("TBA"...)
+            moves[row_id] = (title, old_key, date, game_key(title, date)[1])
+
+        rewritten, dropped, claimed = [], [], set()
+        for row_id, (title, old_key, date, key) in moves.items():
+            holder = self.conn.execute('SELECT id FROM games WHERE title = ? AND date_key = ?', (title, key)).fetchone()
+            # The row holding the key keeps it, unless it's moving to another key itself
+            taken = holder is not None and holder[0] != row_id and moves.get(holder[0], (None,) * 4)[3] in (None, key)
+            if taken or (title, key) in claimed:
+                dropped.append(row_id)
+            else:
+                claimed.add((title, key))
+                rewritten.append((date, key, row_id))
+        with self.conn:
+            self.conn.executemany('DELETE FROM games WHERE id = ?', [(row_id,) for row_id in dropped])
+            # Free the old keys first, so a row can move onto a key another row is moving off
+            self.conn.executemany("UPDATE games SET date_key = '#' || id WHERE id = ?",
+                                  [(row_id,) for _, _, row_id in rewritten])
+            self.conn.executemany('UPDATE games SET release_date = ?, date_key = ? WHERE id = ?', rewritten)
+        self._keys.difference_update([(moves[row_id][0], moves[row_id][1]) for row_id in dropped] +
+                                     [(moves[row_id][0], moves[row_id][1]) for _, _, row_id in rewritten])
+        self._keys.update((moves[row_id][0], key) for _, key, row_id in rewritten)
+        return len(rewritten), len(dropped)
+
+    def iter_rows(self, batch_size):
+        """Yield every game as lists of up to `batch_size` (title, date, user rating, number of ratings, detail URL) rows."""
+        cursor = self.conn.execute(
+            'SELECT title, release_date, user_rating, num_ratings, detail_url FROM games ORDER BY id')
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+    def export_csv(self, csv_filename):
+        """Write every game to `csv_filename` in insertion order, replacing the file atomically."""
+        tmp_filename = csv_filename + '.tmp'
+        with open(tmp_filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV_HEADER)
+            cursor = self.conn.execute(
+                'SELECT title, release_date, user_rating, num_ratings FROM games ORDER BY id')
+            for row in cursor:
+                writer.writerow([_csv_value(value) for value in row])
+        os.replace(tmp_filename, csv_filename)
+
+    def close(self):
+        if self.dataset is not None:
+            self.dataset.close()
+        self.conn.close()
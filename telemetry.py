@@ -0,0 +1,154 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Logging ---
+# 'verbose' prints a block per game (the original behaviour), 'progress' keeps
+# one status line updated on stderr, and 'quiet' prints only warnings, errors
+# and the final summary.
+LOG_MODES = ('verbose', 'progress', 'quiet')
+_log_mode = 'verbose'
+
+
+def set_log_mode(mode):
+    global _log_mode
+    if mode not in LOG_MODES:
+        raise ValueError(f"Unknown log mode '{mode}'. Choose from: {', '.join(LOG_MODES)}")
+    _log_mode = mode
+
+
+def log(message, warning=False):
+    """Print per-page/per-game output. Routine lines only show in verbose mode; warnings always do."""
+    if _log_mode == 'verbose' or warning:
+        if _log_mode == 'progress':
+            sys.stderr.write('\r' + ' ' * 79 + '\r')  # Don't print over the progress line
+        print(message)
+
+
+def log_block(lines, warning=False):
+    """Print a game's log lines in one go. Outside verbose mode a warning shows just its first and last lines."""
+    if _log_mode == 'verbose':
+        print("\n".join(lines))
+    elif warning:
+        log("\n".join([lines[0].strip(), lines[-1]]), warning=True)
+
+
+def progress(message, done=False):
+    """Redraw the progress line (progress mode only); `done` ends the line."""
+    if _log_mode == 'progress':
+        sys.stderr.write('\r' + message.ljust(79) + ('\n' if done else ''))
+        sys.stderr.flush()
+
+
+# --- Metrics ---
+class Metrics:
+    """Thread-safe per-stage timers and counters for one run.
+
+    Timers record how many times a stage ran, its total seconds and its
+    slowest observation (a timed batch counts as one). Counters are plain
+    totals: bytes downloaded, retries, cache hits and so on.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.timers = {}    # stage -> [calls, total seconds, max seconds]
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, calls=1):
+        with self._lock:
+            timer = self.timers.setdefault(stage, [0, 0.0, 0.0])
+            timer[0] += calls
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """Time the `with` block as one call of `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self, **extra):
+        """Return the run's metrics as a JSON-serializable dict, with `extra` fields merged in."""
+        with self._lock:
+            stages = {stage: {'calls': calls, 'seconds': round(total, 6), 'max_seconds': round(slowest, 6)}
+                      for stage, (calls, total, slowest) in sorted(self.timers.items())}
+            counters = dict(sorted(self.counters.items()))
+        return {'started': self.started, 'wall_seconds': round(time.time() - self.started, 3),
+                'stages': stages, 'counters': counters, **extra}
+
+    def write_json(self, path, **extra):
+        _write_atomic(path, json.dumps(self.summary(**extra), indent=2) + '\n')
+
+    def write_prometheus(self, path, prefix='metacritic_scraper'):
+        """Write the metrics in the Prometheus text format (e.g. for node_exporter's textfile collector)."""
+        summary = self.summary()
+        lines = [f'# HELP {prefix}_stage_seconds_total Seconds spent in each stage, summed over threads.',
+                 f'# TYPE {prefix}_stage_seconds_total counter']
+        lines += [f'{prefix}_stage_seconds_total{{stage="{stage}"}} {timer["seconds"]}'
+                  for stage, timer in summary['stages'].items()]
+        lines += [f'# HELP {prefix}_stage_calls_total Times each stage ran.',
+                  f'# TYPE {prefix}_stage_calls_total counter']
+        lines += [f'{prefix}_stage_calls_total{{stage="{stage}"}} {timer["calls"]}'
+                  for stage, timer in summary['stages'].items()]
+        lines += [f'# HELP {prefix}_stage_max_seconds Slowest single call of each stage.',
+                  f'# TYPE {prefix}_stage_max_seconds gauge']
+        lines += [f'{prefix}_stage_max_seconds{{stage="{stage}"}} {timer["max_seconds"]}'
+                  for stage, timer in summary['stages'].items()]
+        for name, value in summary['counters'].items():
+            lines += [f'# TYPE {prefix}_{name}_total counter', f'{prefix}_{name}_total {value}']
+        lines += [f'# TYPE {prefix}_wall_seconds gauge', f'{prefix}_wall_seconds {summary["wall_seconds"]}',
+                  f'# TYPE {prefix}_last_run_timestamp_seconds gauge',
+                  f'{prefix}_last_run_timestamp_seconds {summary["started"]}']
+        _write_atomic(path, '\n'.join(lines) + '\n')
+
+
+def _write_atomic(path, text):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# --- Profiling ---
+@contextmanager
+def profiled(profile_path=None, trace_memory=False, top=15):
+    """Optionally run the `with` block under cProfile and/or tracemalloc.
+
+    cProfile stats are dumped to `profile_path` (open them with pstats or
+    snakeviz). With `trace_memory`, the peak traced memory and the `top`
+    allocation sites are printed at the end.
+    """
+    profiler = None
+    if profile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            print(f"cProfile stats written to {profile_path}")
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"tracemalloc: peak {peak / 1024 / 1024:.1f} MB; top allocation sites:")
+            for stat in snapshot.statistics('lineno')[:top]:
+                print(f"  {stat}")
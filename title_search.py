@@ -0,0 +1,162 @@
+"""Trigram/prefix index of game titles, for the plot page's search box and for plot_server.
+
+Titles are normalized (accents stripped, lowercased, punctuation turned into
+spaces) and indexed by the trigrams of each word, plus each word's first one
+and two letters (" d", " dr") so short query words match word prefixes. A
+query intersects the posting lists of all its grams, then checks the few
+candidates left against the query words.
+"""
+import base64
+import re
+import unicodedata
+
+import numpy as np
+
+INDEX_CHUNK = 65536  # Titles turned into grams at a time when building an index
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def strip_accents(title):
+    decomposed = unicodedata.normalize('NFKD', title)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_title(title):
+    """The form titles and queries are compared in; the page's normalizeTitle does the same."""
+    return NON_WORD_RE.sub(' ', strip_accents(title).lower()).strip()
+
+
+def query_grams(word):
+    """The grams a normalized query word needs: ' ' + the word when it's short (a word prefix), else its trigrams."""
+    if len(word) < 3:
+        return [' ' + word]
+    return [word[i:i + 3] for i in range(len(word) - 2)]
+
+
+def matches_words(normalized, words):
+    spaced = ' ' + normalized
+    return all((' ' + word in spaced) if len(word) < 3 else (word in normalized) for word in words)
+
+
+def pack_grams(first, second, third):
+    """Pack grams of up to three code points into one int64 key (21 bits per code point, 0 = none)."""
+    return first.astype(np.int64) << 42 | second.astype(np.int64) << 21 | third
+
+
+def unpack_gram(key):
+    return ''.join(chr(key >> shift & 0x1FFFFF) for shift in (42, 21, 0) if key >> shift & 0x1FFFFF)
+
+
+def title_gram_pairs(titles, first_position):
+    """(gram key, game position) for the grams of a chunk of titles.
+
+    A title is normalized like `normalize_title` does it (words = runs of
+    letters and digits), then yields ' ' + the first letter and ' ' + the
+    first two letters of each word, and each word's trigrams.
+    """
+    titles = [title if title.isascii() else strip_accents(title) for title in titles]
+    matrix = np.char.lower(np.array(titles, dtype=str))
+    width = max(matrix.dtype.itemsize // 4, 1)
+    chars = matrix.view('U1').reshape(len(titles), width)
+    word = np.zeros((len(titles), width + 2), dtype=bool)  # Two spare columns so trigrams can look ahead
+    word[:, :width] = np.char.isalnum(chars)
+    codes = np.zeros((len(titles), width + 2), dtype=np.int64)
+    codes[:, :width] = matrix.view(np.uint32).reshape(len(titles), width)
+    codes[~word] = 0
+    starts = word[:, :width] & ~np.concatenate([np.zeros((len(titles), 1), dtype=bool), word[:, :width - 1]], axis=1)
+
+    keys, games = [], []
+    rows, cols = np.nonzero(starts)
+    keys.append(pack_grams(np.full(len(rows), ord(' ')), codes[rows, cols], 0))
+    keys.append(pack_grams(np.full(len(rows), ord(' ')), codes[rows, cols], codes[rows, cols + 1]))
+    games += [rows, rows]
+    rows, cols = np.nonzero(word[:, :width] & word[:, 1:width + 1] & word[:, 2:width + 2])
+    keys.append(pack_grams(codes[rows, cols], codes[rows, cols + 1], codes[rows, cols + 2]))
+    games.append(rows)
+    return np.concatenate(keys), np.concatenate(games) + first_position
+
+
+def postings(titles, chunk_size=INDEX_CHUNK):
+    """Return (gram keys, slot of each posting, game of each posting), grouped by slot with games ascending."""
+    if not len(titles):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    pairs = [title_gram_pairs(titles[start:start + chunk_size], start)
+             for start in range(0, len(titles), chunk_size)]
+    gram_keys, slots = np.unique(np.concatenate([keys for keys, _ in pairs]), return_inverse=True)
+    games = np.concatenate([games for _, games in pairs])
+    # Sorting the combined key groups the pairs by gram with games ascending; then drop repeats
+    keys = slots.astype(np.int64) * max(len(titles), 1) + games
+    keys.sort()
+    if len(keys):  # Titles with no grams at all (blank ones) leave none
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+    slots, games = np.divmod(keys, len(titles))
+    return gram_keys, slots, games
+
+
+def varints(values):
+    """LEB128-encode non-negative integers (7 bits per byte, high bit set on all but the last byte)."""
+    values = np.asarray(values, dtype=np.uint32)
+    sizes = 1 + sum((values >= 1 << (7 * k)).astype(np.int64) for k in range(1, 5))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    encoded = np.zeros(int(sizes.sum()), dtype=np.uint8)
+    for k in range(5):
+        has_byte = sizes > k
+        byte = (values[has_byte] >> (7 * k)) & 0x7F | np.where(sizes[has_byte] > k + 1, 0x80, 0)
+        encoded[starts[has_byte] + k] = byte
+    return encoded, sizes
+
+
+def typed_array(values, dtype):
+    """Base64 of `values` as little-endian `dtype`, which the page decodes straight into a typed array."""
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode('ascii')
+
+
+def build_search_index(titles, chunk_size=INDEX_CHUNK):
+    """The index as the plot page embeds it: {'grams', 'offsets', 'counts', 'postings'}.
+
+    Each gram's game positions are stored ascending as varint gaps, so the
+    page only decodes the lists a query needs. Grams are extracted with
+    numpy, a chunk of titles at a time.
+    """
+    gram_keys, slots, games = postings(titles, chunk_size)
+    group_start = np.ones(len(slots), dtype=bool)
+    group_start[1:] = slots[1:] != slots[:-1]
+    deltas = np.where(group_start, games, games - np.concatenate([[0], games[:-1]]))
+    encoded, sizes = varints(deltas)
+    byte_offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    return {
+        'grams': [unpack_gram(int(key)) for key in gram_keys],
+        'offsets': typed_array(byte_offsets[group_start], '<i4'),
+        'counts': typed_array(np.bincount(slots, minlength=len(gram_keys)), '<i4'),
+        'postings': base64.b64encode(encoded.tobytes()).decode('ascii'),
+    }
+
+
+class TitleSearch:
+    """The same index held as numpy arrays, for answering queries in Python (see plot_server)."""
+
+    def __init__(self, titles, chunk_size=INDEX_CHUNK):
+        self.titles = titles
+        gram_keys, slots, self.games = postings(titles, chunk_size)
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(slots, minlength=len(gram_keys)))])
+        self.slots = {unpack_gram(int(key)): (bounds[slot], bounds[slot + 1]) for slot, key in enumerate(gram_keys)}
+
+    def match(self, query):
+        """Ascending positions of the titles containing every word of `query`, or None for an empty query."""
+        words = normalize_title(query).split()
+        if not words:
+            return None
+        lists = []
+        for gram in (gram for word in words for gram in query_grams(word)):
+            start, end = self.slots.get(gram, (0, 0))
+            lists.append(self.games[start:end])
+        lists.sort(key=len)
+        candidates = lists[0]
+        for games in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, games, assume_unique=True)
+        # A title can hold all of a word's trigrams without holding the word itself
+        return np.array([i for i in candidates if matches_words(normalize_title(self.titles[i]), words)],
+                        dtype=np.int64)